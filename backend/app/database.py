@@ -1,14 +1,245 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from collections import deque
+import logging
 import os
+import time
 from dotenv import load_dotenv
+from app.utils import metrics
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL, echo=True, pool_pre_ping=True)
+# -------------------------------
+# ENGINE SETTINGS
+# -------------------------------
+# DB_ECHO: 0 = quiet, 1 = log statements, debug = statements and rows
+DB_ECHO = os.getenv("DB_ECHO", "0")
+# Per process: size the pool for the threads that touch the DB at once
+# (uvicorn's threadpool, the check-in store), times the worker count for
+# the server-side connection limit.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))      # seconds waiting for a connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))      # seconds, -1 = never
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+# Server-side statement timeout (PostgreSQL), 0 = none
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+# SQLite (local runs): WAL lets readers proceed during a write
+DB_SQLITE_WAL = os.getenv("DB_SQLITE_WAL", "1") == "1"
+DB_SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("DB_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+# Statements at least this slow are logged and kept in recent_slow_queries
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+DB_SLOW_QUERY_KEEP = int(os.getenv("DB_SLOW_QUERY_KEEP", "50"))
+# 1 = auth routes use an AsyncSession (asyncpg / aiosqlite) instead of the
+# sync session in the threadpool
+DB_ASYNC = os.getenv("DB_ASYNC", "0") == "1"
+# 1 = create missing tables when the app starts (local runs); otherwise run
+# `python -m scripts.init_db` once per deploy
+DB_CREATE_ALL = os.getenv("DB_CREATE_ALL", "0") == "1"
+
+slow_query_log = logging.getLogger("app.database.slow")
+recent_slow_queries = deque(maxlen=DB_SLOW_QUERY_KEEP)
+
+
+# -------------------------------
+# INSTRUMENTATION
+# -------------------------------
+class _TimedCheckout:
+    """Pool mixin recording how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.db_checkout_wait.observe(time.perf_counter() - started)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def _statement_kind(statement: str) -> str:
+    word = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return word if word in ("SELECT", "INSERT", "UPDATE", "DELETE") else "other"
+
+
+def instrument(engine):
+    """Per-statement timings, slow-query log and connection hold times."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        metrics.db_query_latency.observe(elapsed, kind=_statement_kind(statement))
+        if elapsed * 1000 >= DB_SLOW_QUERY_MS:
+            # parameters are left out: they can hold emails and password hashes
+            text = " ".join(statement.split())[:500]
+            metrics.db_slow_queries.inc()
+            recent_slow_queries.append({"at": time.time(), "ms": round(elapsed * 1000, 1), "statement": text})
+            slow_query_log.warning("slow query (%.1f ms): %s", elapsed * 1000, text)
+
+    @event.listens_for(engine, "handle_error")
+    def _on_error(context):
+        # a failed statement never reaches after_cursor_execute
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+    # How long each pooled connection is held (checkout -> return), for /metrics
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is not None:
+            metrics.db_checkout_hold.observe(time.perf_counter() - started)
+
+    return engine
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout={DB_SQLITE_BUSY_TIMEOUT_MS}")
+    if DB_SQLITE_WAL:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+# -------------------------------
+# ENGINE FACTORY
+# -------------------------------
+def _engine_kwargs(url, poolclass, overrides):
+    kwargs = {
+        "echo": "debug" if DB_ECHO == "debug" else DB_ECHO == "1",
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    connect_args = {}
+
+    sqlite = url.get_backend_name() == "sqlite"
+    in_memory = sqlite and url.database in (None, "", ":memory:")
+    if not in_memory:
+        # an in-memory SQLite database lives in one connection; keep SQLAlchemy's default pool
+        kwargs.update(
+            poolclass=poolclass,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+    if DB_STATEMENT_TIMEOUT_MS > 0 and url.get_backend_name() == "postgresql":
+        if url.get_driver_name() == "asyncpg":
+            connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+        else:
+            connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+    if connect_args:
+        kwargs["connect_args"] = connect_args
+    kwargs.update(overrides)
+    return kwargs
+
+
+def create_db_engine(url=DATABASE_URL, **overrides):
+    """Engine configured from the DB_* settings above; keyword args win."""
+    url = make_url(url)
+    engine = create_engine(url, **_engine_kwargs(url, TimedQueuePool, overrides))
+    if url.get_backend_name() == "sqlite":
+        event.listen(engine, "connect", _sqlite_pragmas)
+    return instrument(engine)
+
+
+def async_url(url):
+    """Same database through its asyncio driver: asyncpg or aiosqlite."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend == "postgresql":
+        return url.set(drivername="postgresql+asyncpg")
+    if backend == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    raise ValueError(f"DB_ASYNC is not supported for {backend} databases")
+
+
+def create_async_db_engine(url=DATABASE_URL, **overrides):
+    """AsyncEngine with the same settings and instrumentation as create_db_engine."""
+    # imported here so the sync-only setup needs neither greenlet nor the async drivers
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = async_url(url)
+    engine = create_async_engine(url, **_engine_kwargs(url, TimedAsyncQueuePool, overrides))
+    if url.get_backend_name() == "sqlite":
+        event.listen(engine.sync_engine, "connect", _sqlite_pragmas)
+    instrument(engine.sync_engine)
+    return engine
+
+
+# -------------------------------
+# SCHEMA
+# -------------------------------
+def create_schema(bind=None):
+    """Create missing tables (existing tables are left as they are)."""
+    from app import models  # noqa: F401  registers the tables on Base
+
+    Base.metadata.create_all(bind=bind or engine)
+
+
+def check_schema(bind=None):
+    """Tables and columns the models expect but the database lacks."""
+    from sqlalchemy import inspect
+    from app import models  # noqa: F401
+
+    inspector = inspect(bind or engine)
+    existing = set(inspector.get_table_names())
+    missing = {}
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing:
+            missing[table.name] = None          # whole table
+            continue
+        columns = {c["name"] for c in inspector.get_columns(table.name)}
+        absent = [c.name for c in table.columns if c.name not in columns]
+        if absent:
+            missing[table.name] = absent
+    return missing
+
+
+def pool_status(engine):
+    pool = engine.pool
+    status = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=pool.overflow(),
+            max_overflow=DB_MAX_OVERFLOW,
+            timeout=DB_POOL_TIMEOUT,
+        )
+    return status
+
+
+engine = create_db_engine()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = None
+AsyncSessionLocal = None
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    async_engine = create_async_db_engine()
+    # no expiry on commit: attributes can't be lazily reloaded outside an await
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
@@ -1,12 +1,29 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
+from starlette.concurrency import run_in_threadpool
+from app import database
+from app.database import engine
 from app.routes import auth, chat, language, analyze, checkin
+from app.utils import llm, metrics, password_pool, resilience
 
-# Create DB tables
-Base.metadata.create_all(bind=engine)
+# ---------------------------------------------------
+# STARTUP / SHUTDOWN
+# ---------------------------------------------------
+# Nothing here talks to the database: tables are created by
+# `python -m scripts.init_db` (or DB_CREATE_ALL=1 for local runs), so a
+# cold start only pays for imports before it can answer.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if database.DB_CREATE_ALL:
+        await run_in_threadpool(database.create_schema)
+    llm.init_client()
+    yield
+    await llm.close_client()
+    password_pool.shutdown()
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # ---------------------------------------------------
 # CORS
@@ -25,6 +42,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ---------------------------------------------------
+# REQUEST METRICS (route template, not raw path, as label)
+# ---------------------------------------------------
+def route_template(scope):
+    """'/checkin/{id}' rather than '/checkin/42', so label values stay bounded."""
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    # routes of included routers may only know their path without the prefix
+    path = scope["path"]
+    for i, char in enumerate(path):
+        if char == "/" and route.path_regex.match(path[i:]):
+            return path[:i] + route.path
+    return route.path
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        path = route_template(request.scope)
+        metrics.http_latency.observe(time.perf_counter() - started, route=path, method=request.method)
+        metrics.http_requests.inc(route=path, method=request.method, status=status)
+
 @app.get("/")
 def home():
     return {"message": "Welcome to the NeuroQ API! Visit /docs for documentation."}
@@ -33,6 +78,29 @@ def home():
 def health():
     return {"status": "ok"}
 
+@app.get("/health/llm")
+def health_llm():
+    # connection reuse, request coalescing and breaker/fallback counts since startup
+    return {
+        "configured": llm.get_client() is not None,
+        **llm.connection_stats.snapshot(),
+        "coalescing": llm.coalescer.snapshot(),
+        "resilience": resilience.snapshot(),
+    }
+
+@app.get("/health/db")
+def health_db():
+    # pool occupancy and the most recent statements over DB_SLOW_QUERY_MS
+    return {
+        "pool": database.pool_status(engine),
+        "slow_query_ms": database.DB_SLOW_QUERY_MS,
+        "recent_slow_queries": list(database.recent_slow_queries),
+    }
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 # ---------------------------------------------------
 # INCLUDE ROUTERS (prefix ONLY here)
 # ---------------------------------------------------
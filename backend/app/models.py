@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, JSON, ForeignKey, Index
 from sqlalchemy.sql import func
 from .database import Base
 
@@ -13,3 +13,31 @@ class User(Base):
     username = Column(String, nullable=True)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class CheckIn(Base):
+    __tablename__ = "checkins"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    timestamp = Column(DateTime, nullable=False)     # naive UTC
+    title = Column(String, nullable=True)
+
+    # what the user submitted (all empty for manually saved predictions)
+    thoughts = Column(Text, nullable=True)
+    symptoms = Column(JSON, nullable=True)
+    mood = Column(Integer, nullable=True)
+    sleep_hours = Column(Float, nullable=True)
+    stress_level = Column(Integer, nullable=True)
+
+    # prediction
+    disorder = Column(String, nullable=True)
+    severity = Column(String, nullable=True)
+    confidence = Column(Float, nullable=True)
+    recommendations = Column(Text, nullable=True)
+    next_steps = Column(Text, nullable=True)
+
+    __table_args__ = (
+        # history pages, recent, stats: WHERE user_id = ? ORDER BY timestamp DESC
+        Index("ix_checkins_user_timestamp", "user_id", "timestamp"),
+    )
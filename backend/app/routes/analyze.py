@@ -1,16 +1,31 @@
 # app/routes/analyze.py
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Response
+from pydantic import BaseModel, Field
 from typing import List, Optional
-from dotenv import load_dotenv
-import os
+import hashlib
 import json
-from ..routes.auth import get_current_user
-
-load_dotenv()
+import os
+import re
+from ..routes.auth import get_current_user, rate_limited
+from ..utils import resilience
+from ..utils.cache import TTLCache
 
 router = APIRouter()
 
+# ---------------------------
+# Result cache settings
+# ---------------------------
+# Bump ANALYZE_PROMPT_VERSION whenever the prompt below changes: it is part
+# of every cache key, so answers produced by an older prompt stop matching.
+ANALYZE_PROMPT_VERSION = os.getenv("ANALYZE_PROMPT_VERSION", "1")
+# Deterministic mode: temperature 0 and cached results. Off = old sampling.
+ANALYZE_DETERMINISTIC = os.getenv("ANALYZE_DETERMINISTIC", "1") == "1"
+ANALYZE_CACHE_SIZE = int(os.getenv("ANALYZE_CACHE_SIZE", "5000"))
+ANALYZE_CACHE_TTL = float(os.getenv("ANALYZE_CACHE_TTL", "86400"))
+SLEEP_BUCKET_HOURS = 0.5
+
+analysis_cache = TTLCache(maxsize=ANALYZE_CACHE_SIZE, ttl=ANALYZE_CACHE_TTL)
+
 # Request model - match your frontend form shape
 class SymptomRequest(BaseModel):
     text: str
@@ -23,6 +38,12 @@ class SymptomRequest(BaseModel):
 # We'll return a dict with:
 # predicted_disorder, confidence_score (0..1), severity_level, recommendations, next_steps, emergency_contact_suggested
 
+HEURISTIC_RECOMMENDATIONS = (
+    "Try relaxation techniques (deep breathing, short mindful breaks), improve sleep hygiene, "
+    "and consider speaking with a mental health professional if symptoms persist."
+)
+HEURISTIC_NEXT_STEPS = "1. Practice relaxation  2. Keep sleep schedule  3. Track symptoms for a week  4. Consider professional help"
+
 # Heuristic fallback generator (used if GROQ key not present or API fails)
 def heuristic_analysis(payload: SymptomRequest):
     score = 0.0
@@ -51,11 +72,8 @@ def heuristic_analysis(payload: SymptomRequest):
         disorder = "Anxiety"
         severity = "moderate"
 
-    recommendations = (
-        "Try relaxation techniques (deep breathing, short mindful breaks), improve sleep hygiene, "
-        "and consider speaking with a mental health professional if symptoms persist."
-    )
-    next_steps = "1. Practice relaxation  2. Keep sleep schedule  3. Track symptoms for a week  4. Consider professional help"
+    recommendations = HEURISTIC_RECOMMENDATIONS
+    next_steps = HEURISTIC_NEXT_STEPS
     emergency = True if (payload.stress_level and payload.stress_level >= 9) or ("self-harm" in payload.text.lower()) else False
 
     return {
@@ -67,37 +85,133 @@ def heuristic_analysis(payload: SymptomRequest):
         "emergency_contact_suggested": emergency
     }
 
-@router.post("/")
-def analyze_symptoms(payload: SymptomRequest, user=Depends(get_current_user)):
-    api_key = os.getenv("GROQ_API_KEY")
-    # If no GROQ key, fallback quickly to heuristic (so results vary)
-    if not api_key:
-        return heuristic_analysis(payload)
+# Same results as heuristic_analysis for many forms at once, scored with
+# NumPy column operations (see utils/heuristic_batch.py)
+def heuristic_analysis_batch(payloads: List[SymptomRequest]):
+    from ..utils import heuristic_batch     # NumPy: imported on first batch, not at startup
+
+    scores = heuristic_batch.score(heuristic_batch.encode(payloads))
+    return [
+        {
+            "predicted_disorder": disorder,
+            "confidence_score": round(confidence, 2),
+            "severity_level": severity,
+            "recommendations": HEURISTIC_RECOMMENDATIONS,
+            "next_steps": HEURISTIC_NEXT_STEPS,
+            "emergency_contact_suggested": emergency,
+        }
+        for confidence, disorder, severity, emergency in zip(
+            scores.confidence.tolist(), scores.disorder, scores.severity.tolist(), scores.emergency.tolist()
+        )
+    ]
+
+# ---------------------------
+# Canonical payload + cache key
+# ---------------------------
+def normalize_text(text: str):
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s-]", "", text.lower())).strip()
+
+
+def canonical_payload(payload: SymptomRequest):
+    """
+    Collapse near-identical submissions onto one form: symptoms sorted,
+    lowercased and de-duplicated, mood/stress clamped to 1..10, sleep rounded
+    to the nearest half hour, free text lowercased with punctuation and
+    extra whitespace removed. Only used for the cache key: the model and
+    the heuristic still see the request as submitted.
+    """
+    def clamp(v):
+        return None if v is None else max(1, min(10, int(v)))
+
+    sleep = payload.sleep_hours
+    if sleep is not None:
+        sleep = round(sleep / SLEEP_BUCKET_HOURS) * SLEEP_BUCKET_HOURS
+
+    return SymptomRequest(
+        text=normalize_text(payload.text),
+        symptoms=sorted({s.strip().lower() for s in payload.symptoms if s.strip()}),
+        overall_mood=clamp(payload.overall_mood),
+        sleep_hours=sleep,
+        stress_level=clamp(payload.stress_level),
+    )
+
+
+def cache_key(canonical: SymptomRequest):
+    text_hash = hashlib.sha256(canonical.text.encode("utf-8")).hexdigest()[:16]
+    return (
+        ANALYZE_PROMPT_VERSION,
+        tuple(canonical.symptoms),
+        canonical.overall_mood,
+        canonical.sleep_hours,
+        canonical.stress_level,
+        text_hash,
+    )
+
+
+@router.get("/cache")
+def analysis_cache_stats(user=Depends(get_current_user)):
+    return {
+        "prompt_version": ANALYZE_PROMPT_VERSION,
+        "deterministic": ANALYZE_DETERMINISTIC,
+        **analysis_cache.stats(),
+    }
+
 
+# ---------------------------
+# Batch scoring (heuristic only)
+# ---------------------------
+ANALYZE_BATCH_MAX = int(os.getenv("ANALYZE_BATCH_MAX", "10000"))
+
+
+class SymptomBatchRequest(BaseModel):
+    items: List[SymptomRequest] = Field(..., max_length=ANALYZE_BATCH_MAX)
+
+
+# For bulk jobs (e.g. re-scoring imported questionnaires): no model call,
+# results[i] answers items[i] exactly as the heuristic fallback would.
+@router.post("/batch")
+def analyze_batch(request: SymptomBatchRequest, user=Depends(get_current_user)):
+    return {"results": heuristic_analysis_batch(request.items)}
+
+
+def parse_analysis(response):
+    # Response text may be in response.choices[0].message.content or similar depending on SDK:
+    # Try a few common shapes
+    raw = None
     try:
-        from groq import Groq
-        client = Groq(api_key=api_key)
-
-        # Build a concise system prompt instructing the model to output JSON only.
-        system_prompt = (
-            "You are a clinical-assistant style model that MUST return a single valid JSON object (no extra text). "
-            "Given the user's symptom data, produce a JSON with the keys: "
-            "predicted_disorder (short string), confidence_score (0..1), severity_level ('mild'/'moderate'/'severe'), "
-            "recommendations (string), next_steps (string), emergency_contact_suggested (true/false)."
-            "Be concise and consistent."
-        )
+        raw = response.choices[0].message.content
+    except Exception:
+        try:
+            raw = response.choices[0].text
+        except Exception:
+            raw = str(response)
 
-        # Compose the user content including payload
-        user_content = f"""
-User text: {payload.text}
-Symptoms: {', '.join(payload.symptoms)}
-Overall mood (1-10): {payload.overall_mood}
-Hours sleep: {payload.sleep_hours}
-Stress level (1-10): {payload.stress_level}
-Return ONLY JSON.
-        """
-
-        response = client.chat.completions.create(
+    # The model should have returned JSON — try to parse
+    # Some models include code fences — strip if present
+    txt = raw.strip()
+    if txt.startswith("```"):
+        # remove ```json or ```
+        txt = "\n".join(txt.splitlines()[1:-1]) if txt.count("\n") >= 2 else txt.strip("`")
+
+    # ensure JSON decode
+    return json.loads(txt)
+
+
+# The model gets llm.LATENCY_BUDGETS["analyze"] seconds; after that, on an
+# error, or while the breaker is open, the heuristic answers instead.
+# X-LLM-Source says which one did.
+@router.post("/")
+async def analyze_symptoms(payload: SymptomRequest, response: Response, user=Depends(rate_limited("analyze"))):
+    key = None
+    if ANALYZE_DETERMINISTIC:
+        key = cache_key(canonical_payload(payload))
+        cached = analysis_cache.get(key)
+        if cached is not None:
+            response.headers[resilience.SOURCE_HEADER] = "cache"
+            return dict(cached)
+
+    async def ask_model(client):
+        completion = await client.chat.completions.create(
             model="llama-3.1-8b-instant",
              messages=[
                 {"role": "system", "content": (
@@ -124,33 +238,17 @@ Return ONLY JSON.
                 Return ONLY JSON. """},
             ],
             max_tokens=300,
-            temperature=0.75,
-            top_p=0.95,
+            temperature=0.0 if ANALYZE_DETERMINISTIC else 0.75,
+            top_p=1.0 if ANALYZE_DETERMINISTIC else 0.95,
         )
+        return parse_analysis(completion)
 
-        # Response text may be in response.choices[0].message.content or similar depending on SDK:
-        # Try a few common shapes
-        raw = None
-        try:
-            raw = response.choices[0].message.content
-        except Exception:
-            try:
-                raw = response.choices[0].text
-            except Exception:
-                raw = str(response)
-
-        # The model should have returned JSON — try to parse
-        # Some models include code fences — strip if present
-        txt = raw.strip()
-        if txt.startswith("```"):
-            # remove ```json or ```
-            txt = "\n".join(txt.splitlines()[1:-1]) if txt.count("\n") >= 2 else txt.strip("`")
-
-        # ensure JSON decode
-        data = json.loads(txt)
-        return data
-
-    except Exception as e:
-        # Log and return heuristic fallback
-        print("Analyze (GROQ) error:", e)
-        return heuristic_analysis(payload)
+    data, source = await resilience.call_llm(
+        "analyze", ask_model, lambda: heuristic_analysis(payload)
+    )
+    response.headers[resilience.SOURCE_HEADER] = source
+
+    # only model answers are cached; a heuristic one is retried next time
+    if key is not None and source.startswith("llm"):
+        analysis_cache.put(key, dict(data))
+    return data
@@ -1,25 +1,95 @@
+import math
+
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
 
-from ..database import SessionLocal
+from ..database import DB_ASYNC, AsyncSessionLocal, SessionLocal
 from .. import models, schemas
 from ..utils.security import (
-    hash_password,
-    verify_password,
     create_access_token,
     decode_access_token
 )
+from ..utils import password_pool, rate_limit
+from ..utils.user_cache import (
+    AUTH_MODE,
+    CurrentUser,
+    user_claims,
+    user_cache,
+    claims_are_stale,
+    invalidate_user,
+    issued_at_ms
+)
 
 router = APIRouter()   # ✅ REMOVE prefix="/auth"
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# ---------------------------
+# DB access
+# ---------------------------
+# DB_ASYNC=0: sync Session, each query run in the threadpool.
+# DB_ASYNC=1: AsyncSession, queries awaited on the event loop.
+# The helpers below take either, so the routes are the same in both modes.
+if DB_ASYNC:
+    async def get_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+else:
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+
+def _first(db, statement):
+    return db.execute(statement).scalars().first()
+
+
+def _save(db, user: models.User):
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+
+
+async def find_user(db, email: str):
+    statement = select(models.User).where(models.User.email == email)
+    if DB_ASYNC:
+        return (await db.execute(statement)).scalars().first()
+    return await run_in_threadpool(_first, db, statement)
+
+
+async def load_user(db, user_id: int):
+    if DB_ASYNC:
+        return await db.get(models.User, user_id)
+    return await run_in_threadpool(db.get, models.User, user_id)
+
+
+async def save_user(db, user: models.User):
+    if DB_ASYNC:
+        db.add(user)
+        await db.commit()
+        await db.refresh(user)
+    else:
+        await run_in_threadpool(_save, db, user)
+
+
+async def _lookup_user(email: str):
+    """Own short-lived session, for get_current_user's DB fallback."""
+    if DB_ASYNC:
+        async with AsyncSessionLocal() as db:
+            db_user = await find_user(db, email)
+            return CurrentUser.from_model(db_user) if db_user else None
+
+    def lookup():
+        with SessionLocal() as db:
+            db_user = _first(db, select(models.User).where(models.User.email == email))
+            return CurrentUser.from_model(db_user) if db_user else None
+
+    return await run_in_threadpool(lookup)
+
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
@@ -27,29 +97,71 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 # ---------------------------
 # Get current user
 # ---------------------------
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-):
+# Stateless mode (default): a fresh cached profile wins, then the verified
+# token claims; the DB is only hit for old tokens without claims, after a
+# profile change, or on a cache miss. Returns a CurrentUser, not an ORM row.
+async def get_current_user(token: str = Depends(oauth2_scheme)):
     payload = decode_access_token(token)
     email = payload.get("sub")
 
     if not email:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
-    user = db.query(models.User).filter(models.User.email == email).first()
-    if not user:
+    uid = payload.get("uid")
+    if AUTH_MODE == "stateless" and uid is not None:
+        user = user_cache.get(uid)
+        if user is not None:
+            return user
+
+        if not claims_are_stale(uid, issued_at_ms(payload)):
+            user = CurrentUser.from_claims(payload)
+            if user is not None:
+                return user
+
+    user = await _lookup_user(email)
+    if user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
+    if AUTH_MODE == "stateless":
+        user_cache.put(user.id, user)
     return user
 
 
+# ---------------------------
+# Rate limiting
+# ---------------------------
+# Use instead of get_current_user on LLM-backed routes:
+#     user=Depends(rate_limited("chat"))
+# Spends one request from the user's bucket for that route (429 with
+# Retry-After once it is empty or their LLM token quota is used up) and
+# charges the tokens of the LLM calls made for this request to the user.
+def rate_limited(route: str):
+    async def dependency(user: CurrentUser = Depends(get_current_user)):
+        if rate_limit.store.blocking:
+            retry = await run_in_threadpool(rate_limit.check, user.id, route)
+        else:
+            retry = rate_limit.check(user.id, route)
+        if retry > 0:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, please slow down",
+                headers={"Retry-After": str(math.ceil(min(retry, 86400)))},
+            )
+        rate_limit.llm_caller.set(user.id)
+        return user
+
+    return dependency
+
+
 # ---------------------------
 # REGISTER
 # ---------------------------
+# register/login are async: bcrypt runs in the password process pool and
+# the (short) DB calls in the threadpool or on the loop (DB_ASYNC), so no
+# thread waits on hashing.
 @router.post("/register", response_model=schemas.UserOut)
-def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    existing = db.query(models.User).filter(models.User.email == user.email).first()
+async def register(user: schemas.UserCreate, db=Depends(get_db)):
+    existing = await find_user(db, user.email)
 
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
@@ -58,12 +170,10 @@ def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
         email=user.email,
         full_name=user.full_name,
         username=user.username,
-        hashed_password=hash_password(user.password)
+        hashed_password=await password_pool.hash_password(user.password)
     )
 
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await save_user(db, new_user)
 
     return new_user
 
@@ -72,13 +182,22 @@ def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
 # LOGIN
 # ---------------------------
 @router.post("/login")
-def login(user: schemas.UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
+async def login(user: schemas.UserLogin, db=Depends(get_db)):
+    db_user = await find_user(db, user.email)
 
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+    if not db_user:
         raise HTTPException(status_code=400, detail="Invalid credentials")
 
-    token = create_access_token({"sub": user.email})
+    ok, new_hash = await password_pool.verify_and_update(user.password, db_user.hashed_password)
+    if not ok:
+        raise HTTPException(status_code=400, detail="Invalid credentials")
+
+    # BCRYPT_ROUNDS changed since this hash was made: store the re-hash
+    if new_hash:
+        db_user.hashed_password = new_hash
+        await save_user(db, db_user)
+
+    token = create_access_token(user_claims(db_user))
 
     return {
         "access_token": token,
@@ -97,7 +216,7 @@ def login(user: schemas.UserLogin, db: Session = Depends(get_db)):
 # GET PROFILE
 # ---------------------------
 @router.get("/me")
-def get_me(user: models.User = Depends(get_current_user)):
+async def get_me(user: CurrentUser = Depends(get_current_user)):
     return {
         "id": user.id,
         "email": user.email,
@@ -107,6 +226,12 @@ def get_me(user: models.User = Depends(get_current_user)):
     }
 
 
+# Requests left per rate-limited route, and LLM tokens left in the quota
+@router.get("/me/limits")
+def get_my_limits(user: CurrentUser = Depends(get_current_user)):
+    return rate_limit.usage(user.id)
+
+
 # ---------------------------
 # UPDATE PROFILE
 # ---------------------------
@@ -116,11 +241,15 @@ class UpdateProfile(BaseModel):
 
 
 @router.put("/update-profile")
-def update_profile(
+async def update_profile(
     data: UpdateProfile,
-    user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current: CurrentUser = Depends(get_current_user),
+    db=Depends(get_db)
 ):
+    user = await load_user(db, current.id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
     updated = False
 
     if data.full_name:
@@ -132,11 +261,16 @@ def update_profile(
         updated = True
 
     if updated:
-        db.commit()
-        db.refresh(user)
+        await save_user(db, user)
+
+        # old tokens now carry a stale profile: drop the cached copy and
+        # hand back a token with fresh claims
+        invalidate_user(user.id)
+        user_cache.put(user.id, CurrentUser.from_model(user))
 
     return {
         "message": "Profile updated successfully",
+        "access_token": create_access_token(user_claims(user)),
         "user": {
             "id": user.id,
             "email": user.email,
@@ -1,49 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import json
+import time
+from fastapi import APIRouter, Depends, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from groq import Groq
-from dotenv import load_dotenv
-import os
-from app.routes.auth import get_current_user
-
-load_dotenv()
+from app.routes.auth import rate_limited
+from app.utils import langdetect, llm, rate_limit, resilience
 
 router = APIRouter()
 
 # Request model
 class ChatRequest(BaseModel):
     message: str
+    need_title: bool = True    # false once the conversation already has a title
 
 
 #  AUTO LANGUAGE DETECTION
 def detect_language(text: str):
-
-    # Hindi
-    if any("\u0900" <= ch <= "\u097F" for ch in text):
-        return "hi"
-
-    # Gujarati
-    if any("\u0A80" <= ch <= "\u0AFF" for ch in text):
-        return "gu"
-
-    # Telugu
-    if any("\u0C00" <= ch <= "\u0C7F" for ch in text):
-        return "te"
-
-    # Marathi (same script as Hindi, but optional)
-    if any("\u0900" <= ch <= "\u097F" for ch in text):
-        return "mr"
-
-    # Default English
-    return "en"
+    """
+    Language code of the message ("en", "hi", "hi-Latn", "mr", "gu", ...),
+    detected locally; "und" when it is none of those (e.g. French).
+    """
+    return langdetect.detect(text).code
 
 #  NEW: SMART CHAT TITLE GENERATION
-def generate_title(client, user_message: str):
+async def generate_title(client, user_message: str):
     prompt = (
         f"Generate a short 3–6 word title describing the topic of this message: "
         f"'{user_message}'. Return ONLY the title, no explanation."
     )
 
-    res = client.chat.completions.create(
+    res = await client.chat.completions.create(
         model="llama-3.1-8b-instant",
         messages=[{"role": "user", "content": prompt}],
         max_tokens=20
@@ -51,46 +39,207 @@ def generate_title(client, user_message: str):
 
     return res.choices[0].message.content.strip()
 
-@router.post("/")
-def chat_with_bot(request: ChatRequest, user=Depends(get_current_user)):
 
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
-        raise HTTPException(500, detail="Groq API key missing in environment")
+# Used when the title call fails or misses its budget
+def fallback_title(user_message: str):
+    words = user_message.split()
+    return " ".join(words[:6]) + ("…" if len(words) > 6 else "")
 
-    try:
-        client = Groq(api_key=api_key)
 
-        #  Detect language of user input
-        detected_lang = detect_language(request.message)
+async def title_within_budget(user_message: str):
+    title, _ = await resilience.call_llm(
+        "title", lambda c: generate_title(c, user_message), lambda: fallback_title(user_message)
+    )
+    return title
+
+
+# Sent instead of a model reply when the model is down, slow or the breaker is open
+FALLBACK_REPLIES = {
+    "en": "I'm having trouble responding right now. I'm still here — "
+          "could you tell me a little more, or try again in a moment?",
+    "hi": "मुझे अभी जवाब देने में परेशानी हो रही है। मैं यहीं हूँ — "
+          "क्या आप थोड़ा और बता सकते हैं, या कुछ देर बाद फिर से कोशिश करें?",
+    "hi-Latn": "Mujhe abhi jawab dene mein pareshani ho rahi hai. Main yahin hoon — "
+               "kya aap thoda aur bata sakte hain, ya thodi der baad phir se koshish karein?",
+    "mr": "मला आत्ता उत्तर देण्यात अडचण येत आहे. मी इथेच आहे — "
+          "तुम्ही थोडे अधिक सांगू शकता का, किंवा थोड्या वेळाने पुन्हा प्रयत्न करा?",
+}
+
 
-        #  System prompt: make AI reply in same language
-        system_prompt = f"""
+def fallback_reply(lang: str):
+    return FALLBACK_REPLIES.get(lang, FALLBACK_REPLIES["en"])
+
+
+#  System prompt: make AI reply in same language
+def chat_messages(message: str, detected_lang: str):
+    system_prompt = """
         You are a multilingual AI. Detect the user's language and always reply 
-        in the same language. Detected language: {detected_lang}.
-        """
-        
-        #  AI MAIN REPLY
-        response = client.chat.completions.create(
+        in the same language."""
+    # "und": not a language we detect locally; leave it to the model
+    if detected_lang != langdetect.UNKNOWN:
+        system_prompt += f" Detected language: {detected_lang}."
+    system_prompt += "\n        "
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": message}
+    ]
+
+
+# The reply and the title are requested concurrently, so a chat turn costs
+# about one LLM round-trip instead of two in series. Both are bounded by
+# their latency budgets; X-LLM-Source says whether the model or the
+# fallback reply answered.
+@router.post("/")
+async def chat_with_bot(request: ChatRequest, response: Response, user=Depends(rate_limited("chat"))):
+
+    #  Detect language of user input
+    detected_lang = detect_language(request.message)
+
+    #  AI MAIN REPLY
+    async def ask_model(c):
+        completion = await c.chat.completions.create(
             model="llama-3.1-8b-instant",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": request.message}
-            ],
+            messages=chat_messages(request.message, detected_lang),
             max_tokens=300
         )
+        return completion.choices[0].message.content
+
+    reply_call = resilience.call_llm("chat", ask_model, lambda: fallback_reply(detected_lang))
+
+    # Generate smart chat title (only from user message) alongside it
+    if request.need_title:
+        (ai_reply, source), smart_title = await asyncio.gather(
+            reply_call, title_within_budget(request.message)
+        )
+    else:
+        (ai_reply, source), smart_title = await reply_call, None
+
+    response.headers[resilience.SOURCE_HEADER] = source
+    return {
+        "reply": ai_reply,
+        "language": detected_lang,  #  send to frontend for TTS
+        "title": smart_title 
+    }
 
-        ai_reply = response.choices[0].message.content
 
-        # Generate smart chat title (only from user message)
-        smart_title = generate_title(client, request.message)
+# ---------------------------
+# STREAMING CHAT (Server-Sent Events)
+# ---------------------------
+def sse(event: str, data: dict):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
-        return {
-            "reply": ai_reply,
-            "language": detected_lang,  #  send to frontend for TTS
-            "title": smart_title 
-        }
 
+async def close_stream(stream):
+    """Close an upstream token stream (Groq's AsyncStream.close, or an async generator's aclose)."""
+    close = getattr(stream, "close", None) or getattr(stream, "aclose", None)
+    if close is None:
+        return
+    try:
+        await close()
     except Exception as e:
-        print("Groq error:", e)
-        raise HTTPException(500, detail="Failed to connect to Groq API")
+        print("Groq stream close error:", repr(e))
+
+
+# Same conversation turn as POST /chat/, but the reply is forwarded token by
+# token as it is generated. Events, in order:
+#   language  {"language": "hi"}          (before any model output)
+#   token     {"text": "..."}             (one per streamed delta)
+#   title     {"title": "..."}            (only if need_title)
+#   done      {"reply": "<full text>"}
+# or a single `error` event if the model call fails part-way. While the
+# breaker is open, or no LLM client is configured, the fallback reply is
+# sent as one token, without calling the model.
+@router.post("/stream")
+async def chat_stream(request: ChatRequest, user=Depends(rate_limited("chat"))):
+
+    client = llm.get_async_client()
+    detected_lang = detect_language(request.message)
+
+    async def fallback_events():
+        reply = fallback_reply(detected_lang)
+        yield sse("language", {"language": detected_lang})
+        yield sse("token", {"text": reply})
+        if request.need_title:
+            yield sse("title", {"title": fallback_title(request.message)})
+        yield sse("done", {"reply": reply})
+
+    async def events():
+        title_task = (
+            asyncio.create_task(title_within_budget(request.message))
+            if request.need_title else None
+        )
+        parts = []
+        started = time.monotonic()
+        first_token = None
+        usage = None
+        stream = None
+        judged = False      # has the breaker been told how this call went?
+        try:
+            yield sse("language", {"language": detected_lang})
+
+            # the budget covers the wait for the reply to start; after that
+            # the client's own read timeout (LLM_TIMEOUT) catches a stall
+            async with asyncio.timeout(llm.LATENCY_BUDGETS["chat"]):
+                stream = await client.chat.completions.create(
+                    model="llama-3.1-8b-instant",
+                    messages=chat_messages(request.message, detected_lang),
+                    max_tokens=300,
+                    stream=True
+                )
+                chunks = aiter(stream)
+                chunk = await anext(chunks, None)
+
+            while chunk is not None:
+                # Groq reports usage on the last chunk, under x_groq
+                usage = getattr(getattr(chunk, "x_groq", None), "usage", None) or usage
+                piece = chunk.choices[0].delta.content if chunk.choices else None
+                if piece:
+                    if first_token is None:
+                        first_token = time.monotonic() - started
+                    parts.append(piece)
+                    yield sse("token", {"text": piece})
+                chunk = await anext(chunks, None)
+            # the breaker judges a stream by its time to first token
+            resilience.breaker.record(True, first_token or 0.0)
+            judged = True
+            if usage is not None:
+                await run_in_threadpool(rate_limit.charge_tokens, user.id, usage.total_tokens)
+
+            if title_task:
+                yield sse("title", {"title": await title_task})
+            yield sse("done", {"reply": "".join(parts)})
+
+        except Exception as e:
+            print("Groq stream error:", repr(e))
+            resilience.breaker.record(False, time.monotonic() - started)
+            judged = True
+            yield sse("error", {"detail": "AI reply failed" if parts else "Failed to connect to Groq API"})
+
+        finally:
+            # also reached when the client disconnects (GeneratorExit /
+            # CancelledError, which `except Exception` does not catch)
+            if title_task:
+                title_task.cancel()
+            if stream is not None:
+                await close_stream(stream)      # hand the connection back to the pool
+            if not judged:
+                if first_token is not None:
+                    resilience.breaker.record(True, first_token)
+                else:
+                    resilience.breaker.abandon()    # no verdict: free the trial slot
+
+    if client is None:
+        upstream, source = False, "fallback-unconfigured"
+    else:
+        upstream = resilience.breaker.allow()
+        source = "llm" if upstream else "fallback-circuit"
+    resilience.count_answer("chat-stream", source)
+    return StreamingResponse(
+        events() if upstream else fallback_events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            resilience.SOURCE_HEADER: source,
+        },
+    )
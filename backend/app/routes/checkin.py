@@ -1,16 +1,21 @@
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
-from datetime import datetime, timedelta
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from datetime import datetime
+from starlette.concurrency import run_in_threadpool
+import csv
+import io
 import json
 import os
-from groq import Groq
-from ..routes.auth import get_current_user
+from ..routes.analyze import SymptomRequest, heuristic_analysis
+from ..routes.auth import get_current_user, rate_limited
+from ..utils import resilience
+from ..utils.checkin_store import get_store
+from ..utils.checkin_sql import parse_timestamp
 import re 
 
 router = APIRouter(tags=["Check-ins"])
 
-DB_FILE = "checkins.json"   # JSON database file
-
 
 # ---------------------------
 # Pydantic Models
@@ -31,23 +36,6 @@ class SavePrediction(BaseModel):
     recommendations: str
     next_steps: str | None = ""    
 
-# ---------------------------
-# Utility: Read / Write JSON
-# ---------------------------
-def load_db():
-    if not os.path.exists(DB_FILE):
-        return []
-    with open(DB_FILE, "r") as f:
-        try:
-            return json.load(f)
-        except:
-            return []
-
-
-def save_db(data):
-    with open(DB_FILE, "w") as f:
-        json.dump(data, f, indent=2)
-
 # ✅ NEW — SAFE JSON EXTRACTOR
 def extract_json(text: str):
     match = re.search(r"\{.*\}", text, re.DOTALL)
@@ -59,14 +47,19 @@ def extract_json(text: str):
 # ---------------------------
 # POST /checkin → Analyze + Save
 # ---------------------------
-@router.post("/")
-def submit_checkin(req: CheckInRequest, user=Depends(get_current_user)):
+# Same local heuristic as /analyze, used when the model is unavailable
+def heuristic_prediction(req: CheckInRequest):
+    return heuristic_analysis(SymptomRequest(
+        text=req.thoughts,
+        symptoms=req.symptoms,
+        overall_mood=req.mood,
+        sleep_hours=req.sleep_hours,
+        stress_level=req.stress_level,
+    ))
 
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
-        raise HTTPException(500, detail="Missing GROQ API KEY")
 
-    client = Groq(api_key=api_key)
+@router.post("/")
+async def submit_checkin(req: CheckInRequest, response: Response, user=Depends(rate_limited("checkin"))):
 
     # ---------- AI PREDICTION ----------
     prompt = f"""
@@ -95,34 +88,32 @@ def submit_checkin(req: CheckInRequest, user=Depends(get_current_user)):
     }}
     """
 
-    try:
-        response = client.chat.completions.create(
+    async def ask_model(client):
+        completion = await client.chat.completions.create(
             model="llama-3.1-8b-instant",
             messages=[{"role": "user", "content": prompt}],
             max_tokens=200
         )
+        prediction = extract_json(completion.choices[0].message.content)
+        if not prediction.get("predicted_disorder"):
+            raise ValueError("prediction without predicted_disorder")
+        return prediction
 
-        ai_raw = response.choices[0].message.content
-        prediction = extract_json(ai_raw)
-
-    except Exception as e:
-        print("Prediction error:", e)
-        raise HTTPException(500, detail="Prediction failed")
+    # falls back to the heuristic on a missed budget, an error or an open breaker
+    prediction, source = await resilience.call_llm(
+        "checkin", ask_model, lambda: heuristic_prediction(req)
+    )
+    response.headers[resilience.SOURCE_HEADER] = source
 
     # ---------- CREATE STORAGE RECORD ----------
-    db = load_db()
-
-    record = {
-        "id": len(db) + 1,
+    # the store blocks until its group commit is on disk: keep that off the event loop
+    record = await run_in_threadpool(get_store().add, {
         "user_id": user.id,
         "timestamp": datetime.utcnow().isoformat() + "Z",
         "title": prediction["predicted_disorder"],
         "input": req.dict(),
         "prediction": prediction
-    }
-
-    db.append(record)
-    save_db(db)
+    })
 
     return record
 
@@ -130,18 +121,26 @@ def submit_checkin(req: CheckInRequest, user=Depends(get_current_user)):
 # ---------------------------
 # GET /checkin → Fetch History
 # ---------------------------
+# Optional keyset pagination: ?limit=20 for the first page, then
+# ?limit=20&before=<timestamp>&before_id=<id> of the last record for the
+# next one (the id keeps check-ins sharing a timestamp, e.g. imported ones,
+# from being skipped). Without `limit` the full history is returned, as before.
 @router.get("/")
-def get_history(user=Depends(get_current_user)):
-
-    db = load_db()
-
-    # return only the current user's check-ins
-    user_records = [r for r in db if r["user_id"] == user.id]
-
-    # sort newest → oldest
-    user_records.sort(key=lambda x: x["timestamp"], reverse=True)
+def get_history(
+    limit: int | None = Query(None, ge=1, le=500),
+    before: str | None = None,
+    before_id: int | None = None,
+    user=Depends(get_current_user)
+):
+    # a malformed cursor is the client's error with either store
+    if before is not None:
+        try:
+            parse_timestamp(before)
+        except ValueError:
+            raise HTTPException(422, detail="before must be an ISO 8601 timestamp")
 
-    return user_records
+    # newest → oldest, read from the per-user index
+    return get_store().user_page(user.id, limit=limit, before=before, before_id=before_id)
 
 
 # ===================================================
@@ -149,33 +148,29 @@ def get_history(user=Depends(get_current_user)):
 # ===================================================
 @router.get("/stats")
 def get_stats(user=Depends(get_current_user)):
-    db = load_db()
-    user_data = [r for r in db if r["user_id"] == user.id]
+    # count, distinct-day streaks and last check-in are kept up to date
+    # by the store on every write/delete, so this is a plain read
+    stats = get_store().user_stats(user.id).as_dict(datetime.utcnow().date())
 
-    total = len(user_data)
-    last_checkin = user_data[-1]["timestamp"] if total > 0 else None
+    return {**stats, "ai_sessions": 0}
 
-    # compute streak based on unique days
-    dates = sorted([
-        r["timestamp"][:10] for r in user_data
-    ], reverse=True)
 
-    streak = 0
-    today = datetime.utcnow().date()
+# ---------------------------
+# GET /checkin/trends → mood / sleep / stress over time
+# ---------------------------
+# ?days=90 (range ending today, UTC) and ?window=7 (rolling average, days).
+# Computed with NumPy from per-user columns the store keeps up to date, so
+# no records are read or parsed here (see utils/checkin_trends.py).
+@router.get("/trends")
+def get_trends(
+    days: int = Query(90, ge=7, le=3660),
+    window: int = Query(7, ge=1, le=90),
+    user=Depends(get_current_user)
+):
+    from ..utils.checkin_trends import compute_trends     # NumPy: imported on first use
 
-    for d in dates:
-        day = datetime.fromisoformat(d).date()
-        if day == today - timedelta(days=streak):
-            streak += 1
-        else:
-            break
-
-    return {
-        "total_checkins": total,
-        "streak": streak,
-        "last_checkin": last_checkin,
-        "ai_sessions": 0
-    }
+    columns = get_store().user_series(user.id)
+    return compute_trends(columns, datetime.utcnow().date(), days=days, window=window)
 
 
 
@@ -184,14 +179,9 @@ def get_stats(user=Depends(get_current_user)):
 # ===================================================
 @router.get("/recent")
 def get_recent(user=Depends(get_current_user)):
-    db = load_db()
-    user_data = [r for r in db if r["user_id"] == user.id]
-
-    # newest first
-    user_data.sort(key=lambda x: x["timestamp"], reverse=True)
-
+    # newest first, only the 5 records we return are read
     recent = []
-    for r in user_data[:5]:
+    for r in get_store().user_page(user.id, limit=5):
         recent.append({
             "id": r["id"],
             "date": r["timestamp"],
@@ -209,19 +199,13 @@ def get_recent(user=Depends(get_current_user)):
 @router.post("/save")
 def save_manual_prediction(data: SavePrediction, user=Depends(get_current_user)):
 
-    db = load_db()
-
-    record = {
-        "id": len(db) + 1,
+    record = get_store().add({
         "user_id": user.id,
         "timestamp": datetime.utcnow().isoformat() + "Z",
         "title": data.predicted_disorder,
         "input": {},
         "prediction": data.dict()
-    }
-
-    db.append(record)
-    save_db(db)
+    })
 
     return {"status": True, "id": record["id"]}
 
@@ -230,16 +214,164 @@ def save_manual_prediction(data: SavePrediction, user=Depends(get_current_user))
 # ===================================================
 @router.delete("/delete/{checkin_id}")
 def delete_checkin(checkin_id: int, user=Depends(get_current_user)):
-    db = load_db()
+    db = get_store()
 
     # Find record
-    record = next((r for r in db if r["id"] == checkin_id and r["user_id"] == user.id), None)
-    if not record:
+    if db.owner(checkin_id) != user.id:
         raise HTTPException(404, detail="Record not found")
 
-    # Remove record
-    db = [r for r in db if r["id"] != checkin_id]
-    save_db(db)
+    # Remove record (tombstone, dropped at next compaction)
+    db.delete(checkin_id)
 
     return {"status": "deleted", "id": checkin_id}
 
+
+
+# ===================================================
+# EXPORT / IMPORT (data portability)
+# ===================================================
+EXPORT_BATCH = int(os.getenv("CHECKIN_EXPORT_BATCH", "500"))
+IMPORT_BATCH = int(os.getenv("CHECKIN_IMPORT_BATCH", "500"))
+IMPORT_MAX_LINE = int(os.getenv("CHECKIN_IMPORT_MAX_LINE", str(64 * 1024)))   # bytes
+IMPORT_MAX_ERRORS = 100     # reported back; further bad lines are only counted
+
+CSV_COLUMNS = [
+    "id", "timestamp", "title",
+    "thoughts", "symptoms", "mood", "sleep_hours", "stress_level",
+    "predicted_disorder", "severity_level", "confidence_score", "recommendations", "next_steps",
+]
+
+
+def csv_row(record: dict):
+    inp = record.get("input") or {}
+    pred = record.get("prediction") or {}
+    return [
+        record["id"], record["timestamp"], record.get("title"),
+        inp.get("thoughts"), ";".join(inp.get("symptoms") or []),
+        inp.get("mood"), inp.get("sleep_hours"), inp.get("stress_level"),
+        pred.get("predicted_disorder"), pred.get("severity_level"), pred.get("confidence_score"),
+        pred.get("recommendations"), pred.get("next_steps"),
+    ]
+
+
+def export_ndjson(records):
+    lines = []
+    for record in records:
+        lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+        if len(lines) >= EXPORT_BATCH:
+            yield "".join(lines)
+            lines = []
+    if lines:
+        yield "".join(lines)
+
+
+def export_csv(records):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(CSV_COLUMNS)
+    for i, record in enumerate(records, 1):
+        writer.writerow(csv_row(record))
+        if i % EXPORT_BATCH == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+# Streams the caller's whole history, oldest first, reading the store one
+# batch at a time: memory stays flat however long the history is.
+@router.get("/export")
+def export_checkins(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    user=Depends(get_current_user)
+):
+    records = get_store().iter_user(user.id, batch_size=EXPORT_BATCH)
+    if format == "csv":
+        body, media_type = export_csv(records), "text/csv"
+    else:
+        body, media_type = export_ndjson(records), "application/x-ndjson"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="checkins.{format}"'},
+    )
+
+
+def import_record(line: bytes, user_id: int):
+    """
+    One NDJSON line (the export format) -> a record for this user.
+    `id` and `user_id` in the line are ignored; input and prediction are
+    validated like POST /checkin and POST /checkin/save.
+    """
+    data = json.loads(line)
+    if not isinstance(data, dict):
+        raise ValueError("expected a JSON object")
+
+    inp = data.get("input") or {}
+    if inp:
+        inp = CheckInRequest(**inp).dict(exclude={"prediction"})
+    prediction = SavePrediction(**(data.get("prediction") or {})).dict()
+
+    timestamp = data.get("timestamp")
+    if timestamp is not None and not isinstance(timestamp, str):
+        raise ValueError("timestamp must be an ISO 8601 string")
+    ts = parse_timestamp(timestamp) if timestamp else datetime.utcnow()
+    return {
+        "user_id": user_id,
+        "timestamp": ts.isoformat(timespec="microseconds") + "Z",
+        "title": data.get("title") or prediction["predicted_disorder"],
+        "input": inp,
+        "prediction": prediction,
+    }
+
+
+def import_error(e: Exception):
+    if isinstance(e, ValidationError):
+        return "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+    return str(e)
+
+
+async def request_lines(request: Request):
+    """Lines of the upload as they arrive (never the whole body in memory)."""
+    pending = b""
+    async for chunk in request.stream():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        if len(pending) > IMPORT_MAX_LINE:
+            raise HTTPException(413, detail=f"Line longer than {IMPORT_MAX_LINE} bytes")
+        for line in lines:
+            yield line
+    yield pending
+
+
+# Body: NDJSON, one check-in per line (what /checkin/export produces).
+# Valid lines are inserted in batches of CHECKIN_IMPORT_BATCH (one write
+# each); invalid ones are skipped and reported by line number.
+@router.post("/import")
+async def import_checkins(request: Request, user=Depends(get_current_user)):
+    store = get_store()
+    batch, errors = [], []
+    imported = skipped = 0
+
+    line_no = 0
+    async for line in request_lines(request):
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            batch.append(import_record(line, user.id))
+        except (ValueError, TypeError, ValidationError) as e:
+            skipped += 1
+            if len(errors) < IMPORT_MAX_ERRORS:
+                errors.append({"line": line_no, "error": import_error(e)})
+            continue
+
+        if len(batch) >= IMPORT_BATCH:
+            imported += len(await run_in_threadpool(store.add_many, batch))
+            batch = []
+
+    if batch:
+        imported += len(await run_in_threadpool(store.add_many, batch))
+
+    return {"imported": imported, "skipped": skipped, "errors": errors}
@@ -1,10 +1,7 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from groq import Groq
-import os
-from dotenv import load_dotenv
+from fastapi import APIRouter
+from pydantic import BaseModel, Field
+from ..utils import langdetect
 
-load_dotenv()
 router = APIRouter(prefix="/detect-language")
 
 
@@ -12,33 +9,26 @@ class LanguageRequest(BaseModel):
     text: str
 
 
+class LanguageBatchRequest(BaseModel):
+    texts: list[str] = Field(..., max_length=1000)
+
+
+def to_response(result: langdetect.Detection):
+    return {
+        "language": result.name,
+        "code": result.code,
+        "confidence": result.confidence,
+        "scores": result.scores,
+    }
+
+
+# Detection runs locally (script ranges + character n-grams): no API key,
+# no network round trip, microseconds per message.
 @router.post("/")
 def detect_language(request: LanguageRequest):
-    api_key = os.getenv("GROQ_API_KEY")
-
-    if not api_key:
-        raise HTTPException(400, detail="Missing Groq API key")
-
-    try:
-        client = Groq(api_key=api_key)
-
-        response = client.chat.completions.create(
-            model="llama-3.1-70b-versatile",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "Detect the language of the user's message. "
-                               "Return ONLY the language name, nothing else."
-                },
-                {"role": "user", "content": request.text}
-            ],
-            max_tokens=20
-        )
-
-        detected = response.choices[0].message["content"].strip()
-
-        return {"language": detected}
-
-    except Exception as e:
-        print("Language detection error:", e)
-        raise HTTPException(500, detail="Failed to detect language")
+    return to_response(langdetect.detect(request.text))
+
+
+@router.post("/batch")
+def detect_language_batch(request: LanguageBatchRequest):
+    return {"results": [to_response(r) for r in langdetect.detect_batch(request.texts)]}
@@ -1,11 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from groq import Groq
-from dotenv import load_dotenv
-import os
 from ..routes.auth import get_current_user
-
-load_dotenv()
+from ..utils import llm
 
 router = APIRouter(prefix="/predict")
 
@@ -20,12 +16,11 @@ class PredictRequest(BaseModel):
 @router.post("/")
 def analyze_mental_health(data: PredictRequest, user=Depends(get_current_user)):
 
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
+    client = llm.get_client()
+    if client is None:
         raise HTTPException(500, "Groq Key Missing")
 
     try:
-        client = Groq(api_key=api_key)
 
         prompt = f"""
 You are a certified mental health specialist AI.
@@ -0,0 +1,486 @@
+import json
+import math
+import mmap
+import os
+import struct
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+
+from .checkin_trends import OTHER, severity_code
+
+# -------------------------------
+# FILE LAYOUT
+# -------------------------------
+# Cold check-ins, column by column, read through mmap:
+#
+#   "NQCKARC1"  u64 header offset  u64 header length      (24-byte prelude)
+#   sections    every fixed-width column, 8-byte aligned
+#   blob        UTF-8 free text (thoughts, recommendations, next steps, extras)
+#   header      JSON: row count, dictionaries, where each section starts
+#
+# Rows are sorted by (user_id, ts, id), so one user's check-ins are a
+# contiguous slice of every column. Titles, disorders, severities and
+# symptoms are dictionary-encoded (the dictionaries live in the header).
+# Anything a column cannot hold exactly (an unexpected key, a float mood, a
+# non-canonical timestamp) goes into the row's "extra" JSON text and
+# overrides the decoded value, so records come back as they went in.
+MAGIC = b"NQCKARC1"
+PRELUDE = struct.Struct("<8sQQ")
+VERSION = 1
+
+MISSING = -1                # dictionary codes, text lengths, emergency flag
+MISSING_SMALL = -32768      # mood, stress_level
+INPUT_PREDICTION_NONE = 1   # flags: input has "prediction": None (POST /checkin)
+
+TEXTS = ("thoughts", "recommendations", "next_steps", "extra")
+SHARED_TEXTS = ("recommendations", "next_steps")    # often identical (heuristic answers): stored once
+SHARED_TEXTS_KEEP = 10_000                          # distinct texts remembered per write
+DICTIONARIES = ("title", "disorder", "severity", "symptom")
+
+ROW_COLUMNS = {
+    "user_id": "<i8",
+    "ts": "<i8",                # microseconds since 1970-01-01, UTC
+    "id": "<i8",
+    "mood": "<i2",
+    "stress": "<i2",
+    "sleep": "<f8",             # NaN when absent
+    "confidence": "<f8",
+    "emergency": "<i1",
+    "flags": "<u1",
+    "title": "<i4",             # MISSING: title is None
+    "disorder": "<i4",
+    "severity": "<i4",
+    "symptoms_start": "<i8",    # slice of the symptom_codes section
+    "symptoms_len": "<i4",
+    **{f"{name}_off": "<i8" for name in TEXTS},     # byte range in the blob
+    **{f"{name}_len": "<i4" for name in TEXTS},
+}
+# besides the row columns: symptom_codes, and ids_sorted/id_rows (id -> row)
+SECTIONS = {**ROW_COLUMNS, "symptom_codes": "<i4", "ids_sorted": "<i8", "id_rows": "<i8"}
+
+EPOCH = datetime(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+DAY_US = 86_400_000_000
+
+
+def to_micros(timestamp: str) -> int:
+    """'2025-12-04T09:29:55.927989Z' -> microseconds since the epoch (UTC)."""
+    ts = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return (ts - EPOCH) // timedelta(microseconds=1)
+
+
+def from_micros(micros: int) -> str:
+    return (EPOCH + timedelta(microseconds=micros)).isoformat() + "Z"
+
+
+def archivable(rec: dict) -> bool:
+    """Records need integer ids and a parseable timestamp to be sorted into the archive."""
+    if type(rec.get("id")) is not int or type(rec.get("user_id")) is not int:
+        return False
+    try:
+        to_micros(rec["timestamp"])
+    except (KeyError, TypeError, ValueError):
+        return False
+    return True
+
+
+# -------------------------------
+# WRITING
+# -------------------------------
+def _is_int16(v):
+    return type(v) is int and MISSING_SMALL < v <= 32767
+
+
+def _is_float(v):
+    return type(v) is float and not math.isnan(v)
+
+
+def _is_str(v):
+    return type(v) is str
+
+
+class _Encoder:
+    """Records -> column lists. Dictionaries only grow, so existing codes stay valid."""
+
+    def __init__(self, dictionaries: dict, text_base: int, symptom_base: int):
+        self.dictionaries = {name: list(dictionaries.get(name, ())) for name in DICTIONARIES}
+        self._codes = {name: {v: i for i, v in enumerate(values)} for name, values in self.dictionaries.items()}
+        self.rows = {name: [] for name in ROW_COLUMNS}
+        self.symptom_codes = []
+        self.blob = bytearray()
+        self._shared = {}           # text -> (offset, length) already in self.blob
+        self._text_base = text_base
+        self._symptom_base = symptom_base
+
+    def _code(self, name, value):
+        codes = self._codes[name]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self.dictionaries[name])
+            self.dictionaries[name].append(value)
+        return code
+
+    def _text(self, name, value):
+        if value is None:
+            self.rows[f"{name}_off"].append(0)
+            self.rows[f"{name}_len"].append(MISSING)
+            return
+        span = self._shared.get(value) if name in SHARED_TEXTS else None
+        if span is None:
+            data = value.encode("utf-8")
+            span = (self._text_base + len(self.blob), len(data))
+            self.blob += data
+            if name in SHARED_TEXTS:
+                if len(self._shared) >= SHARED_TEXTS_KEEP:
+                    self._shared.clear()
+                self._shared[value] = span
+        self.rows[f"{name}_off"].append(span[0])
+        self.rows[f"{name}_len"].append(span[1])
+
+    def _field(self, section, key, fits, encode, missing, extra):
+        """Encoded value of section[key], or `missing` (the value then goes to `extra`)."""
+        if key not in section:
+            return missing
+        value = section[key]
+        if fits(value):
+            return encode(value)
+        extra[key] = value
+        return missing
+
+    def add(self, rec: dict):
+        rows = self.rows
+        extra = {"record": {}, "input": {}, "prediction": {}}
+
+        inp = rec.get("input")
+        if not isinstance(inp, dict):
+            extra["record"]["input"] = inp
+            inp = {}
+        pred = rec.get("prediction")
+        if not isinstance(pred, dict):
+            extra["record"]["prediction"] = pred
+            pred = {}
+
+        ts = to_micros(rec["timestamp"])
+        if from_micros(ts) != rec["timestamp"]:
+            extra["record"]["timestamp"] = rec["timestamp"]
+        rows["user_id"].append(rec["user_id"])
+        rows["ts"].append(ts)
+        rows["id"].append(rec["id"])
+
+        title = rec.get("title")
+        rows["title"].append(self._code("title", title) if _is_str(title) else MISSING)
+        if title is not None and not _is_str(title):
+            extra["record"]["title"] = title
+        for key in rec:
+            if key not in ("id", "user_id", "timestamp", "title", "input", "prediction"):
+                extra["record"][key] = rec[key]
+
+        # input (what the user submitted)
+        ex = extra["input"]
+        self._text("thoughts", self._field(inp, "thoughts", _is_str, str, None, ex))
+        symptoms = self._field(
+            inp, "symptoms", lambda v: type(v) is list and all(map(_is_str, v)), list, None, ex
+        )
+        if symptoms is None:
+            rows["symptoms_start"].append(0)
+            rows["symptoms_len"].append(MISSING)
+        else:
+            rows["symptoms_start"].append(self._symptom_base + len(self.symptom_codes))
+            rows["symptoms_len"].append(len(symptoms))
+            self.symptom_codes.extend(self._code("symptom", s) for s in symptoms)
+        rows["mood"].append(self._field(inp, "mood", _is_int16, int, MISSING_SMALL, ex))
+        rows["sleep"].append(self._field(inp, "sleep_hours", _is_float, float, math.nan, ex))
+        rows["stress"].append(self._field(inp, "stress_level", _is_int16, int, MISSING_SMALL, ex))
+        flags = 0
+        if "prediction" in inp:
+            if inp["prediction"] is None:
+                flags |= INPUT_PREDICTION_NONE
+            else:
+                ex["prediction"] = inp["prediction"]
+        rows["flags"].append(flags)
+        for key in inp:
+            if key not in ("thoughts", "symptoms", "mood", "sleep_hours", "stress_level", "prediction"):
+                ex[key] = inp[key]
+
+        # prediction
+        ex = extra["prediction"]
+        rows["disorder"].append(self._field(
+            pred, "predicted_disorder", _is_str, lambda v: self._code("disorder", v), MISSING, ex))
+        rows["confidence"].append(self._field(pred, "confidence_score", _is_float, float, math.nan, ex))
+        rows["severity"].append(self._field(
+            pred, "severity_level", _is_str, lambda v: self._code("severity", v), MISSING, ex))
+        self._text("recommendations", self._field(pred, "recommendations", _is_str, str, None, ex))
+        self._text("next_steps", self._field(pred, "next_steps", _is_str, str, None, ex))
+        rows["emergency"].append(self._field(
+            pred, "emergency_contact_suggested", lambda v: type(v) is bool, int, MISSING, ex))
+        for key in pred:
+            if key not in ("predicted_disorder", "confidence_score", "severity_level",
+                           "recommendations", "next_steps", "emergency_contact_suggested"):
+                ex[key] = pred[key]
+
+        extra = {part: values for part, values in extra.items() if values}
+        self._text("extra", json.dumps(extra, ensure_ascii=False, separators=(",", ":")) if extra else None)
+
+    def columns(self) -> dict:
+        return {name: np.array(values, dtype=ROW_COLUMNS[name]) for name, values in self.rows.items()}
+
+
+def _align(f):
+    pad = -f.tell() % 8
+    f.write(b"\0" * pad)
+
+
+def write_archive(path: str, old: "CheckinArchive", records, drop_ids=()) -> list:
+    """
+    Write a new archive file at `path`: the rows of `old` minus `drop_ids`,
+    plus `records` (the ones that are archivable). Returns the ids of the
+    records added.
+
+    Old rows are carried over as whole columns and old text and symptom
+    codes as whole regions; dropped rows leave their text behind, which is
+    cheap next to rewriting every string.
+    """
+    encoder = _Encoder(old.dictionaries, old.blob_size, len(old.columns["symptom_codes"]))
+    added = []
+    for rec in records:
+        if archivable(rec):
+            encoder.add(rec)
+            added.append(rec["id"])
+    new = encoder.columns()
+
+    keep = slice(None)
+    if drop_ids and len(old):
+        keep = ~np.isin(old.columns["id"], np.fromiter(drop_ids, np.int64, len(drop_ids)))
+    cols = {name: np.concatenate([old.columns[name][keep], new[name]]) for name in ROW_COLUMNS}
+    order = np.lexsort((cols["id"], cols["ts"], cols["user_id"]))
+    cols = {name: col[order] for name, col in cols.items()}
+
+    id_rows = np.argsort(cols["id"], kind="stable")
+    ids_sorted = cols["id"][id_rows]
+    if np.any(ids_sorted[1:] == ids_sorted[:-1]):
+        raise ValueError("duplicate ids in archive")
+    cols["ids_sorted"] = ids_sorted
+    cols["id_rows"] = id_rows
+    cols["symptom_codes"] = np.concatenate([
+        old.columns["symptom_codes"], np.array(encoder.symptom_codes, dtype=SECTIONS["symptom_codes"]),
+    ])
+
+    sections = {}
+    with open(path, "wb") as f:
+        f.write(PRELUDE.pack(MAGIC, 0, 0))
+        for name, dtype in SECTIONS.items():
+            _align(f)
+            data = np.ascontiguousarray(cols[name], dtype=dtype)
+            sections[name] = [dtype, f.tell(), len(data)]
+            f.write(data.tobytes())
+
+        _align(f)
+        blob_offset = f.tell()
+        old.copy_blob(f)
+        f.write(encoder.blob)
+        blob_size = f.tell() - blob_offset
+
+        header = json.dumps({
+            "version": VERSION,
+            "count": len(cols["id"]),
+            "created": datetime.utcnow().isoformat() + "Z",
+            "dictionaries": encoder.dictionaries,
+            "sections": sections,
+            "blob": [blob_offset, blob_size],
+        }, ensure_ascii=False).encode("utf-8")
+        header_offset = f.tell()
+        f.write(header)
+        f.seek(0)
+        f.write(PRELUDE.pack(MAGIC, header_offset, len(header)))
+        f.flush()
+        os.fsync(f.fileno())
+    return added
+
+
+# -------------------------------
+# READING
+# -------------------------------
+class CheckinArchive:
+    """
+    Read-only view of an archive file. Columns are NumPy arrays over the
+    mmap, so only the pages a query touches are read, and a missing file
+    is an empty archive.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self._mm = None
+        self.dictionaries = {name: [] for name in DICTIONARIES}
+        self.columns = {name: np.empty(0, dtype) for name, dtype in SECTIONS.items()}
+        self._blob_offset = self.blob_size = 0
+
+        if path and os.path.exists(path) and os.path.getsize(path):
+            with open(path, "rb") as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, header_offset, header_length = PRELUDE.unpack_from(self._mm, 0)
+            if magic != MAGIC or not header_offset:
+                raise ValueError(f"{path} is not a check-in archive")
+            header = json.loads(self._mm[header_offset:header_offset + header_length])
+            if header["version"] != VERSION:
+                raise ValueError(f"{path}: unsupported archive version {header['version']}")
+            self.dictionaries = header["dictionaries"]
+            self.columns = {
+                name: np.frombuffer(self._mm, dtype, count, offset)
+                for name, (dtype, offset, count) in header["sections"].items()
+            }
+            self._blob_offset, self.blob_size = header["blob"]
+
+        # dictionary code -> checkin_trends severity code (index -1 is MISSING)
+        self._severity_codes = np.array(
+            [severity_code(s) for s in self.dictionaries["severity"]] + [OTHER], dtype=np.int8
+        )
+
+    def __len__(self):
+        return len(self.columns["id"])
+
+    def close(self):
+        self.columns = {name: np.empty(0, dtype) for name, dtype in SECTIONS.items()}
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                pass        # a caller still holds a view; closed when it is released
+            self._mm = None
+
+    # ---------- lookups ----------
+    def row_of(self, rec_id):
+        """Row of a record id, or None."""
+        if type(rec_id) is not int or not len(self):
+            return None
+        ids = self.columns["ids_sorted"]
+        i = int(np.searchsorted(ids, rec_id))
+        if i < len(ids) and ids[i] == rec_id:
+            return int(self.columns["id_rows"][i])
+        return None
+
+    def user_range(self, user_id):
+        """[lo, hi) rows of one user, oldest first."""
+        if type(user_id) is not int or not len(self):
+            return 0, 0
+        users = self.columns["user_id"]
+        return int(np.searchsorted(users, user_id, "left")), int(np.searchsorted(users, user_id, "right"))
+
+    def user_rows(self, user_id, hidden=()):
+        """The user's rows, oldest first, without the ids in `hidden`."""
+        lo, hi = self.user_range(user_id)
+        rows = np.arange(lo, hi)
+        if hidden and hi > lo:
+            rows = rows[~np.isin(self.columns["id"][lo:hi], list(hidden))]
+        return rows
+
+    def users(self):
+        return np.unique(self.columns["user_id"]).tolist()
+
+    def owner(self, row: int):
+        return int(self.columns["user_id"][row])
+
+    def timestamp(self, row: int) -> str:
+        return from_micros(int(self.columns["ts"][row]))
+
+    def _text(self, offset, length):
+        if length == MISSING:
+            return None
+        start = self._blob_offset + offset
+        return self._mm[start:start + length].decode("utf-8")
+
+    # ---------- whole records ----------
+    def record(self, row: int) -> dict:
+        return self.records([row])[0]
+
+    def records(self, rows) -> list:
+        """
+        Decode the given rows into records. Each column is sliced once for
+        all rows, so a history page costs one gather per column.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        c = {name: self.columns[name][rows].tolist() for name in ROW_COLUMNS}
+        words = self.dictionaries
+        symptom_codes = self.columns["symptom_codes"]
+        texts = {name: zip(c[f"{name}_off"], c[f"{name}_len"]) for name in TEXTS}
+
+        out = []
+        for i in range(len(rows)):
+            title = c["title"][i]
+            rec = {
+                "id": c["id"][i],
+                "user_id": c["user_id"][i],
+                "timestamp": from_micros(c["ts"][i]),
+                "title": words["title"][title] if title != MISSING else None,
+            }
+
+            inp = {}
+            thoughts = self._text(*next(texts["thoughts"]))
+            if thoughts is not None:
+                inp["thoughts"] = thoughts
+            count = c["symptoms_len"][i]
+            if count != MISSING:
+                start = c["symptoms_start"][i]
+                inp["symptoms"] = [words["symptom"][code] for code in symptom_codes[start:start + count].tolist()]
+            if c["mood"][i] != MISSING_SMALL:
+                inp["mood"] = c["mood"][i]
+            if c["sleep"][i] == c["sleep"][i]:
+                inp["sleep_hours"] = c["sleep"][i]
+            if c["stress"][i] != MISSING_SMALL:
+                inp["stress_level"] = c["stress"][i]
+            if c["flags"][i] & INPUT_PREDICTION_NONE:
+                inp["prediction"] = None
+
+            pred = {}
+            if c["disorder"][i] != MISSING:
+                pred["predicted_disorder"] = words["disorder"][c["disorder"][i]]
+            if c["confidence"][i] == c["confidence"][i]:
+                pred["confidence_score"] = c["confidence"][i]
+            if c["severity"][i] != MISSING:
+                pred["severity_level"] = words["severity"][c["severity"][i]]
+            for key in ("recommendations", "next_steps"):
+                text = self._text(*next(texts[key]))
+                if text is not None:
+                    pred[key] = text
+            if c["emergency"][i] != MISSING:
+                pred["emergency_contact_suggested"] = bool(c["emergency"][i])
+
+            rec["input"] = inp
+            rec["prediction"] = pred
+            extra = self._text(*next(texts["extra"]))
+            if extra is not None:
+                extra = json.loads(extra)
+                inp.update(extra.get("input", {}))
+                pred.update(extra.get("prediction", {}))
+                rec.update(extra.get("record", {}))
+            out.append(rec)
+        return out
+
+    # ---------- columns for trends ----------
+    def series(self, rows) -> dict:
+        """checkin_trends.COLUMNS for the given rows (values kept in "extra" count as missing)."""
+        c = self.columns
+        mood, stress = c["mood"][rows], c["stress"][rows]
+        return {
+            "day": (c["ts"][rows] // DAY_US + EPOCH_ORDINAL).astype(np.int32),
+            "mood": np.where(mood == MISSING_SMALL, np.nan, mood),
+            "sleep": np.array(c["sleep"][rows], dtype=np.float64),
+            "stress": np.where(stress == MISSING_SMALL, np.nan, stress),
+            "severity": self._severity_codes[c["severity"][rows]],
+        }
+
+    def day_counts(self, rows) -> list:
+        """(YYYY-MM-DD, check-ins) pairs for the given rows, like a GROUP BY day."""
+        days, counts = np.unique(self.columns["ts"][rows] // DAY_US, return_counts=True)
+        return [
+            (date.fromordinal(day + EPOCH_ORDINAL).isoformat(), count)
+            for day, count in zip(days.tolist(), counts.tolist())
+        ]
+
+    # ---------- rewriting ----------
+    def copy_blob(self, f, chunk_size: int = 1 << 24):
+        for start in range(0, self.blob_size, chunk_size):
+            end = min(start + chunk_size, self.blob_size)
+            f.write(self._mm[self._blob_offset + start:self._blob_offset + end])
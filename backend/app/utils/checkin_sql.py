@@ -0,0 +1,295 @@
+from collections import Counter
+from datetime import datetime, timezone
+
+from sqlalchemy import and_, func, or_, select, delete, insert, text
+
+from ..database import SessionLocal
+from .. import models
+from .checkin_stats import UserStats
+
+INPUT_FIELDS = ("thoughts", "symptoms", "mood", "sleep_hours", "stress_level")
+
+
+# -------------------------------
+# RECORD <-> ROW
+# -------------------------------
+def parse_timestamp(value: str) -> datetime:
+    """'2025-12-04T09:29:55.927989Z' -> naive UTC datetime."""
+    ts = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def format_timestamp(ts: datetime) -> str:
+    return ts.isoformat() + "Z"
+
+
+def record_to_row(record: dict) -> dict:
+    """Flatten a check-in record (API/JSON shape) into CheckIn column values."""
+    inp = record.get("input") or {}
+    pred = record.get("prediction") or {}
+    row = {
+        "user_id": record["user_id"],
+        "timestamp": parse_timestamp(record["timestamp"]),
+        "title": record.get("title"),
+        **{field: inp.get(field) for field in INPUT_FIELDS},
+        "disorder": pred.get("predicted_disorder"),
+        "severity": pred.get("severity_level"),
+        "confidence": pred.get("confidence_score"),
+        "recommendations": pred.get("recommendations"),
+        "next_steps": pred.get("next_steps"),
+    }
+    if "id" in record:
+        row["id"] = record["id"]
+    return row
+
+
+def row_to_record(row: models.CheckIn) -> dict:
+    """The same record shape the JSON store returns."""
+    inp = {field: getattr(row, field) for field in INPUT_FIELDS}
+    prediction = {
+        "predicted_disorder": row.disorder,
+        "severity_level": row.severity,
+        "confidence_score": row.confidence,
+        "recommendations": row.recommendations,
+    }
+    if row.next_steps is not None:
+        prediction["next_steps"] = row.next_steps
+
+    return {
+        "id": row.id,
+        "user_id": row.user_id,
+        "timestamp": format_timestamp(row.timestamp),
+        "title": row.title,
+        "input": inp if any(v is not None for v in inp.values()) else {},
+        "prediction": prediction,
+    }
+
+
+# -------------------------------
+# BATCHED INSERT (migration / import)
+# -------------------------------
+def insert_batch(db, records) -> int:
+    """
+    Insert many records (ids kept) with one executemany and commit.
+    Records already in the table and records of unknown users are skipped,
+    so a migration can be re-run safely. A different record whose id is
+    taken, in the table or earlier in the batch (old checkins.json files
+    reused ids after a deletion), is inserted under a fresh id.
+    """
+    if not records:
+        return 0
+
+    CheckIn = models.CheckIn
+    users = set(db.scalars(
+        select(models.User.id).where(models.User.id.in_({r["user_id"] for r in records}))
+    ))
+    rows = [record_to_row(r) for r in records if r["user_id"] in users]
+
+    ids = Counter(row["id"] for row in rows if "id" in row)
+    taken = set(db.scalars(select(CheckIn.id).where(CheckIn.id.in_(ids)))) if ids else set()
+
+    # stored rows next to a colliding record tell a re-run from a reused id
+    colliding = {
+        (row["user_id"], row["timestamp"]) for row in rows
+        if row.get("id") in taken or ids[row.get("id")] > 1
+    }
+    nearby = {}
+    if colliding:
+        for stored in db.scalars(select(CheckIn).where(or_(*(
+            and_(CheckIn.user_id == user_id, CheckIn.timestamp == ts) for user_id, ts in colliding
+        )))):
+            nearby.setdefault((stored.user_id, stored.timestamp), []).append(
+                {column: getattr(stored, column) for column in rows[0] if column != "id"}
+            )
+
+    keep, fresh = [], []        # explicit ids / ids left to the database
+    renumbered = 0
+    for row in rows:
+        values = {column: value for column, value in row.items() if column != "id"}
+        same_place = nearby.setdefault((row["user_id"], row["timestamp"]), [])
+        if row.get("id") in taken:
+            if values in same_place:
+                continue
+            renumbered += 1
+            fresh.append(values)
+        elif "id" in row:
+            keep.append(row)
+            taken.add(row["id"])
+        else:
+            fresh.append(values)
+        same_place.append(values)
+
+    if keep:
+        db.execute(insert(CheckIn), keep)
+    db.commit()
+    if fresh:
+        # the serial must be past the explicit ids before it hands out new ones
+        sync_id_sequence(db)
+        db.execute(insert(CheckIn), fresh)
+        db.commit()
+    if renumbered:
+        print(f"Re-numbered {renumbered} check-ins whose id was already taken")
+    return len(keep) + len(fresh)
+
+
+def sync_id_sequence(db):
+    """After inserting explicit ids on Postgres, move the serial past them."""
+    if db.bind.dialect.name == "postgresql":
+        db.execute(text(
+            "SELECT setval(pg_get_serial_sequence('checkins', 'id'), "
+            "COALESCE((SELECT MAX(id) FROM checkins), 1))"
+        ))
+        db.commit()
+
+
+# -------------------------------
+# SQL-BACKED CHECK-IN STORE
+# -------------------------------
+class SqlCheckinStore:
+    """
+    Same interface as CheckinStore, backed by the `checkins` table.
+    Every per-user read is a range scan on ix_checkins_user_timestamp.
+    """
+
+    def add(self, record: dict):
+        with SessionLocal() as db:
+            row = models.CheckIn(**record_to_row(record))
+            db.add(row)
+            db.commit()
+            db.refresh(row)
+            return row_to_record(row)
+
+    def add_many(self, records) -> list:
+        """
+        One multi-row INSERT ... RETURNING; records are built from the
+        returned rows. RETURNING rows come back in no guaranteed order, but
+        ids are assigned in insertion order, so the result is sorted by id
+        to match the input order.
+        """
+        rows = [record_to_row(record) for record in records]
+        if not rows:
+            return []
+        table = models.CheckIn.__table__
+        with SessionLocal() as db:
+            inserted = db.execute(insert(table).returning(*table.c), rows).all()
+            db.commit()
+        return [row_to_record(row) for row in sorted(inserted, key=lambda row: row.id)]
+
+    def get(self, rec_id: int):
+        with SessionLocal() as db:
+            row = db.get(models.CheckIn, rec_id)
+            return row_to_record(row) if row else None
+
+    def delete(self, rec_id: int) -> bool:
+        with SessionLocal() as db:
+            result = db.execute(delete(models.CheckIn).where(models.CheckIn.id == rec_id))
+            db.commit()
+            return result.rowcount > 0
+
+    def owner(self, rec_id: int):
+        with SessionLocal() as db:
+            return db.scalar(select(models.CheckIn.user_id).where(models.CheckIn.id == rec_id))
+
+    def user_count(self, user_id) -> int:
+        with SessionLocal() as db:
+            return db.scalar(
+                select(func.count()).select_from(models.CheckIn).where(models.CheckIn.user_id == user_id)
+            )
+
+    def user_page(self, user_id, limit: int | None = None, before: str | None = None,
+                  before_id: int | None = None):
+        CheckIn = models.CheckIn
+        query = (
+            select(CheckIn)
+            .where(CheckIn.user_id == user_id)
+            .order_by(CheckIn.timestamp.desc(), CheckIn.id.desc())
+        )
+        if before is not None and before_id is not None:
+            ts = parse_timestamp(before)
+            query = query.where(or_(
+                CheckIn.timestamp < ts,
+                and_(CheckIn.timestamp == ts, CheckIn.id < before_id),
+            ))
+        elif before is not None:
+            query = query.where(CheckIn.timestamp < parse_timestamp(before))
+        if limit is not None:
+            query = query.limit(limit)
+
+        with SessionLocal() as db:
+            return [row_to_record(row) for row in db.scalars(query)]
+
+    def iter_user(self, user_id, batch_size: int = 500):
+        """Every record of a user, oldest first; one short keyset query per batch."""
+        CheckIn = models.CheckIn
+        after = None
+        while True:
+            query = (
+                select(CheckIn)
+                .where(CheckIn.user_id == user_id)
+                .order_by(CheckIn.timestamp, CheckIn.id)
+                .limit(batch_size)
+            )
+            if after is not None:
+                query = query.where(or_(
+                    CheckIn.timestamp > after[0],
+                    and_(CheckIn.timestamp == after[0], CheckIn.id > after[1]),
+                ))
+            with SessionLocal() as db:
+                rows = db.scalars(query).all()
+                batch = [row_to_record(row) for row in rows]
+            if not batch:
+                return
+            yield from batch
+            after = (rows[-1].timestamp, rows[-1].id)
+
+    def user_stats(self, user_id) -> UserStats:
+        day = func.date(models.CheckIn.timestamp)
+        with SessionLocal() as db:
+            days = db.execute(
+                select(day, func.count())
+                .where(models.CheckIn.user_id == user_id)
+                .group_by(day)
+            ).all()
+            last = db.scalar(
+                select(func.max(models.CheckIn.timestamp)).where(models.CheckIn.user_id == user_id)
+            )
+        return UserStats.from_days(days, format_timestamp(last) if last else None)
+
+    def user_series(self, user_id) -> dict:
+        """Trend columns for one user from a narrow query (no record dicts built)."""
+        from .checkin_trends import columns_from_rows, severity_code
+
+        CheckIn = models.CheckIn
+        query = (
+            select(CheckIn.timestamp, CheckIn.mood, CheckIn.sleep_hours, CheckIn.stress_level, CheckIn.severity)
+            .where(CheckIn.user_id == user_id)
+            .order_by(CheckIn.timestamp, CheckIn.id)
+        )
+        with SessionLocal() as db:
+            rows = db.execute(query).all()
+        nan = float("nan")
+        return columns_from_rows(
+            (ts.toordinal(),
+             nan if mood is None else mood,
+             nan if sleep is None else sleep,
+             nan if stress is None else stress,
+             severity_code(severity))
+            for ts, mood, sleep, stress, severity in rows
+        )
+
+    def iter_records(self, batch_size: int = 1000):
+        """Yield every record in id order, fetched in batches."""
+        with SessionLocal() as db:
+            rows = db.scalars(
+                select(models.CheckIn).order_by(models.CheckIn.id).execution_options(yield_per=batch_size)
+            )
+            for row in rows:
+                yield row_to_record(row)
+
+    def import_records(self, records) -> int:
+        with SessionLocal() as db:
+            count = insert_batch(db, list(records))
+            sync_id_sequence(db)
+            return count
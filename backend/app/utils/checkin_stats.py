@@ -0,0 +1,109 @@
+from collections import Counter
+from datetime import date, timedelta
+
+ONE_DAY = timedelta(days=1)
+
+
+class UserStats:
+    """
+    Dashboard aggregate for one user, updated on every write and delete.
+
+    Keeps the check-in count, how many check-ins fall on each distinct day,
+    the latest timestamp, the run of consecutive days ending at the latest
+    day, and the longest run ever. Adding a check-in on a new latest day is
+    O(1); only back-filled days and deletes that empty a day rescan the
+    (small) set of distinct days.
+    """
+
+    __slots__ = ("count", "days", "last", "run_end", "run", "longest")
+
+    def __init__(self):
+        self.count = 0
+        self.days = Counter()     # "YYYY-MM-DD" -> check-ins that day
+        self.last = None          # latest timestamp
+        self.run_end = None       # last day of the current run
+        self.run = 0              # length of the run ending at run_end
+        self.longest = 0
+
+    def add(self, timestamp: str):
+        self.count += 1
+        if self.last is None or timestamp > self.last:
+            self.last = timestamp
+
+        day = timestamp[:10]
+        self.days[day] += 1
+        if self.days[day] > 1:
+            return
+
+        d = date.fromisoformat(day)
+        if self.run_end is None or d == self.run_end + ONE_DAY:
+            self.run = self.run + 1 if self.run_end else 1
+            self.run_end = d
+        elif d > self.run_end:
+            self.run = 1
+            self.run_end = d
+        else:
+            # back-filled an older day: it may join or bridge earlier runs
+            self._recompute()
+            return
+        self.longest = max(self.longest, self.run)
+
+    def remove(self, timestamp: str, new_last: str | None):
+        """Drop one check-in; `new_last` is the user's latest remaining timestamp."""
+        self.count -= 1
+        self.last = new_last
+
+        day = timestamp[:10]
+        self.days[day] -= 1
+        if self.days[day] <= 0:
+            del self.days[day]
+            self._recompute()
+
+    def _recompute(self):
+        self.run_end = None
+        self.run = 0
+        self.longest = 0
+        for day in sorted(self.days):
+            d = date.fromisoformat(day)
+            if self.run_end is not None and d == self.run_end + ONE_DAY:
+                self.run += 1
+            else:
+                self.run = 1
+            self.run_end = d
+            self.longest = max(self.longest, self.run)
+
+    @classmethod
+    def from_days(cls, day_counts, last: str | None):
+        """Build an aggregate from (day, count) pairs, e.g. a GROUP BY query."""
+        stats = cls()
+        for day, count in day_counts:
+            stats.days[str(day)[:10]] += count
+        stats.count = sum(stats.days.values())
+        stats.last = last
+        stats._recompute()
+        return stats
+
+    def streak(self, today: date) -> int:
+        """Consecutive days with a check-in, counting back from today."""
+        return self.run if self.run_end == today else 0
+
+    def as_dict(self, today: date):
+        return {
+            "total_checkins": self.count,
+            "streak": self.streak(today),
+            "longest_streak": self.longest,
+            "last_checkin": self.last,
+        }
+
+    def __eq__(self, other):
+        return isinstance(other, UserStats) and all(
+            getattr(self, k) == getattr(other, k) for k in self.__slots__
+        )
+
+
+def build_stats(records):
+    """Compute every user's aggregate from scratch from an iterable of records."""
+    stats = {}
+    for rec in records:
+        stats.setdefault(rec["user_id"], UserStats()).add(rec["timestamp"])
+    return stats
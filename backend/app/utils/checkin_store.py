@@ -0,0 +1,764 @@
+import bisect
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from .checkin_stats import UserStats, build_stats
+from .checkin_writer import FileLock, GroupCommitWriter
+
+# -------------------------------
+# STORE SETTINGS
+# -------------------------------
+LOG_FILE = os.getenv("CHECKIN_LOG_FILE", "checkins.log")        # append-only log
+LEGACY_FILE = os.getenv("CHECKIN_LEGACY_FILE", "checkins.json")  # old whole-file DB
+
+COMPACT_INTERVAL = float(os.getenv("CHECKIN_COMPACT_INTERVAL", "300"))  # seconds
+COMPACT_MIN_DEAD = int(os.getenv("CHECKIN_COMPACT_MIN_DEAD", "100"))     # dead lines
+COMPACT_DEAD_RATIO = float(os.getenv("CHECKIN_COMPACT_DEAD_RATIO", "0.5"))
+
+# Check-ins older than this many days are moved by the compactor into the
+# read-only columnar archive (<log>.archive, see checkin_archive.py); 0 = never.
+ARCHIVE_AFTER_DAYS = int(os.getenv("CHECKIN_ARCHIVE_AFTER_DAYS", "0"))
+ARCHIVE_MIN_RECORDS = int(os.getenv("CHECKIN_ARCHIVE_MIN_RECORDS", "1000"))  # per run
+
+
+# -------------------------------
+# LEGACY JSON HELPERS
+# -------------------------------
+def load_legacy_json(path: str):
+    """Read an old checkins.json file (a single JSON array)."""
+    if not os.path.exists(path):
+        return []
+    with open(path, "r") as f:
+        try:
+            return json.load(f)
+        except ValueError:
+            return []
+
+
+def iter_json_array(f, chunk_size: int = 1 << 16):
+    """
+    Stream the elements of a top-level JSON array (an old checkins.json)
+    without loading the whole file: decode one element at a time from a
+    sliding text buffer.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    started = False
+    eof = False
+
+    while True:
+        # skip whitespace and separators
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            pos += 1
+        if not started and pos < len(buf):
+            if buf[pos] != "[":
+                raise ValueError("expected a JSON array")
+            started = True
+            pos += 1
+            continue
+        if pos < len(buf) and buf[pos] == "]":
+            return
+
+        try:
+            if pos >= len(buf):
+                raise ValueError("need more data")
+            item, end = decoder.raw_decode(buf, pos)
+        except ValueError:
+            if eof:
+                if buf[pos:].strip():
+                    raise
+                return
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf = buf[pos:] + chunk
+            pos = 0
+            continue
+
+        yield item
+        pos = end
+
+
+def _encode(entry: dict) -> bytes:
+    return (json.dumps(entry, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+# -------------------------------
+# APPEND-ONLY CHECK-IN STORE
+# -------------------------------
+class CheckinStore:
+    """
+    Check-ins kept in an append-only log of JSON lines.
+
+    Every line is one operation:
+      {"op": "put", "rec": {...}}   a new record
+      {"op": "del", "id": 7}        a tombstone for record 7
+      {"op": "seq", "next": 42}     next id to hand out (written by compaction)
+
+    An in-memory index maps each live id to the (offset, length) of its
+    "put" line, so a write appends one line and a read seeks straight to it.
+    A second index keeps each user's (timestamp, id) pairs sorted, so history
+    pages are read without looking at anyone else's records, a per-user
+    UserStats aggregate backs the dashboard numbers, and per-user NumPy
+    columns in the same order back the trend analytics.
+    Dead lines are dropped by compaction, which rewrites the live records
+    into a fresh file and swaps it in.
+
+    Old check-ins can be moved out of the log into a columnar archive file
+    (archive()), read through mmap and never parsed as a whole. Archived
+    records are not in the in-memory indexes; reads merge the archive's
+    per-user slice with the log's. Deleting an archived record writes a
+    tombstone that compaction keeps until the next archive run drops the row.
+
+    Several processes may share one log (one store per uvicorn worker).
+    All mutations go through a single writer thread that batches them into
+    one fsync and holds a FileLock while appending; before every write, and
+    cheaply before every read, the store replays whatever other processes
+    appended since it last looked. IDs are assigned under that lock, so they
+    stay unique and monotonic across workers and never reuse deleted ids.
+    """
+
+    def __init__(self, path: str = LOG_FILE):
+        self.path = path
+        self.archive_path = path + ".archive"
+        self._lock = threading.RLock()
+        self._offsets = {}          # id -> (offset, length)
+        self._owners = {}           # id -> (user_id, timestamp)
+        self._by_user = {}          # user_id -> sorted [(timestamp, id), ...]
+        self._stats = {}            # user_id -> UserStats
+        from .checkin_trends import SeriesIndex     # NumPy: loaded with the store, not at app import
+        from .checkin_archive import CheckinArchive
+        self._series = SeriesIndex()                # user_id -> mood/sleep/stress/severity columns
+        self._archive = CheckinArchive()
+        self._archive_dead = set()  # archived ids deleted since (tombstones kept in the log)
+        self._shadowed = set()      # archived ids with a copy in the log (crash mid-archive)
+        self._merged_stats = {}     # user_id -> UserStats over log + archive
+        self._next_id = 1
+        self._dead = 0              # superseded or tombstone lines
+        self._end = 0               # bytes of the log replayed so far
+        self._ino = None            # identity of the file those bytes came from
+        self._out = None
+        self._in = None
+        self._file_lock = FileLock(path + ".lock")
+        self._compactor = None
+        self._stop = threading.Event()
+        with self._lock:
+            self._load()
+        self.writer = GroupCommitWriter(self._commit)
+
+    # ---------- open / replay ----------
+    def _load(self):
+        from .checkin_archive import CheckinArchive
+
+        for f in (self._out, self._in):
+            if f:
+                f.close()
+
+        self._offsets.clear()
+        self._owners.clear()
+        self._by_user.clear()
+        self._stats.clear()
+        self._series.clear()
+        self._archive.close()
+        self._archive = CheckinArchive(self.archive_path)
+        self._archive_dead.clear()
+        self._shadowed.clear()
+        self._merged_stats.clear()
+        self._next_id = 1
+        self._dead = 0
+        self._end = 0
+
+        self._open()
+        self._tail(partial=False)
+
+    def _open(self):
+        """
+        Open the log for appending and for reading. Another process may swap
+        in a compacted log between the two opens (we may not hold the file
+        lock), so retry until both handles and the path are the same file:
+        appending to the unlinked old one would lose acknowledged writes.
+        """
+        while True:
+            out = open(self.path, "ab")
+            src = open(self.path, "rb")
+            ino = os.fstat(out.fileno()).st_ino
+            if os.fstat(src.fileno()).st_ino == ino == os.stat(self.path).st_ino:
+                self._out, self._in, self._ino = out, src, ino
+                return
+            out.close()
+            src.close()
+
+    def _tail(self, partial: bool):
+        """
+        Replay lines appended after self._end. A trailing line without a
+        newline is another process mid-append unless `partial` is set (we
+        hold the file lock, so it is a torn write and counts as dead).
+        """
+        self._in.seek(self._end)
+        for line in self._in:
+            if not line.endswith(b"\n") and not partial:
+                break
+            self._replay(line, self._end)
+            self._end += len(line)
+
+    def _refresh(self, partial: bool = False):
+        """Pick up appends (or a compaction) made by other processes."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if st.st_ino != self._ino or st.st_size < self._end:
+            self._load()                     # the log was compacted elsewhere
+        elif st.st_size > self._end:
+            self._tail(partial)
+
+    def _replay(self, line: bytes, offset: int):
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            # torn last line from a crash mid-append: skip it
+            self._dead += 1
+            return
+
+        op = entry.get("op")
+        if op == "put":
+            rec = entry["rec"]
+            if rec["id"] in self._offsets:
+                self._unindex(rec["id"])
+                self._dead += 1
+            elif self._archive.row_of(rec["id"]) is not None:
+                self._shadowed.add(rec["id"])
+                self._merged_stats.pop(rec["user_id"], None)
+            self._index(rec, (offset, len(line)))
+            self._next_id = max(self._next_id, rec["id"] + 1)
+        elif op == "del":
+            if entry["id"] in self._offsets:
+                self._unindex(entry["id"])
+                self._dead += 1
+            if not self._bury(entry["id"]):
+                self._dead += 1
+        elif op == "seq":
+            self._next_id = max(self._next_id, entry["next"])
+
+    def close(self):
+        self._stop.set()
+        self.writer.close()
+        with self._lock:
+            for f in (self._out, self._in):
+                if f:
+                    f.close()
+            self._out = self._in = None
+            self._archive.close()
+
+    # ---------- low level append (file lock held) ----------
+    def _append(self, entries):
+        """Append encoded lines with one fsync; returns each line's position."""
+        lines = [_encode(entry) for entry in entries]
+
+        # never glue a record onto a torn line left by a crashed writer
+        if self._end:
+            self._in.seek(self._end - 1)
+            if self._in.read(1) != b"\n":
+                lines.insert(0, b"\n")
+
+        offsets = []
+        offset = self._end
+        for line in lines:
+            if line != b"\n":
+                offsets.append((offset, len(line)))
+            offset += len(line)
+
+        self._out.write(b"".join(lines))
+        self._out.flush()
+        os.fsync(self._out.fileno())
+        self._end = offset
+        return offsets
+
+    def _commit(self, ops):
+        """
+        Apply one batch from the writer thread: replay other processes'
+        appends, assign ids, write every line and fsync once.
+        """
+        with self._lock, self._file_lock:
+            self._refresh(partial=True)
+
+            entries, results, applied = [], [], []
+            pending = set()
+            for op in ops:
+                kind = op[0]
+                if kind in ("put", "put_many"):
+                    added = []
+                    for rec in ([op[1]] if kind == "put" else op[1]):
+                        record = {"id": self._next_id, **rec}
+                        self._next_id += 1
+                        pending.add(record["id"])
+                        entries.append({"op": "put", "rec": record})
+                        applied.append(record)
+                        added.append(record)
+                    results.append(added[0] if kind == "put" else added)
+                elif kind == "del":
+                    rec_id = op[1]
+                    if not self._is_live(rec_id) or rec_id in pending:
+                        results.append(False)
+                        continue
+                    pending.add(rec_id)
+                    entries.append({"op": "del", "id": rec_id})
+                    applied.append(None)
+                    results.append(True)
+                elif kind == "import":
+                    count = renumbered = 0
+                    imported = {}       # (user_id, timestamp) -> records queued here
+                    # fresh ids go past the batch's own, so they collide with none of them
+                    self._next_id = max(self._next_id, max((r["id"] for r in op[1]), default=0) + 1)
+                    for rec in op[1]:
+                        if (rec["id"] in self._offsets or rec["id"] in pending
+                                or self._archive.row_of(rec["id"]) is not None):
+                            if self._stored(rec, imported):
+                                continue            # imported before: re-runs are harmless
+                            # old checkins.json files reused ids after a deletion
+                            # (id = len + 1): keep the record under a fresh id
+                            rec = {**rec, "id": self._next_id}
+                            renumbered += 1
+                        pending.add(rec["id"])
+                        self._next_id = max(self._next_id, rec["id"] + 1)
+                        imported.setdefault((rec["user_id"], rec["timestamp"]), []).append(rec)
+                        entries.append({"op": "put", "rec": rec})
+                        applied.append(rec)
+                        count += 1
+                    results.append((count, renumbered))
+
+            if not entries:
+                return results
+
+            positions = self._append(entries)
+            for entry, pos in zip(entries, positions):
+                if entry["op"] == "put":
+                    self._index(entry["rec"], pos)
+                    self._next_id = max(self._next_id, entry["rec"]["id"] + 1)
+                else:
+                    if entry["id"] in self._offsets:
+                        self._unindex(entry["id"])
+                        self._dead += 1
+                    if not self._bury(entry["id"]):
+                        self._dead += 1
+            return results
+
+    # ---------- indexes ----------
+    def _index(self, rec: dict, pos):
+        self._offsets[rec["id"]] = pos
+        self._owners[rec["id"]] = (rec["user_id"], rec["timestamp"])
+        keys = self._by_user.setdefault(rec["user_id"], [])
+        key = (rec["timestamp"], rec["id"])
+        i = bisect.bisect_left(keys, key)
+        keys.insert(i, key)
+        self._series.insert(rec["user_id"], i, rec)
+        self._merged_stats.pop(rec["user_id"], None)
+        self._stats.setdefault(rec["user_id"], UserStats()).add(rec["timestamp"])
+
+    def _unindex(self, rec_id: int):
+        del self._offsets[rec_id]
+        user_id, timestamp = self._owners.pop(rec_id)
+        keys = self._by_user[user_id]
+        i = bisect.bisect_left(keys, (timestamp, rec_id))
+        del keys[i]
+        self._series.delete(user_id, i)
+        self._merged_stats.pop(user_id, None)
+        self._stats[user_id].remove(timestamp, keys[-1][0] if keys else None)
+
+    def _read_at(self, offset: int, length: int):
+        self._in.seek(offset)
+        return json.loads(self._in.read(length))["rec"]
+
+    # ---------- archive ----------
+    def _archived_row(self, rec_id):
+        """Archive row of a live archived record, or None."""
+        if rec_id in self._archive_dead or rec_id in self._shadowed:
+            return None
+        return self._archive.row_of(rec_id)
+
+    def _is_live(self, rec_id) -> bool:
+        return rec_id in self._offsets or self._archived_row(rec_id) is not None
+
+    def _bury(self, rec_id) -> bool:
+        """Mark an archived record deleted. False if it is not in the archive."""
+        row = self._archive.row_of(rec_id)
+        if row is None:
+            return False
+        self._archive_dead.add(rec_id)
+        self._merged_stats.pop(self._archive.owner(row), None)
+        return True
+
+    def _archived_rows(self, user_id):
+        """The user's live archive rows, oldest first."""
+        return self._archive.user_rows(user_id, hidden=self._archive_dead | self._shadowed)
+
+    def _user_keys(self, user_id, after=None, before=None,
+                   limit: int | None = None, newest: bool = False):
+        """
+        The user's (timestamp, id, archive row or None) keys, oldest first,
+        from the log index and the archive: those after the key `after` and
+        before the key `before` ((timestamp,) excludes that whole timestamp);
+        at most `limit`, the newest ones if `newest`.
+        """
+        keys = self._by_user.get(user_id, [])
+        start = 0 if after is None else bisect.bisect_right(keys, after)
+        end = len(keys) if before is None else bisect.bisect_left(keys, before)
+        if limit is not None:
+            start, end = (max(start, end - limit), end) if newest else (start, min(end, start + limit))
+        merged = [(ts, rec_id, None) for ts, rec_id in keys[start:end]]
+
+        rows = self._archived_rows(user_id)
+        if not len(rows):
+            return merged
+        # same string order as the log index: binary search on formatted keys
+        ids = self._archive.columns["id"][rows]
+        key = lambda i: (self._archive.timestamp(rows[i]), int(ids[i]))
+        positions = range(len(rows))
+        lo = 0 if after is None else bisect.bisect_right(positions, tuple(after), key=key)
+        hi = len(rows) if before is None else bisect.bisect_left(positions, before, key=key)
+        if limit is not None:
+            lo, hi = (max(lo, hi - limit), hi) if newest else (lo, min(hi, lo + limit))
+        merged += [(self._archive.timestamp(row), rec_id, row)
+                   for row, rec_id in zip(rows[lo:hi].tolist(), ids[lo:hi].tolist())]
+
+        merged.sort()
+        if limit is not None:
+            merged = merged[-limit:] if newest else merged[:limit]
+        return merged
+
+    def _stored(self, rec: dict, imported: dict) -> bool:
+        """Is a record equal to `rec` apart from its id stored, or queued in `imported`?"""
+        same = lambda other: {**other, "id": None} == {**rec, "id": None}
+        ts = rec["timestamp"]
+        if any(same(other) for other in imported.get((rec["user_id"], ts), ())):
+            return True
+        keys = self._user_keys(rec["user_id"], after=(ts,), before=(ts, math.inf))
+        return any(same(other) for other in self._read_keys(keys))
+
+    def _read_keys(self, keys) -> list:
+        """Records for _user_keys() keys; archived ones are decoded in one batch."""
+        archived = iter(self._archive.records([row for _, _, row in keys if row is not None]))
+        return [
+            next(archived) if row is not None else self._read_at(*self._offsets[rec_id])
+            for _, rec_id, row in keys
+        ]
+
+    # ---------- public API ----------
+    def add(self, record: dict):
+        """Assign the next id to `record`, append it and return it."""
+        return self.writer.submit(("put", record))
+
+    def add_many(self, records) -> list:
+        """Like add() for a batch: new ids for all, one write and one fsync."""
+        return self.writer.submit(("put_many", list(records)))
+
+    def get(self, rec_id: int):
+        with self._lock:
+            self._refresh()
+            pos = self._offsets.get(rec_id)
+            if pos is not None:
+                return self._read_at(*pos)
+            row = self._archived_row(rec_id)
+            return self._archive.record(row) if row is not None else None
+
+    def delete(self, rec_id: int) -> bool:
+        """Write a tombstone for `rec_id`. Returns False if it is not live."""
+        return self.writer.submit(("del", rec_id))
+
+    def ids(self):
+        with self._lock:
+            self._refresh()
+            archived = self._archive.columns["ids_sorted"].tolist()
+            if self._archive_dead or self._shadowed:
+                hidden = self._archive_dead | self._shadowed
+                archived = [rec_id for rec_id in archived if rec_id not in hidden]
+            return sorted([*self._offsets, *archived])
+
+    def iter_records(self):
+        """Yield every live record in id order, one read at a time."""
+        for rec_id in self.ids():
+            rec = self.get(rec_id)
+            if rec is not None:
+                yield rec
+
+    def owner(self, rec_id: int):
+        """The user_id a live record belongs to, without reading it."""
+        with self._lock:
+            self._refresh()
+            owner = self._owners.get(rec_id)
+            if owner:
+                return owner[0]
+            row = self._archived_row(rec_id)
+            return self._archive.owner(row) if row is not None else None
+
+    def user_count(self, user_id) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._by_user.get(user_id, ())) + len(self._archived_rows(user_id))
+
+    def user_page(self, user_id, limit: int | None = None, before: str | None = None,
+                  before_id: int | None = None):
+        """
+        One page of a user's records, newest first.
+
+        `before` / `before_id` are a keyset cursor: only records ordered
+        before (timestamp, id) are returned. Pass the timestamp and id of the
+        last record of the previous page to get the next one; records sharing
+        that timestamp are neither repeated nor skipped. Without `before_id`
+        everything at the `before` timestamp is excluded.
+        """
+        key = None if before is None else (before,) if before_id is None else (before, before_id)
+        with self._lock:
+            self._refresh()
+            page = self._read_keys(self._user_keys(user_id, before=key, limit=limit, newest=True))
+        page.reverse()
+        return page
+
+    def iter_user(self, user_id, batch_size: int = 500):
+        """
+        Every record of a user, oldest first, read `batch_size` at a time.
+        Each batch resumes after the last (timestamp, id) key seen, so
+        writes in between neither repeat nor skip records.
+        """
+        after = None
+        while True:
+            with self._lock:
+                self._refresh()
+                chunk = self._user_keys(user_id, after=after, limit=batch_size)
+                batch = self._read_keys(chunk)
+            if not batch:
+                return
+            yield from batch
+            after = chunk[-1][:2]
+
+    def user_stats(self, user_id) -> UserStats:
+        """
+        The incrementally maintained dashboard aggregate for one user. With
+        archived check-ins it is merged with the archive's per-day counts,
+        and cached until either side changes.
+        """
+        with self._lock:
+            self._refresh()
+            stats = self._stats.get(user_id) or UserStats()
+            rows = self._archived_rows(user_id)
+            if not len(rows):
+                return stats
+            merged = self._merged_stats.get(user_id)
+            if merged is None:
+                days = Counter(stats.days)
+                days.update(dict(self._archive.day_counts(rows)))
+                last = max(filter(None, (stats.last, self._archive.timestamp(rows[-1]))))
+                merged = self._merged_stats[user_id] = UserStats.from_days(days.items(), last)
+            return merged
+
+    def user_series(self, user_id) -> dict:
+        """A copy of the user's trend columns (see checkin_trends.COLUMNS), oldest first."""
+        from .checkin_trends import concat_columns
+
+        with self._lock:
+            self._refresh()
+            columns = self._series.columns(user_id)
+            rows = self._archived_rows(user_id)
+            if not len(rows):
+                return columns
+            # rows index this archive: read before a reload can swap it
+            archived = self._archive.series(rows)
+        return concat_columns(archived, columns)
+
+    def all_stats(self):
+        with self._lock:
+            self._refresh()
+            users = set(self._stats) | set(self._archive.users())
+            return {user_id: self.user_stats(user_id) for user_id in users}
+
+    def rebuild_stats(self):
+        """
+        Recompute every aggregate from the raw log records and swap them in.
+        Returns the user ids whose incremental aggregate had drifted.
+        (Archived check-ins are counted from the archive when stats are read.)
+        """
+        with self._lock:
+            self._refresh()
+            fresh = build_stats(self._read_at(*self._offsets[rec_id]) for rec_id in sorted(self._offsets))
+            drifted = [
+                user_id for user_id in set(fresh) | set(self._stats)
+                if fresh.get(user_id, UserStats()) != self._stats.get(user_id, UserStats())
+            ]
+            self._stats = fresh
+            self._merged_stats.clear()
+            return drifted
+
+    def __len__(self):
+        return len(self._offsets) + len(self._archive) - len(self._archive_dead | self._shadowed)
+
+    # ---------- compaction ----------
+    def needs_compaction(self) -> bool:
+        live = len(self._offsets)
+        return self._dead >= COMPACT_MIN_DEAD and self._dead >= COMPACT_DEAD_RATIO * (live + self._dead)
+
+    def compact(self):
+        """Rewrite the log with live records only and swap it in atomically."""
+        with self._lock, self._file_lock:
+            self._refresh(partial=True)
+            self._rewrite(skip=(), tombstones=sorted(self._archive_dead))
+
+    def _rewrite(self, skip, tombstones):
+        """
+        Write the live log records except `skip`, then `tombstones`, into a
+        fresh file and swap it in (both locks held).
+        """
+        tmp_path = self.path + ".compact"
+        new_offsets = {}
+        with open(tmp_path, "wb") as out:
+            offset = 0
+            header = _encode({"op": "seq", "next": self._next_id})
+            out.write(header)
+            offset += len(header)
+
+            for rec_id in sorted(self._offsets):
+                if rec_id in skip:
+                    continue
+                data = _encode({"op": "put", "rec": self._read_at(*self._offsets[rec_id])})
+                out.write(data)
+                new_offsets[rec_id] = (offset, len(data))
+                offset += len(data)
+
+            # deleted archived records stay deleted until the archive drops them
+            for rec_id in tombstones:
+                data = _encode({"op": "del", "id": rec_id})
+                out.write(data)
+                offset += len(data)
+
+            out.flush()
+            os.fsync(out.fileno())
+
+        self._out.close()
+        self._in.close()
+        os.replace(tmp_path, self.path)
+
+        self._offsets = new_offsets
+        self._dead = 0
+        self._end = offset
+        self._open()
+
+    # ---------- archiving ----------
+    def archive(self, older_than: str) -> int:
+        """
+        Move live log records with a timestamp before `older_than` into the
+        archive and drop them from the log; returns how many moved. Deleted
+        archived rows are dropped from the archive on the way.
+
+        The new archive is swapped in before the log is rewritten: a crash in
+        between leaves records in both, and the log copy wins on open.
+        """
+        from .checkin_archive import write_archive
+
+        tmp_path = self.archive_path + ".tmp"
+        with self._lock, self._file_lock:
+            self._refresh(partial=True)
+            cold = sorted(rec_id for rec_id, (_, ts) in self._owners.items() if ts < older_than)
+            if not cold and not (self._archive_dead or self._shadowed):
+                return 0
+
+            moved = write_archive(
+                tmp_path, self._archive,
+                (self._read_at(*self._offsets[rec_id]) for rec_id in cold),
+                drop_ids=self._archive_dead | self._shadowed,
+            )
+            os.replace(tmp_path, self.archive_path)
+            self._rewrite(skip=set(moved), tombstones=())
+            self._load()
+            return len(moved)
+
+    def archive_due(self, older_than: str) -> bool:
+        cold = sum(1 for _, ts in self._owners.values() if ts < older_than)
+        return cold >= ARCHIVE_MIN_RECORDS
+
+    def start_compactor(self, interval: float = COMPACT_INTERVAL):
+        """
+        Compact in a daemon thread whenever enough dead lines pile up, and
+        archive old check-ins if CHECKIN_ARCHIVE_AFTER_DAYS is set.
+        """
+        if self._compactor is not None:
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    cutoff = archive_cutoff()
+                    with self._lock:
+                        self._refresh()
+                        due = self.needs_compaction()
+                        archive_due = cutoff is not None and self.archive_due(cutoff)
+                    if archive_due:
+                        self.archive(cutoff)
+                    elif due:
+                        self.compact()
+                except Exception as e:
+                    print("Check-in compaction error:", e)
+
+        self._compactor = threading.Thread(target=run, name="checkin-compactor", daemon=True)
+        self._compactor.start()
+
+    # ---------- import ----------
+    def import_records(self, records) -> int:
+        """
+        Append existing records (ids kept), with a single fsync. Records
+        already in the store are skipped, so re-running is harmless; a
+        different record whose id is taken gets the next free id.
+        Returns how many were appended.
+        """
+        count, renumbered = self.writer.submit(("import", list(records)), timeout=None)
+        if renumbered:
+            print(f"Re-numbered {renumbered} imported check-ins whose id was already taken")
+        return count
+
+
+def archive_cutoff(days: int = ARCHIVE_AFTER_DAYS):
+    """Timestamp before which check-ins are archived, or None when archiving is off."""
+    if days <= 0:
+        return None
+    return (datetime.utcnow() - timedelta(days=days)).isoformat() + "Z"
+
+
+def import_legacy_file(store: CheckinStore, path: str = LEGACY_FILE) -> int:
+    """One-time import of an old checkins.json array into the log."""
+    return store.import_records(load_legacy_json(path))
+
+
+# -------------------------------
+# SHARED INSTANCE
+# -------------------------------
+# "log" (default): the append-only file above, one per deployment.
+# "sql": the `checkins` table, see checkin_sql.py and
+#        scripts/migrate_checkins_to_sql.py.
+BACKEND = os.getenv("CHECKIN_BACKEND", "log")
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Open the process-wide store (importing checkins.json on first run)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None and BACKEND == "sql":
+                from .checkin_sql import SqlCheckinStore
+                _store = SqlCheckinStore()
+            elif _store is None:
+                first_run = not os.path.exists(LOG_FILE)
+                store = CheckinStore(LOG_FILE)
+                if first_run and os.path.exists(LEGACY_FILE):
+                    started = time.perf_counter()
+                    count = import_legacy_file(store, LEGACY_FILE)
+                    print(f"Imported {count} check-ins from {LEGACY_FILE} "
+                          f"in {time.perf_counter() - started:.2f}s")
+                store.start_compactor()
+                _store = store
+    return _store
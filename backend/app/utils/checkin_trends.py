@@ -0,0 +1,266 @@
+import math
+from datetime import date
+
+import numpy as np
+
+# -------------------------------
+# PER-USER COLUMNS
+# -------------------------------
+# Everything /checkin/trends needs from a check-in, one NumPy array per
+# field. Missing inputs (manually saved predictions have none) are NaN.
+COLUMNS = {
+    "day": np.int32,        # date.toordinal() of the UTC timestamp
+    "mood": np.float64,
+    "sleep": np.float64,    # sleep_hours
+    "stress": np.float64,   # stress_level
+    "severity": np.int8,    # index into SEVERITIES
+}
+METRICS = ("mood", "sleep", "stress")
+
+SEVERITIES = ("mild", "moderate", "severe", "other")
+_SEVERITY_CODES = {name: code for code, name in enumerate(SEVERITIES)}
+OTHER = _SEVERITY_CODES["other"]
+
+
+def _number(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def severity_code(value) -> int:
+    return _SEVERITY_CODES.get(str(value).strip().lower(), OTHER) if value else OTHER
+
+
+def record_values(rec: dict) -> tuple:
+    """One record as a row of COLUMNS values."""
+    inp = rec.get("input") or {}
+    pred = rec.get("prediction") or {}
+    return (
+        date.fromisoformat(rec["timestamp"][:10]).toordinal(),
+        _number(inp.get("mood")),
+        _number(inp.get("sleep_hours")),
+        _number(inp.get("stress_level")),
+        severity_code(pred.get("severity_level")),
+    )
+
+
+def empty_columns() -> dict:
+    return {name: np.empty(0, dtype) for name, dtype in COLUMNS.items()}
+
+
+def concat_columns(first: dict, second: dict) -> dict:
+    """Both sets of columns as one, still in day order."""
+    merged = {name: np.concatenate([first[name], second[name]]) for name in COLUMNS}
+    if len(first["day"]) and len(second["day"]) and first["day"][-1] > second["day"][0]:
+        order = np.argsort(merged["day"], kind="stable")
+        merged = {name: col[order] for name, col in merged.items()}
+    return merged
+
+
+def columns_from_rows(rows) -> dict:
+    """Build columns from (day, mood, sleep, stress, severity) rows, oldest first."""
+    rows = list(rows)
+    if not rows:
+        return empty_columns()
+    return {
+        name: np.fromiter((row[i] for row in rows), dtype, count=len(rows))
+        for i, (name, dtype) in enumerate(COLUMNS.items())
+    }
+
+
+class UserSeries:
+    """
+    One user's check-ins as growable NumPy columns, in the same
+    (timestamp, id) order as the store's per-user keys.
+
+    Capacity doubles when full, so appending the newest check-in is O(1)
+    amortized; back-filled inserts and deletes shift the tail in place.
+    """
+
+    __slots__ = ("n", "_cols")
+
+    def __init__(self, capacity: int = 16):
+        self.n = 0
+        self._cols = {name: np.empty(capacity, dtype) for name, dtype in COLUMNS.items()}
+
+    def _grow(self):
+        for name, col in self._cols.items():
+            bigger = np.empty(2 * len(col), col.dtype)
+            bigger[:self.n] = col[:self.n]
+            self._cols[name] = bigger
+
+    def insert(self, i: int, values: tuple):
+        if self.n == len(self._cols["day"]):
+            self._grow()
+        n = self.n
+        for col, value in zip(self._cols.values(), values):
+            if i < n:
+                col[i + 1:n + 1] = col[i:n]
+            col[i] = value
+        self.n += 1
+
+    def delete(self, i: int):
+        n = self.n
+        for col in self._cols.values():
+            col[i:n - 1] = col[i + 1:n]
+        self.n -= 1
+
+    def columns(self) -> dict:
+        """A copy of the live part of every column."""
+        return {name: col[:self.n].copy() for name, col in self._cols.items()}
+
+
+class SeriesIndex:
+    """user_id -> UserSeries, maintained by CheckinStore next to its per-user keys."""
+
+    def __init__(self):
+        self._users = {}
+
+    def insert(self, user_id, i: int, rec: dict):
+        series = self._users.get(user_id)
+        if series is None:
+            series = self._users[user_id] = UserSeries()
+        series.insert(i, record_values(rec))
+
+    def delete(self, user_id, i: int):
+        self._users[user_id].delete(i)
+
+    def columns(self, user_id) -> dict:
+        series = self._users.get(user_id)
+        return series.columns() if series is not None else empty_columns()
+
+    def clear(self):
+        self._users.clear()
+
+
+# -------------------------------
+# TREND ANALYTICS
+# -------------------------------
+def _ratio(sums, counts):
+    """sums / counts, NaN where there is nothing to average."""
+    out = np.full(len(sums), np.nan)
+    np.divide(sums, counts, out=out, where=counts > 0)
+    return out
+
+
+def _rounded(values):
+    return [None if v != v else round(v, 2) for v in values.tolist()]
+
+
+def _scalar(value):
+    return None if value != value else round(float(value), 2)
+
+
+def pearson(x, y):
+    """Correlation over the pairs where both values are given (None if undefined)."""
+    given = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[given], y[given]
+    if len(x) < 3:
+        return None, len(x)
+    x = x - x.mean()
+    y = y - y.mean()
+    denom = math.sqrt(float(x @ x) * float(y @ y))
+    if denom == 0:
+        return None, len(x)
+    return round(float(x @ y) / denom, 3), len(x)
+
+
+def compute_trends(cols: dict, today: date, days: int = 90, window: int = 7) -> dict:
+    """
+    Trends over the `days` days ending `today` (UTC), from a user's columns:
+
+      daily        per-day averages and the rolling `window`-day average
+                   (mean of every check-in in the window ending that day)
+      weekly       7-day buckets ending today, with the change from the
+                   bucket before
+      correlations Pearson r between sleep, mood and stress, per check-in
+      severity     how often each predicted severity occurred
+
+    Days are bucketed with bincount and rolling sums come from one cumsum,
+    so the cost depends on the range asked for, not on the whole history.
+    """
+    end = today.toordinal()
+    first = end - days + 1
+    lead = first - (window - 1)            # days before `first` that feed its window
+    weeks = -(-days // 7)
+    week_first = end - 7 * weeks + 1
+    start = min(lead, week_first)
+    length = end - start + 1
+
+    day = cols["day"]
+    lo, in_range, hi = np.searchsorted(day, [start, first, end + 1])
+    offset = day[lo:hi] - start
+
+    daily = [{"date": date.fromordinal(first + i).isoformat()} for i in range(days)]
+    counts_all = np.bincount(offset, minlength=length)
+    for row, n in zip(daily, counts_all[first - start:].tolist()):
+        row["checkins"] = n
+
+    weekly = [{"week_start": date.fromordinal(week_first + 7 * i).isoformat()} for i in range(weeks)]
+    checkins_per_week = counts_all[week_first - start:].reshape(weeks, 7).sum(axis=1)
+    for row, n in zip(weekly, checkins_per_week.tolist()):
+        row["checkins"] = n
+
+    averages = {}
+    for metric in METRICS:
+        x = cols[metric][lo:hi]
+        given = ~np.isnan(x)
+        sums = np.bincount(offset[given], weights=x[given], minlength=length)
+        counts = np.bincount(offset[given], minlength=length)
+
+        per_day = _ratio(sums[first - start:], counts[first - start:])
+        total_sums = np.concatenate(([0.0], np.cumsum(sums)))
+        total_counts = np.concatenate(([0], np.cumsum(counts)))
+        a, b = lead - start, first - start        # window of day k: [k - window + 1, k]
+        rolling = _ratio(
+            total_sums[b + 1:] - total_sums[a:a + days],
+            total_counts[b + 1:] - total_counts[a:a + days],
+        )
+        for row, value, avg in zip(daily, _rounded(per_day), _rounded(rolling)):
+            row[metric] = value
+            row[f"{metric}_avg"] = avg
+
+        week_means = _ratio(
+            sums[week_first - start:].reshape(weeks, 7).sum(axis=1),
+            counts[week_first - start:].reshape(weeks, 7).sum(axis=1),
+        )
+        changes = np.concatenate(([np.nan], np.diff(week_means)))
+        for row, value, change in zip(weekly, _rounded(week_means), _rounded(changes)):
+            row[metric] = value
+            row[f"{metric}_change"] = change
+
+        in_days = x[in_range - lo:]
+        in_days = in_days[~np.isnan(in_days)]
+        averages[metric] = _scalar(in_days.mean()) if len(in_days) else None
+
+    mood, sleep, stress = (cols[m][in_range:hi] for m in METRICS)
+    correlations = {}
+    for name, (x, y) in {
+        "sleep_mood": (sleep, mood),
+        "stress_mood": (stress, mood),
+        "sleep_stress": (sleep, stress),
+    }.items():
+        r, n = pearson(x, y)
+        correlations[name] = {"r": r, "n": n}
+
+    severity = np.bincount(cols["severity"][in_range:hi], minlength=len(SEVERITIES))
+    last, previous = weekly[-1], weekly[-2] if weeks > 1 else {}
+    return {
+        "range": {"start": daily[0]["date"], "end": today.isoformat(), "days": days, "window": window},
+        "checkins": int(hi - in_range),
+        "averages": averages,
+        "week_over_week": {
+            metric: {
+                "this_week": last[metric],
+                "last_week": previous.get(metric),
+                "change": last[f"{metric}_change"],
+            }
+            for metric in METRICS
+        },
+        "correlations": correlations,
+        "severity": dict(zip(SEVERITIES, severity.tolist())),
+        "daily": daily,
+        "weekly": weekly,
+    }
@@ -0,0 +1,129 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from . import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# -------------------------------
+# WRITER SETTINGS
+# -------------------------------
+GROUP_COMMIT_MS = float(os.getenv("CHECKIN_GROUP_COMMIT_MS", "2"))   # wait for more writes
+GROUP_COMMIT_MAX = int(os.getenv("CHECKIN_GROUP_COMMIT_MAX", "256"))  # ops per fsync
+WRITE_TIMEOUT = float(os.getenv("CHECKIN_WRITE_TIMEOUT", "10"))      # seconds
+
+
+# -------------------------------
+# CROSS-PROCESS FILE LOCK
+# -------------------------------
+class FileLock:
+    """
+    Exclusive lock on a sidecar file, shared by every process (uvicorn
+    worker, script) that writes to the same check-in log.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+
+    def acquire(self):
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.01)
+
+    def release(self):
+        if fcntl:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        os.close(self._fd)
+        self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+# -------------------------------
+# SINGLE WRITER WITH GROUP COMMIT
+# -------------------------------
+class GroupCommitWriter:
+    """
+    One background thread that owns all mutations of a store.
+
+    Callers hand in an operation and block on its result. The thread takes
+    whatever is queued (waiting up to GROUP_COMMIT_MS for stragglers) and
+    passes the whole batch to `commit(ops)`, which writes it with a single
+    fsync and returns one result per op.
+    """
+
+    def __init__(self, commit, name: str = "checkin-writer"):
+        self._commit = commit
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+        # stats for the stress script / metrics
+        self.batches = 0
+        self.ops = 0
+
+    def submit(self, op, timeout: float = WRITE_TIMEOUT):
+        future = Future()
+        self._queue.put((op, future))
+        return future.result(timeout=timeout)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            batch = [item]
+            deadline = time.monotonic() + GROUP_COMMIT_MS / 1000
+            while len(batch) < GROUP_COMMIT_MAX:
+                try:
+                    item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)   # finish this batch, then stop
+                    break
+                batch.append(item)
+
+            ops = [op for op, _ in batch]
+            started = time.perf_counter()
+            try:
+                results = self._commit(ops)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            metrics.store_commit_latency.observe(time.perf_counter() - started)
+            metrics.store_commit_ops.observe(len(batch))
+
+            self.batches += 1
+            self.ops += len(batch)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
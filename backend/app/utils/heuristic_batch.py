@@ -0,0 +1,97 @@
+from typing import NamedTuple
+
+import numpy as np
+
+# -------------------------------
+# VECTORIZED HEURISTIC
+# -------------------------------
+# Column-at-a-time version of routes/analyze.py:heuristic_analysis for
+# scoring thousands of forms at once. It must give exactly the same answer
+# as the scalar function (scripts/check_heuristic_parity.py checks this):
+# same float operations in the same order, same truthiness rules (a stress
+# or mood of 0 counts as "not given" where the scalar code uses `if x:`).
+PANIC_SYMPTOM = "panic attacks"
+DEPRESSION_WORD = "depression"
+
+DISORDERS = np.array(["Panic / Anxiety", "Depression", "No disorder detected", "Anxiety"], dtype=object)
+PANIC, DEPRESSION, NO_DISORDER, ANXIETY = range(4)
+
+
+class EncodedBatch(NamedTuple):
+    has_panic: np.ndarray      # bool, "panic attacks" among the symptoms
+    has_depression: np.ndarray # bool, a symptom containing "depression"
+    symptom_counts: np.ndarray # len(symptoms) per form, duplicates included
+    mood: np.ndarray           # float, 0 where not given
+    mood_given: np.ndarray     # bool, mood is not None
+    stress: np.ndarray         # float, 0 where not given
+    self_harm: np.ndarray      # bool, "self-harm" in text
+
+
+class BatchScores(NamedTuple):
+    confidence: np.ndarray     # unrounded, 0.05..0.98
+    disorder: np.ndarray       # object array of labels
+    severity: np.ndarray       # object array of "mild"/"moderate"/"severe"
+    emergency: np.ndarray      # bool
+
+
+def encode(forms) -> EncodedBatch:
+    """
+    Turn SymptomRequest-like objects into arrays (list comprehensions, no
+    per-cell numpy writes). score() only asks two questions of the symptom
+    lists, so only those two flags are kept: memory stays O(n + symptoms),
+    not n x distinct symptoms.
+    """
+    n = len(forms)
+    symptom_lists = [form.symptoms for form in forms]
+    counts = np.fromiter(map(len, symptom_lists), dtype=np.int64, count=n)
+
+    # index each lowercased symptom into the distinct ones, classify only
+    # the distinct ones, then map the flags back to rows
+    vocabulary = {}
+    cols = np.array([vocabulary.setdefault(s.lower(), len(vocabulary))
+                     for symptoms in symptom_lists for s in symptoms], dtype=np.int64)
+    rows = np.repeat(np.arange(n), counts)
+    is_panic = np.array([s == PANIC_SYMPTOM for s in vocabulary], dtype=bool)
+    is_depression = np.array([DEPRESSION_WORD in s for s in vocabulary], dtype=bool)
+
+    has_panic = np.zeros(n, dtype=bool)
+    has_panic[rows[is_panic[cols]]] = True
+    has_depression = np.zeros(n, dtype=bool)
+    has_depression[rows[is_depression[cols]]] = True
+
+    moods = [form.overall_mood for form in forms]
+    return EncodedBatch(
+        has_panic=has_panic,
+        has_depression=has_depression,
+        symptom_counts=counts,
+        mood=np.array([m or 0 for m in moods], dtype=float),
+        mood_given=np.array([m is not None for m in moods], dtype=bool),
+        stress=np.array([form.stress_level or 0 for form in forms], dtype=float),
+        self_harm=np.array(["self-harm" in form.text.lower() for form in forms], dtype=bool),
+    )
+
+
+def score(batch: EncodedBatch) -> BatchScores:
+    """Confidence, label, severity and emergency flag for every row."""
+    score = np.minimum(batch.symptom_counts * 0.12, 0.6)
+    score = score + np.where(batch.stress != 0, (batch.stress / 10.0) * 0.3, 0.0)
+    score = score + np.where(batch.mood_given, np.maximum(0.0, (6 - batch.mood) / 10.0) * 0.2, 0.0)
+    confidence = np.maximum(0.05, np.minimum(score, 0.98))
+
+    panic = batch.has_panic | (batch.stress >= 8)
+    depression = ~panic & (batch.has_depression | ((batch.mood != 0) & (batch.mood <= 3)))
+    no_disorder = ~panic & ~depression & (batch.symptom_counts == 0)
+    label = np.select([panic, depression, no_disorder], [PANIC, DEPRESSION, NO_DISORDER], ANXIETY)
+
+    severity = np.select(
+        [label == PANIC, label == DEPRESSION, label == NO_DISORDER],
+        [
+            np.where(confidence > 0.7, "severe", "moderate"),
+            np.where(confidence > 0.5, "moderate", "mild"),
+            "mild",
+        ],
+        "moderate",
+    ).astype(object)
+
+    emergency = (batch.stress >= 9) | batch.self_harm
+    return BatchScores(confidence, DISORDERS[label], severity, emergency)
@@ -0,0 +1,319 @@
+import math
+from collections import Counter
+from functools import lru_cache
+from typing import NamedTuple
+
+# -------------------------------
+# SCRIPTS
+# -------------------------------
+# Unicode blocks we tell apart, and the language a script implies when only
+# one supported language is written in it.
+SCRIPT_RANGES = {
+    "Latn": [(0x0041, 0x005A), (0x0061, 0x007A), (0x00C0, 0x024F)],
+    "Deva": [(0x0900, 0x097F)],
+    "Beng": [(0x0980, 0x09FF)],
+    "Guru": [(0x0A00, 0x0A7F)],
+    "Gujr": [(0x0A80, 0x0AFF)],
+    "Orya": [(0x0B00, 0x0B7F)],
+    "Taml": [(0x0B80, 0x0BFF)],
+    "Telu": [(0x0C00, 0x0C7F)],
+    "Knda": [(0x0C80, 0x0CFF)],
+    "Mlym": [(0x0D00, 0x0D7F)],
+}
+
+SCRIPT_LANGUAGE = {
+    "Beng": "bn",
+    "Guru": "pa",
+    "Gujr": "gu",
+    "Orya": "or",
+    "Taml": "ta",
+    "Telu": "te",
+    "Knda": "kn",
+    "Mlym": "ml",
+}
+
+LANGUAGE_NAMES = {
+    "en": "English",
+    "hi": "Hindi",
+    "hi-Latn": "Hindi (romanized)",
+    "mr": "Marathi",
+    "gu": "Gujarati",
+    "te": "Telugu",
+    "bn": "Bengali",
+    "pa": "Punjabi",
+    "or": "Odia",
+    "ta": "Tamil",
+    "kn": "Kannada",
+    "ml": "Malayalam",
+    "und": "Unknown",
+}
+
+
+@lru_cache(maxsize=4096)
+def script_of(ch: str):
+    cp = ord(ch)
+    for script, ranges in SCRIPT_RANGES.items():
+        for lo, hi in ranges:
+            if lo <= cp <= hi:
+                return script
+    return None
+
+
+def script_counts(text: str):
+    """
+    Letters per script. Counter() walks the text once in C; only the
+    distinct characters (a few dozen) are classified in Python.
+    """
+    counts = Counter()
+    for ch, n in Counter(text).items():
+        script = script_of(ch)
+        if script is not None:
+            counts[script] += n
+    return counts
+
+
+# -------------------------------
+# CHARACTER N-GRAM MODEL
+# -------------------------------
+# Languages that share a script are told apart by character 1-3 grams plus
+# whole words (padded with spaces, so short function words like " है " /
+# " आहे " become strong features). Trained at import from the samples below.
+TRAINING_SAMPLES = {
+    "Deva": {
+        "hi": [
+            "मैं आज बहुत थका हुआ महसूस कर रहा हूँ",
+            "मुझे रात को नींद नहीं आती है",
+            "मेरा मन बहुत उदास है और मैं किसी से बात करना चाहता हूँ",
+            "क्या आप मेरी मदद कर सकते हैं",
+            "मुझे बहुत चिंता हो रही है",
+            "मैं अपने काम को लेकर परेशान हूँ",
+            "घर में सब ठीक है लेकिन मैं खुश नहीं हूँ",
+            "कल मेरी परीक्षा है और मुझे डर लग रहा है",
+            "मेरे दोस्त मुझसे बात नहीं करते",
+            "मैं हर समय अकेला महसूस करता हूँ",
+            "आपका बहुत धन्यवाद, अब मुझे थोड़ा अच्छा लग रहा है",
+            "मुझे समझ नहीं आ रहा कि मैं क्या करूँ",
+            "यह मेरे लिए बहुत मुश्किल समय है",
+            "मैंने पिछले हफ्ते से ठीक से खाना नहीं खाया",
+            "उसने कहा था कि वह आएगा लेकिन वह नहीं आया",
+            "हम सब मिलकर इस समस्या का हल निकाल सकते हैं",
+            "मेरी माँ और पिताजी मेरी बहुत चिंता करते हैं",
+            "क्या यह सामान्य है कि मुझे इतना गुस्सा आता है",
+            "नमस्ते, आप कैसे हैं",
+            "मुझे लगता है कि मुझे किसी से बात करनी चाहिए",
+        ],
+        "mr": [
+            "मी आज खूप थकलो आहे",
+            "मला रात्री झोप येत नाही",
+            "माझे मन खूप उदास आहे आणि मला कोणाशी तरी बोलायचे आहे",
+            "तुम्ही मला मदत करू शकता का",
+            "मला खूप काळजी वाटत आहे",
+            "मी माझ्या कामामुळे त्रस्त आहे",
+            "घरी सगळे ठीक आहे पण मी आनंदी नाही",
+            "उद्या माझी परीक्षा आहे आणि मला भीती वाटते",
+            "माझे मित्र माझ्याशी बोलत नाहीत",
+            "मला नेहमी एकटे वाटते",
+            "तुमचे खूप आभार, आता मला थोडे बरे वाटत आहे",
+            "मला काय करावे ते कळत नाही",
+            "हा माझ्यासाठी खूप कठीण काळ आहे",
+            "मी गेल्या आठवड्यापासून नीट जेवलो नाही",
+            "तो म्हणाला होता की तो येईल पण तो आला नाही",
+            "आपण सगळे मिळून या समस्येवर उपाय शोधू शकतो",
+            "माझे आई वडील माझी खूप काळजी करतात",
+            "मला इतका राग येणे सामान्य आहे का",
+            "नमस्कार, तुम्ही कसे आहात",
+            "मला वाटते की मी कोणाशी तरी बोलले पाहिजे",
+        ],
+    },
+    "Latn": {
+        "en": [
+            "I have been feeling really tired and anxious lately",
+            "I can't sleep at night and my mind keeps racing",
+            "Can you help me understand why I feel this way",
+            "My friends don't talk to me anymore and I feel lonely",
+            "I have an exam tomorrow and I am very stressed",
+            "Thank you, I feel a little better now",
+            "I don't know what to do with my life",
+            "Work has been overwhelming and I need a break",
+            "Is it normal to feel angry all the time",
+            "My parents worry about me a lot",
+            "I haven't been eating properly since last week",
+            "Sometimes I just want to stay in bed all day",
+            "How can I stop overthinking everything",
+            "What are some ways to calm down when I panic",
+            "Hello, how are you doing today",
+            "I think I need to talk to someone about this",
+            "It feels like nobody understands what I am going through",
+            "Please give me some tips for better sleep",
+            "hi there, hi, hey, hello, thanks, ok, yes, no, good morning",
+            "I am sad and I am scared of what will happen to me",
+            "She said that he was not coming back to the house",
+            "We should do this together because it is the right thing",
+            "they were happy with their results but I was not",
+        ],
+        "hi-Latn": [
+            "main aaj bahut thaka hua mehsoos kar raha hoon",
+            "mujhe raat ko neend nahi aati hai",
+            "mera mann bahut udaas hai aur main kisi se baat karna chahta hoon",
+            "kya aap meri madad kar sakte ho",
+            "mujhe bahut tension ho rahi hai yaar",
+            "main apne kaam ko lekar pareshan hoon",
+            "ghar mein sab theek hai lekin main khush nahi hoon",
+            "kal meri exam hai aur mujhe dar lag raha hai",
+            "mere dost mujhse baat nahi karte",
+            "main har samay akela feel karta hoon",
+            "aapka bahut shukriya ab mujhe thoda acha lag raha hai",
+            "mujhe samajh nahi aa raha ki main kya karun",
+            "yeh mere liye bahut mushkil time hai",
+            "kya yeh normal hai ki mujhe itna gussa aata hai",
+            "kaise ho aap sab theek hai na",
+            "mujhe kuch samajh nahi aata kya karu",
+            "koi mujhse baat hi nahi karta",
+            "neend nahi aa rahi aur dimaag mein bahut kuch chal raha hai",
+        ],
+    },
+}
+
+# Prior belief per language within a script (short Latin text is far more
+# likely to be English than romanized Hindi).
+PRIORS = {"en": 0.7, "hi-Latn": 0.3, "hi": 0.6, "mr": 0.4}
+
+MAX_NGRAM_CHARS = 1000     # enough evidence; keeps very long messages O(1)
+MIN_NGRAM_LETTERS = 4      # below this ("hi", "ok") the prior decides
+# Naive Bayes picks *some* language for any text in the script; French or
+# Spanish would come out as English or romanized Hindi at ~1.0. Below this
+# share of known trigrams/words the text is none of the modelled languages.
+# Only for Latin: Devanagari text here is Hindi or Marathi, and colloquial
+# Marathi shares little with the training samples.
+MIN_NGRAM_COVERAGE = {"Latn": 0.5}
+# naive Bayes posteriors are near 0 or 1 for any sentence; never report
+# a model guess as certain
+MAX_NGRAM_PROB = 0.95
+
+
+def _normalize(text: str, script: str):
+    """Lowercase, keep only characters of `script`, pad words with spaces."""
+    out = [ch if script_of(ch) == script else " " for ch in text.lower()[:MAX_NGRAM_CHARS]]
+    return " " + " ".join("".join(out).split()) + " "
+
+
+def _ngrams(text: str, orders=(1, 2, 3)):
+    for n in orders:
+        for i in range(len(text) - n + 1):
+            gram = text[i:i + n]
+            if gram.strip():
+                yield gram
+    # whole words as features too: function words carry most of the signal
+    for word in text.split():
+        yield f" {word} "
+
+
+class NgramModel:
+    """Multinomial naive Bayes over character n-grams, add-alpha smoothed."""
+
+    def __init__(self, script: str, samples: dict, alpha: float = 0.5):
+        self.script = script
+        self.languages = list(samples)
+        counts = {lang: Counter() for lang in samples}
+        for lang, texts in samples.items():
+            for text in texts:
+                counts[lang].update(_ngrams(_normalize(text, script)))
+
+        vocab = set().union(*counts.values())
+        self.vocab = vocab
+        self.logprob = {}
+        self.unseen = {}
+        for lang, c in counts.items():
+            denom = sum(c.values()) + alpha * (len(vocab) + 1)
+            self.logprob[lang] = {g: math.log((n + alpha) / denom) for g, n in c.items()}
+            self.unseen[lang] = math.log(alpha / denom)
+
+    def grams(self, text: str):
+        return Counter(_ngrams(_normalize(text, self.script)))
+
+    def coverage(self, grams: Counter):
+        """
+        Share of the trigrams and whole words seen in training. Single
+        letters and bigrams are shared by most languages of a script, so
+        they are left out.
+        """
+        total = known = 0
+        for gram, n in grams.items():
+            if len(gram) >= 3:
+                total += n
+                known += n if gram in self.vocab else 0
+        return known / total if total else 1.0
+
+    def scores(self, grams: Counter):
+        """Posterior probability of each language for the n-grams of a text."""
+        loglik = {}
+        for lang in self.languages:
+            table, unseen = self.logprob[lang], self.unseen[lang]
+            total = math.log(PRIORS.get(lang, 1.0))
+            for gram, n in grams.items():
+                total += n * table.get(gram, unseen)
+            loglik[lang] = total
+
+        top = max(loglik.values())
+        exp = {lang: math.exp(v - top) for lang, v in loglik.items()}
+        norm = sum(exp.values())
+        return {lang: v / norm for lang, v in exp.items()}
+
+
+MODELS = {script: NgramModel(script, samples) for script, samples in TRAINING_SAMPLES.items()}
+
+
+# -------------------------------
+# PUBLIC API
+# -------------------------------
+class Detection(NamedTuple):
+    code: str              # "en", "hi", "hi-Latn", "mr", "gu", ...
+    name: str              # "English", "Hindi", ...
+    confidence: float      # 0..1
+    scores: dict           # code -> probability
+
+
+DEFAULT = Detection("en", LANGUAGE_NAMES["en"], 0.0, {"en": 0.0})
+UNKNOWN = "und"            # a script we model, but none of its languages
+
+
+def detect(text: str) -> Detection:
+    """
+    Detect the language of `text` locally: pick the dominant script in one
+    pass, then, for scripts shared by several languages, let the n-gram
+    model choose. Confidence = share of letters in that script x model
+    probability (capped at MAX_NGRAM_PROB) x n-gram coverage, so text the
+    model only partly recognises is not reported as certain. Returns code
+    "und" when too little of a Latin text is known to the model (French,
+    Spanish, ...).
+    """
+    counts = script_counts(text)
+    if not counts:
+        return DEFAULT
+
+    script, letters = counts.most_common(1)[0]
+    share = letters / sum(counts.values())
+
+    coverage = 1.0
+    if script in MODELS and letters < MIN_NGRAM_LETTERS:
+        probs = {lang: PRIORS.get(lang, 1.0) for lang in MODELS[script].languages}
+    elif script in MODELS:
+        model = MODELS[script]
+        grams = model.grams(text)
+        probs = {lang: min(p, MAX_NGRAM_PROB) for lang, p in model.scores(grams).items()}
+        coverage = model.coverage(grams)
+    elif script in SCRIPT_LANGUAGE:
+        probs = {SCRIPT_LANGUAGE[script]: 1.0}
+    else:
+        return DEFAULT
+
+    code = max(probs, key=probs.get)
+    scores = {lang: round(p * share * coverage, 4) for lang, p in probs.items()}
+    if coverage < MIN_NGRAM_COVERAGE.get(script, 0.0):
+        return Detection(UNKNOWN, LANGUAGE_NAMES[UNKNOWN], 0.0, scores)
+    return Detection(code, LANGUAGE_NAMES[code], scores[code], scores)
+
+
+def detect_batch(texts):
+    """Detect many texts; same result as calling detect() on each."""
+    return [detect(text) for text in texts]
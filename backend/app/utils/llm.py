@@ -0,0 +1,316 @@
+import asyncio
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+from dotenv import load_dotenv
+
+from . import metrics
+from .singleflight import SingleFlight, request_key
+
+load_dotenv()
+
+# -------------------------------
+# SETTINGS (read once at import)
+# -------------------------------
+# "groq": the real API (or any chat-completions server at GROQ_BASE_URL,
+#         e.g. scripts/fake_llm_server.py).
+# "fake": canned in-process answers (and token streams) from llm_fake.py,
+#         for local runs and tests without a key.
+# "record" / "replay": the Groq SDK over a transport that records real
+#         completions to LLM_CASSETTE / answers from it, see llm_cassette.py.
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")
+
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL")   # None = Groq's default endpoint
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))                  # whole request, seconds
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))             # SDK retries w/ backoff
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "20"))                # idle keep-alive conns
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "50"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))  # seconds idle
+
+# Identical concurrent async completions (retries, double submits) share one
+# upstream call. LLM_COALESCE_TIMEOUT caps how long a caller waits on a
+# shared call (0 = only the route's own budget applies).
+LLM_COALESCE = os.getenv("LLM_COALESCE", "1") == "1"
+LLM_COALESCE_TIMEOUT = float(os.getenv("LLM_COALESCE_TIMEOUT", "0")) or None
+
+# Per-route latency budgets (seconds) for async calls; see routes/chat.py etc.
+LATENCY_BUDGETS = {
+    "chat": float(os.getenv("LLM_BUDGET_CHAT", "20")),
+    "title": float(os.getenv("LLM_BUDGET_TITLE", "5")),
+    "analyze": float(os.getenv("LLM_BUDGET_ANALYZE", "15")),
+    "checkin": float(os.getenv("LLM_BUDGET_CHECKIN", "15")),
+}
+
+
+# -------------------------------
+# CONNECTION REUSE METRIC
+# -------------------------------
+class ConnectionStats:
+    """
+    Counts requests sent and TCP connections opened by the shared client.
+    Every request that did not open a connection reused a pooled one (and
+    skipped the TCP + TLS handshake).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+
+    def on_request(self, request: httpx.Request):
+        with self._lock:
+            self.requests += 1
+        request.extensions["trace"] = self._trace
+
+    async def on_request_async(self, request: httpx.Request):
+        self.on_request(request)
+        request.extensions["trace"] = self._trace_async
+
+    def _trace(self, event: str, info: dict):
+        if event == "connection.connect_tcp.complete":
+            with self._lock:
+                self.new_connections += 1
+
+    async def _trace_async(self, event: str, info: dict):
+        self._trace(event, info)
+
+    def snapshot(self):
+        reused = max(0, self.requests - self.new_connections)
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused_connections": reused,
+            "reuse_ratio": round(reused / self.requests, 4) if self.requests else 0.0,
+        }
+
+
+connection_stats = ConnectionStats()
+
+
+# -------------------------------
+# COMPLETION HOOKS
+# -------------------------------
+# Called after every async completion request that reached the client
+# (hedges included, streams when they are opened) as
+# hook(model, seconds, usage, error); usage is None for streams and
+# failures. Hooks must be cheap and must not raise.
+completion_hooks = []
+
+
+class _MeteredCompletions:
+    def __init__(self, completions):
+        self._completions = completions
+
+    async def create(self, **params):
+        started = time.perf_counter()
+        usage = error = None
+        try:
+            response = await self._completions.create(**params)
+            usage = None if params.get("stream") else getattr(response, "usage", None)
+            return response
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            for hook in completion_hooks:
+                hook(params.get("model"), time.perf_counter() - started, usage, error)
+
+
+class MeteredAsyncClient:
+    """Wraps an async client so completion_hooks see every request."""
+
+    def __init__(self, client):
+        self.direct = client
+        self.chat = SimpleNamespace(completions=_MeteredCompletions(client.chat.completions))
+
+    async def close(self):
+        await self.direct.close()
+
+
+def _record_metrics(model, seconds, usage, error):
+    if error is None:
+        outcome = "ok"
+    elif isinstance(error, asyncio.CancelledError):
+        outcome = "cancelled"     # hedge loser, missed budget, client gone
+    else:
+        outcome = "error"
+    metrics.llm_requests.inc(model=model, outcome=outcome)
+    metrics.llm_latency.observe(seconds, model=model)
+    if usage is not None:
+        metrics.llm_tokens.inc(getattr(usage, "prompt_tokens", 0) or 0, model=model, kind="prompt")
+        metrics.llm_tokens.inc(getattr(usage, "completion_tokens", 0) or 0, model=model, kind="completion")
+
+
+completion_hooks.append(_record_metrics)
+
+
+# -------------------------------
+# REQUEST COALESCING
+# -------------------------------
+coalescer = SingleFlight()
+
+# Called as hook(model, usage) for every caller that got another caller's
+# in-flight completion: completion_hooks only ran in the leader's context,
+# so this is where followers are accounted for (e.g. their token quota).
+# The llm_tokens metric keeps counting upstream tokens only.
+shared_hooks = []
+
+
+class _CoalescingCompletions:
+    def __init__(self, completions):
+        self._completions = completions
+
+    async def create(self, **params):
+        if params.get("stream"):
+            # a token stream can only be consumed once; never share it
+            return await self._completions.create(**params)
+
+        led = []
+
+        def start():
+            led.append(True)
+            return self._completions.create(**params)
+
+        response = await coalescer.do(request_key(**params), start, timeout=LLM_COALESCE_TIMEOUT)
+        if not led:
+            usage = getattr(response, "usage", None)
+            for hook in shared_hooks:
+                hook(params.get("model"), usage)
+        return response
+
+
+class CoalescingAsyncClient:
+    """
+    Wraps an async client so chat.completions.create() calls with the same
+    model, messages and parameters that overlap in time hit the API once.
+    """
+
+    def __init__(self, client):
+        self.direct = client    # the unwrapped client, for calls that must not be shared
+        self.chat = SimpleNamespace(completions=_CoalescingCompletions(client.chat.completions))
+
+    async def close(self):
+        await self.direct.close()
+
+
+# -------------------------------
+# SHARED CLIENTS
+# -------------------------------
+# One sync client (thread-pool routes) and one async client (async routes),
+# each with its own keep-alive pool.
+_client = None
+_async_client = None
+_client_lock = threading.Lock()
+
+
+def _http_options():
+    return dict(
+        timeout=httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_POOL_SIZE,
+            keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+def _sdk_options():
+    return dict(
+        api_key=GROQ_API_KEY or "replay",     # replay needs no key
+        base_url=GROQ_BASE_URL,
+        max_retries=LLM_MAX_RETRIES,
+        timeout=httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+    )
+
+
+_cassette = None
+
+
+def _transport(asynchronous: bool):
+    """Record/replay transport for LLM_BACKEND=record/replay, else None (httpx's own)."""
+    global _cassette
+    if LLM_BACKEND not in ("record", "replay"):
+        return None
+    from . import llm_cassette
+
+    if _cassette is None:
+        _cassette = llm_cassette.Cassette()
+    if LLM_BACKEND == "replay":
+        return llm_cassette.ReplayTransport(_cassette)
+    limits = _http_options()["limits"]
+    inner = httpx.AsyncHTTPTransport(limits=limits) if asynchronous else httpx.HTTPTransport(limits=limits)
+    return llm_cassette.RecordingTransport(inner, _cassette)
+
+
+def _build_client():
+    from groq import Groq
+
+    http_client = httpx.Client(
+        **_http_options(),
+        transport=_transport(asynchronous=False),
+        event_hooks={"request": [connection_stats.on_request]},
+    )
+    return Groq(**_sdk_options(), http_client=http_client)
+
+
+def _build_async_client():
+    from groq import AsyncGroq
+
+    http_client = httpx.AsyncClient(
+        **_http_options(),
+        transport=_transport(asynchronous=True),
+        event_hooks={"request": [connection_stats.on_request_async]},
+    )
+    return AsyncGroq(**_sdk_options(), http_client=http_client)
+
+
+def _upstream_configured():
+    return bool(GROQ_API_KEY) or LLM_BACKEND == "replay"
+
+
+def init_client():
+    """Create the process-wide clients (called at app startup)."""
+    global _client, _async_client
+    with _client_lock:
+        async_client = None
+        if _client is None and LLM_BACKEND == "fake":
+            from .llm_fake import FakeClient, FakeAsyncClient
+            _client, async_client = FakeClient(), FakeAsyncClient()
+        if _client is None and _upstream_configured():
+            _client = _build_client()
+        if _async_client is None and async_client is None and _upstream_configured():
+            async_client = _build_async_client()
+        if async_client is not None:
+            # raw client -> metered (hooks) -> coalescing (optional)
+            async_client = MeteredAsyncClient(async_client)
+            _async_client = CoalescingAsyncClient(async_client) if LLM_COALESCE else async_client
+    return _client
+
+
+def get_client():
+    """The shared Groq client, or None when GROQ_API_KEY is not set."""
+    return _client if _client is not None else init_client()
+
+
+def get_async_client():
+    """The shared AsyncGroq client, or None when GROQ_API_KEY is not set."""
+    if _async_client is None:
+        init_client()
+    return _async_client
+
+
+async def close_client():
+    global _client, _async_client
+    with _client_lock:
+        client, async_client = _client, _async_client
+        _client = _async_client = None
+    if client is not None:
+        client.close()
+    if async_client is not None:
+        await async_client.close()
@@ -0,0 +1,272 @@
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+
+import httpx
+
+# -------------------------------
+# SETTINGS
+# -------------------------------
+# LLM_BACKEND=record: real Groq calls, every completion also appended to the
+#                     cassette (request model/messages/params + response body
+#                     and timings). Cassettes contain user text: keep them local.
+# LLM_BACKEND=replay: no network; answers come from the cassette.
+LLM_CASSETTE = os.getenv("LLM_CASSETTE", "llm_cassette.jsonl")
+# Replay latency, applied to the whole response (or the first token of a stream):
+#   recorded            as measured while recording (default)
+#   fixed:S             always S seconds
+#   uniform:A,B         uniformly between A and B seconds
+#   normal:MEAN,SD      normal, clipped at 0
+#   lognormal:MEDIAN,SIGMA   long right tail, like real LLM latencies
+LLM_REPLAY_LATENCY = os.getenv("LLM_REPLAY_LATENCY", "recorded")
+# Delay between streamed events: "recorded" or seconds
+LLM_REPLAY_TOKEN_DELAY = os.getenv("LLM_REPLAY_TOKEN_DELAY", "recorded")
+LLM_REPLAY_SEED = os.getenv("LLM_REPLAY_SEED")
+
+# replies are looked up by the exact request first, then by its "shape"
+# (model, stream flag, system prompt, max_tokens, temperature), so a load
+# test with made-up user messages still gets a recorded answer of the right
+# kind. Call sites without a system prompt (chat title, check-in analysis)
+# differ in max_tokens/temperature.
+_KEY_PARAMS = ("model", "messages", "temperature", "top_p", "max_tokens", "stream")
+
+
+def _digest(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def exact_key(params: dict) -> str:
+    return _digest({k: params.get(k) for k in _KEY_PARAMS})
+
+
+def shape_key(params: dict) -> str:
+    messages = params.get("messages") or []
+    system = messages[0].get("content") if messages and messages[0].get("role") == "system" else None
+    return _digest([params.get("model"), bool(params.get("stream")), system,
+                    params.get("max_tokens"), params.get("temperature")])
+
+
+# -------------------------------
+# CASSETTE FILE
+# -------------------------------
+class Cassette:
+    """Recorded completions, one JSON object per line."""
+
+    def __init__(self, path: str = LLM_CASSETTE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._exact = {}
+        self._shapes = {}       # shape key -> [entries], served round-robin
+        self._turns = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._add(json.loads(line))
+
+    def _add(self, entry):
+        self._exact[entry["key"]] = entry
+        # from the recorded request, so cassettes written with an older
+        # shape key still replay
+        self._shapes.setdefault(shape_key(entry["request"]), []).append(entry)
+
+    def __len__(self):
+        return len(self._exact)
+
+    def append(self, entry: dict):
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._add(entry)
+
+    def find(self, params: dict):
+        entry = self._exact.get(exact_key(params))
+        if entry is not None:
+            return entry
+        shape = shape_key(params)
+        candidates = self._shapes.get(shape)
+        if not candidates:
+            return None
+        with self._lock:
+            turn = self._turns.get(shape, 0)
+            self._turns[shape] = turn + 1
+        return candidates[turn % len(candidates)]
+
+
+# -------------------------------
+# LATENCY MODELS (replay)
+# -------------------------------
+class Latency:
+    def __init__(self, spec: str = LLM_REPLAY_LATENCY, seed=LLM_REPLAY_SEED):
+        self.kind, _, args = spec.partition(":")
+        self.args = [float(a) for a in args.split(",")] if args else []
+        self._rng = random.Random(seed)
+        if self.kind not in ("recorded", "fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"unknown LLM_REPLAY_LATENCY {spec!r}")
+
+    def sample(self, recorded: float) -> float:
+        if self.kind == "fixed":
+            return self.args[0]
+        if self.kind == "uniform":
+            return self._rng.uniform(*self.args)
+        if self.kind == "normal":
+            return max(0.0, self._rng.gauss(*self.args))
+        if self.kind == "lognormal":
+            median, sigma = self.args
+            return self._rng.lognormvariate(math.log(median), sigma)
+        return recorded
+
+
+def _sse_events(body: str):
+    """Split an SSE body into its events, each with its blank-line terminator."""
+    return [event + "\n\n" for event in body.split("\n\n") if event.strip()]
+
+
+# -------------------------------
+# TRANSPORTS (under the Groq SDK's httpx client)
+# -------------------------------
+def _entry(request: httpx.Request, response: httpx.Response, body: bytes, first_byte: float, total: float):
+    params = json.loads(request.content or b"{}")
+    text = body.decode("utf-8")
+    return {
+        "key": exact_key(params),
+        "shape": shape_key(params),
+        "request": {k: params.get(k) for k in _KEY_PARAMS if k in params},
+        "status": response.status_code,
+        "content_type": response.headers.get("content-type", "application/json"),
+        "body": text,
+        "first_byte": round(first_byte, 4),
+        "duration": round(total, 4),
+        "events": len(_sse_events(text)) if params.get("stream") else 0,
+    }
+
+
+def _replayed(response_body: bytes, entry: dict, stream) -> httpx.Response:
+    return httpx.Response(
+        entry["status"],
+        headers={"content-type": entry["content_type"]},
+        content=response_body if stream is None else None,
+        stream=stream,
+    )
+
+
+class RecordingTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """
+    Passes requests to the real transport and appends every completion to
+    the cassette. Responses (streams too) are read fully before they are
+    handed back, so recorded streams arrive all at once.
+    """
+
+    def __init__(self, inner, cassette: Cassette):
+        self._inner = inner
+        self.cassette = cassette
+
+    def _should_record(self, request, response):
+        return request.url.path.endswith("/chat/completions") and response.status_code == 200
+
+    def handle_request(self, request):
+        started = time.perf_counter()
+        response = self._inner.handle_request(request)
+        first_byte = time.perf_counter() - started
+        body = response.read()
+        if self._should_record(request, response):
+            self.cassette.append(_entry(request, response, body, first_byte, time.perf_counter() - started))
+        return httpx.Response(response.status_code, headers=_plain_headers(response), content=body)
+
+    async def handle_async_request(self, request):
+        started = time.perf_counter()
+        response = await self._inner.handle_async_request(request)
+        first_byte = time.perf_counter() - started
+        body = await response.aread()
+        if self._should_record(request, response):
+            self.cassette.append(_entry(request, response, body, first_byte, time.perf_counter() - started))
+        return httpx.Response(response.status_code, headers=_plain_headers(response), content=body)
+
+    def close(self):
+        self._inner.close()
+
+    async def aclose(self):
+        await self._inner.aclose()
+
+
+def _plain_headers(response):
+    # the body is handed back decoded, so its encoding/length headers no longer apply
+    return [(k, v) for k, v in response.headers.items()
+            if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")]
+
+
+class _ReplayStream(httpx.SyncByteStream, httpx.AsyncByteStream):
+    def __init__(self, events, first, gap):
+        self._events = events
+        self._first = first
+        self._gap = gap
+
+    def __iter__(self):
+        time.sleep(self._first)
+        for i, event in enumerate(self._events):
+            if i:
+                time.sleep(self._gap)
+            yield event.encode("utf-8")
+
+    async def __aiter__(self):
+        await asyncio.sleep(self._first)
+        for i, event in enumerate(self._events):
+            if i:
+                await asyncio.sleep(self._gap)
+            yield event.encode("utf-8")
+
+
+class ReplayTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """
+    Answers chat completions from a cassette, with the configured latency.
+    A request with no recorded answer gets a 404, which the SDK raises and
+    the routes treat like any other upstream failure (fallback answer).
+    """
+
+    def __init__(self, cassette: Cassette, latency: Latency = None, token_delay=LLM_REPLAY_TOKEN_DELAY):
+        self.cassette = cassette
+        self.latency = latency or Latency()
+        self.token_delay = token_delay
+        self.misses = 0
+
+    def _plan(self, request):
+        """(entry or None, stream or None, delay before a non-stream answer)"""
+        params = json.loads(request.content or b"{}")
+        entry = self.cassette.find(params)
+        if entry is None:
+            self.misses += 1
+            return None, None, 0.0
+        if not entry["events"]:
+            return entry, None, self.latency.sample(entry["duration"])
+
+        events = _sse_events(entry["body"])
+        first = self.latency.sample(entry["first_byte"])
+        if self.token_delay == "recorded":
+            gap = max(0.0, entry["duration"] - entry["first_byte"]) / max(1, len(events) - 1)
+        else:
+            gap = float(self.token_delay)
+        return entry, _ReplayStream(events, first, gap), 0.0
+
+    def _miss(self):
+        return httpx.Response(404, json={"error": {
+            "message": "no recorded completion for this request", "type": "cassette_miss",
+        }})
+
+    def handle_request(self, request):
+        entry, stream, delay = self._plan(request)
+        if entry is None:
+            return self._miss()
+        time.sleep(delay)
+        return _replayed(entry["body"].encode("utf-8"), entry, stream)
+
+    async def handle_async_request(self, request):
+        entry, stream, delay = self._plan(request)
+        if entry is None:
+            return self._miss()
+        await asyncio.sleep(delay)
+        return _replayed(entry["body"].encode("utf-8"), entry, stream)
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import os
+import time
+from types import SimpleNamespace
+
+# -------------------------------
+# SETTINGS
+# -------------------------------
+FAKE_LLM_REPLY = os.getenv(
+    "FAKE_LLM_REPLY",
+    "I hear you. It sounds like a lot is on your mind right now. "
+    "Would you like to talk about what has been weighing on you most?",
+)
+FAKE_LLM_TOKEN_DELAY = float(os.getenv("FAKE_LLM_TOKEN_DELAY", "0.02"))   # seconds per token
+FAKE_LLM_FIRST_TOKEN_DELAY = float(os.getenv("FAKE_LLM_FIRST_TOKEN_DELAY", "0.2"))
+
+FAKE_PREDICTION = {
+    "predicted_disorder": "Anxiety",
+    "severity_level": "moderate",
+    "confidence_score": 0.6,
+    "recommendations": "Try short breathing exercises and keep a regular sleep schedule.",
+    "next_steps": "1. Practice relaxation  2. Track symptoms for a week",
+    "emergency_contact_suggested": False,
+}
+
+
+def _reply_for(messages):
+    """JSON for the prompts that ask for it, a short chat reply otherwise."""
+    prompt = messages[-1]["content"] if messages else ""
+    if "JSON" in prompt:
+        return json.dumps(FAKE_PREDICTION)
+    if prompt.startswith("Generate a short"):
+        return "Talking Through A Hard Day"
+    return FAKE_LLM_REPLY
+
+
+def _tokens(text: str):
+    # word-sized pieces, keeping the whitespace like a real tokenizer stream
+    words = text.split(" ")
+    return [w + (" " if i < len(words) - 1 else "") for i, w in enumerate(words)]
+
+
+def _completion(model, text):
+    usage = SimpleNamespace(prompt_tokens=0, completion_tokens=len(_tokens(text)), total_tokens=len(_tokens(text)))
+    message = SimpleNamespace(role="assistant", content=text)
+    return SimpleNamespace(
+        id="fake", model=model, usage=usage,
+        choices=[SimpleNamespace(index=0, message=message, finish_reason="stop")],
+    )
+
+
+def _chunk(model, piece):
+    delta = SimpleNamespace(role="assistant", content=piece)
+    return SimpleNamespace(
+        id="fake", model=model,
+        choices=[SimpleNamespace(index=0, delta=delta, finish_reason=None if piece else "stop")],
+    )
+
+
+# -------------------------------
+# FAKE CLIENTS (LLM_BACKEND=fake)
+# -------------------------------
+class _AsyncCompletions:
+    async def create(self, model, messages, stream=False, **kwargs):
+        text = _reply_for(messages)
+        if not stream:
+            await asyncio.sleep(FAKE_LLM_FIRST_TOKEN_DELAY + FAKE_LLM_TOKEN_DELAY * len(_tokens(text)))
+            return _completion(model, text)
+
+        async def chunks():
+            await asyncio.sleep(FAKE_LLM_FIRST_TOKEN_DELAY)
+            for piece in _tokens(text):
+                yield _chunk(model, piece)
+                await asyncio.sleep(FAKE_LLM_TOKEN_DELAY)
+            yield _chunk(model, None)
+
+        return chunks()
+
+
+class _Completions:
+    def create(self, model, messages, stream=False, **kwargs):
+        text = _reply_for(messages)
+        if not stream:
+            time.sleep(FAKE_LLM_FIRST_TOKEN_DELAY + FAKE_LLM_TOKEN_DELAY * len(_tokens(text)))
+            return _completion(model, text)
+
+        def chunks():
+            time.sleep(FAKE_LLM_FIRST_TOKEN_DELAY)
+            for piece in _tokens(text):
+                yield _chunk(model, piece)
+                time.sleep(FAKE_LLM_TOKEN_DELAY)
+            yield _chunk(model, None)
+
+        return chunks()
+
+
+class FakeAsyncClient:
+    """Stands in for AsyncGroq: same call shape, canned answers, no network."""
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=_AsyncCompletions())
+
+    async def close(self):
+        pass
+
+
+class FakeClient:
+    """Stands in for Groq: same call shape, canned answers, no network."""
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=_Completions())
+
+    def close(self):
+        pass
@@ -0,0 +1,164 @@
+import bisect
+import threading
+
+# -------------------------------
+# MINIMAL PROMETHEUS METRICS
+# -------------------------------
+# Counters and histograms with labels, rendered in the Prometheus text
+# exposition format by /metrics. Values are per process: with several
+# uvicorn workers, scrape each one (or let Prometheus sum the series).
+
+# seconds; covers sub-ms cache hits up to LLM calls near their timeout
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+_registry = []
+_registry_lock = threading.Lock()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series = {}
+        with _registry_lock:
+            _registry.append(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = sorted(self._series.items())
+        for key, value in series:
+            lines.extend(self._render_series(key, value))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._series.get(self._key(labels), 0)
+
+    def _render_series(self, key, value):
+        yield f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # per-bucket (non-cumulative) counts, then sum and count
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            i = bisect.bisect_left(self.buckets, value)
+            if i < len(self.buckets):
+                series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels):
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def _render_series(self, key, value):
+        counts, total, count = value
+        cumulative = 0
+        for bound, n in zip(self.buckets, counts):
+            cumulative += n
+            le = _labels(self.labelnames, key, ['le="%s"' % _number(float(bound))])
+            yield f"{self.name}_bucket{le} {cumulative}"
+        le = _labels(self.labelnames, key, ['le="+Inf"'])
+        yield f"{self.name}_bucket{le} {count}"
+        yield f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}"
+        yield f"{self.name}_count{_labels(self.labelnames, key)} {count}"
+
+
+def render() -> str:
+    with _registry_lock:
+        metrics = list(_registry)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# -------------------------------
+# APPLICATION METRICS
+# -------------------------------
+http_requests = Counter(
+    "http_requests_total", "HTTP requests by route template, method and status", ["route", "method", "status"]
+)
+http_latency = Histogram(
+    "http_request_duration_seconds", "Time to response start by route template and method", ["route", "method"]
+)
+
+llm_requests = Counter(
+    "llm_requests_total", "Upstream completion requests by model and outcome (ok/error/cancelled)", ["model", "outcome"]
+)
+llm_latency = Histogram("llm_request_duration_seconds", "Upstream completion latency by model", ["model"])
+llm_tokens = Counter("llm_tokens_total", "Tokens reported by completion responses", ["model", "kind"])
+llm_answers = Counter(
+    "llm_answers_total", "LLM-backed answers by route and the path that produced them", ["route", "source"]
+)
+
+password_hash_latency = Histogram(
+    "password_hash_duration_seconds", "bcrypt hash/verify time including queueing", ["op"]
+)
+password_rejected = Counter("password_pool_rejected_total", "bcrypt jobs refused because the queue was full")
+
+db_checkout_hold = Histogram(
+    "db_connection_hold_seconds", "How long a pooled DB connection stays checked out"
+)
+db_checkout_wait = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for (or opening) a pooled DB connection"
+)
+db_query_latency = Histogram(
+    "db_query_duration_seconds", "SQL statement execution time by statement kind", ["kind"]
+)
+db_slow_queries = Counter("db_slow_queries_total", "Statements slower than DB_SLOW_QUERY_MS")
+
+store_commit_latency = Histogram(
+    "checkin_store_commit_seconds", "Check-in store group commit time (one fsync)"
+)
+store_commit_ops = Histogram(
+    "checkin_store_commit_ops", "Operations per check-in store group commit",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
@@ -0,0 +1,75 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from . import metrics, security
+
+# -------------------------------
+# SETTINGS
+# -------------------------------
+# bcrypt is CPU-bound and deliberately slow; it runs in its own process
+# pool so a login burst cannot starve the threadpool that serves chat and
+# check-ins. PASSWORD_WORKERS=0 runs it on the shared threadpool instead.
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+PASSWORD_QUEUE_SIZE = int(os.getenv("PASSWORD_QUEUE_SIZE", "64"))   # running + waiting
+PASSWORD_RETRY_AFTER = int(os.getenv("PASSWORD_RETRY_AFTER", "2"))  # seconds
+
+_pool = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(PASSWORD_QUEUE_SIZE)
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=PASSWORD_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _pool
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def _run(fn, *args):
+    # bounded queue: refuse instead of piling up unbounded work
+    if not _slots.acquire(blocking=False):
+        metrics.password_rejected.inc()
+        raise HTTPException(
+            status_code=503,
+            detail="Server busy, please retry shortly",
+            headers={"Retry-After": str(PASSWORD_RETRY_AFTER)},
+        )
+    started = time.perf_counter()
+    try:
+        if PASSWORD_WORKERS <= 0:
+            return await run_in_threadpool(fn, *args)
+        return await asyncio.wrap_future(_get_pool().submit(fn, *args))
+    finally:
+        _slots.release()
+        metrics.password_hash_latency.observe(time.perf_counter() - started, op=fn.__name__)
+
+
+# -------------------------------
+# ASYNC API
+# -------------------------------
+async def hash_password(password: str) -> str:
+    return await _run(security.hash_password, password)
+
+
+async def verify_and_update(plain_password: str, hashed_password: str):
+    """(ok, new_hash_or_None) — see security.verify_and_update."""
+    return await _run(security.verify_and_update, plain_password, hashed_password)
@@ -0,0 +1,201 @@
+import asyncio
+import contextvars
+import os
+import sqlite3
+import threading
+import time
+
+from . import llm
+
+# -------------------------------
+# SETTINGS
+# -------------------------------
+# "memory": buckets live in this process (one uvicorn worker, or limits per worker)
+# "sqlite": buckets live in RATE_LIMIT_DB, shared by every worker on the host
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_DB = os.getenv("RATE_LIMIT_DB", "ratelimit.db")
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+
+
+def _limit(name: str, default: str):
+    """'burst/seconds' -> (capacity, tokens refilled per second)."""
+    burst, period = os.getenv(name, default).split("/")
+    return float(burst), float(burst) / float(period)
+
+
+# Requests per user and route: a burst of N, refilled over the period.
+ROUTE_LIMITS = {
+    "chat": _limit("RATE_LIMIT_CHAT", "20/60"),
+    "analyze": _limit("RATE_LIMIT_ANALYZE", "10/60"),
+    "checkin": _limit("RATE_LIMIT_CHECKIN", "10/60"),
+}
+# LLM tokens (prompt + completion, from the responses' usage) per user.
+LLM_TOKEN_QUOTA = _limit("LLM_TOKEN_QUOTA", "60000/3600")
+
+
+# -------------------------------
+# BUCKET STATE STORES
+# -------------------------------
+def _refill(tokens, updated, capacity, rate, now):
+    return min(capacity, tokens + (now - updated) * rate)
+
+
+def _decide(tokens, capacity, rate, cost, force):
+    """(new level, retry-after seconds or 0)"""
+    if force or tokens >= cost:
+        return tokens - cost, 0.0
+    return tokens, (cost - tokens) / rate if rate > 0 else float("inf")
+
+
+class MemoryBucketStore:
+    """Token buckets in a dict; limits hold per process."""
+
+    blocking = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}      # key -> (tokens, updated)
+
+    def take(self, key, capacity, rate, cost=1.0, force=False, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens, retry = _decide(_refill(tokens, updated, capacity, rate, now), capacity, rate, cost, force)
+            self._buckets[key] = (tokens, now)
+        return retry
+
+    def level(self, key, capacity, rate, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+        return _refill(tokens, updated, capacity, rate, now)
+
+
+class SqliteBucketStore:
+    """
+    Token buckets in a small SQLite file, so every worker process sees the
+    same levels. Each take is one short IMMEDIATE transaction (WAL mode).
+    """
+
+    blocking = True
+
+    def __init__(self, path=RATE_LIMIT_DB):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def _conn(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def take(self, key, capacity, rate, cost=1.0, force=False, now=None):
+        now = time.time() if now is None else now
+        db = self._conn()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens, retry = _decide(_refill(tokens, updated, capacity, rate, now), capacity, rate, cost, force)
+            db.execute(
+                "INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (key, tokens, now),
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return retry
+
+    def level(self, key, capacity, rate, now=None):
+        now = time.time() if now is None else now
+        row = self._conn().execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+        return capacity if row is None else _refill(row[0], row[1], capacity, rate, now)
+
+
+def make_store(backend=RATE_LIMIT_BACKEND):
+    if backend == "sqlite":
+        return SqliteBucketStore(RATE_LIMIT_DB)
+    return MemoryBucketStore()
+
+
+store = make_store()
+
+
+# -------------------------------
+# LIMITS
+# -------------------------------
+# The user an LLM call is made for; set by the rate-limit dependency so
+# token usage can be charged without threading user ids through routes.
+llm_caller = contextvars.ContextVar("llm_caller", default=None)
+
+
+def check(user_id, route: str) -> float:
+    """
+    Spend one request from the user's bucket for `route`, unless they are
+    out of requests or LLM tokens. Returns 0 if allowed, else the number
+    of seconds to wait.
+    """
+    if not RATE_LIMIT_ENABLED:
+        return 0.0
+
+    capacity, rate = LLM_TOKEN_QUOTA
+    level = store.level(f"llm:{user_id}", capacity, rate)
+    if level <= 0:
+        return -level / rate if rate > 0 else float("inf")
+
+    capacity, rate = ROUTE_LIMITS[route]
+    return store.take(f"{route}:{user_id}", capacity, rate)
+
+
+def charge_tokens(user_id, tokens: int):
+    """Deduct LLM tokens already spent (may drive the quota below zero)."""
+    if RATE_LIMIT_ENABLED and user_id is not None and tokens:
+        capacity, rate = LLM_TOKEN_QUOTA
+        store.take(f"llm:{user_id}", capacity, rate, cost=tokens, force=True)
+
+
+def usage(user_id):
+    """Remaining requests per route and LLM tokens for a user."""
+    remaining = {
+        route: int(store.level(f"{route}:{user_id}", *limit))
+        for route, limit in ROUTE_LIMITS.items()
+    }
+    remaining["llm_tokens"] = int(store.level(f"llm:{user_id}", *LLM_TOKEN_QUOTA))
+    return remaining
+
+
+def _charge_caller(usage):
+    """Charge the tokens of a completion to the user it was made for."""
+    user_id = llm_caller.get()
+    tokens = getattr(usage, "total_tokens", 0) if usage is not None else 0
+    if user_id is None or not tokens:
+        return
+    if store.blocking:
+        # keep the SQLite write off the event loop
+        asyncio.get_running_loop().run_in_executor(None, charge_tokens, user_id, tokens)
+    else:
+        charge_tokens(user_id, tokens)
+
+
+def _charge_usage(model, seconds, usage, error):
+    """llm completion hook: the caller whose request went upstream pays."""
+    _charge_caller(usage)
+
+
+def _charge_shared(model, usage):
+    """llm shared hook: a coalesced caller pays for the answer it was handed too."""
+    _charge_caller(usage)
+
+
+llm.completion_hooks.append(_charge_usage)
+llm.shared_hooks.append(_charge_shared)
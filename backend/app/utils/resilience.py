@@ -0,0 +1,159 @@
+import asyncio
+import os
+import threading
+import time
+from collections import Counter
+
+from . import llm, metrics
+
+# -------------------------------
+# SETTINGS
+# -------------------------------
+# Breaker: after LLM_BREAKER_FAILURES consecutive failed or slow calls the
+# upstream is skipped (fallback answers only) for LLM_BREAKER_RESET seconds,
+# then a single trial call decides whether to close it again.
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_SLOW_CALL = float(os.getenv("LLM_BREAKER_SLOW_CALL", "10"))   # seconds
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", "30"))           # seconds
+# Hedging: if the first request has not answered after this many seconds,
+# send a second identical one and take whichever finishes first (0 = off).
+LLM_HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER", "0"))
+
+# Which path answered, sent back in the X-LLM-Source header:
+#   llm                 first upstream request
+#   llm-hedge           the hedged second request won
+#   cache               cached LLM answer (analyze)
+#   fallback-budget     upstream missed the route's latency budget
+#   fallback-error      upstream failed or returned something unusable
+#   fallback-circuit    breaker open, upstream not called
+#   fallback-unconfigured  no LLM client configured
+SOURCE_HEADER = "X-LLM-Source"
+
+
+# -------------------------------
+# CIRCUIT BREAKER
+# -------------------------------
+class CircuitBreaker:
+    """closed -> open after repeated failures -> half-open trial -> closed/open."""
+
+    def __init__(self, failures=LLM_BREAKER_FAILURES, slow_call=LLM_BREAKER_SLOW_CALL,
+                 reset_after=LLM_BREAKER_RESET, clock=time.monotonic):
+        self.failure_threshold = failures
+        self.slow_call = slow_call
+        self.reset_after = reset_after
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = "closed"
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._trial_at = 0.0
+
+    def allow(self) -> bool:
+        """May a request go upstream now?"""
+        with self._lock:
+            now = self._clock()
+            if self.state == "closed":
+                return True
+            if self.state == "open" and now - self._opened_at < self.reset_after:
+                return False
+            # half-open: one trial at a time (a trial that never reported
+            # back, e.g. cancelled, is replaced after reset_after)
+            if self.state == "half-open" and now - self._trial_at < self.reset_after:
+                return False
+            self.state = "half-open"
+            self._trial_at = now
+            return True
+
+    def record(self, ok: bool, latency: float):
+        with self._lock:
+            if ok and latency <= self.slow_call:
+                self.state = "closed"
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == "half-open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.opened += 1
+                self.state = "open"
+                self._opened_at = self._clock()
+
+    def abandon(self):
+        """An allowed call ended without a verdict (the client went away): let the next trial go."""
+        with self._lock:
+            if self.state == "half-open":
+                self._trial_at = self._clock() - self.reset_after
+
+    def snapshot(self):
+        return {"state": self.state, "consecutive_failures": self.failures, "times_opened": self.opened}
+
+
+breaker = CircuitBreaker()
+sources = Counter()     # "route:source" -> responses
+
+
+def snapshot():
+    return {"breaker": breaker.snapshot(), "sources": dict(sources)}
+
+
+# -------------------------------
+# BUDGETED, HEDGED CALL
+# -------------------------------
+def count_answer(route, source):
+    sources[f"{route}:{source}"] += 1
+    metrics.llm_answers.inc(route=route, source=source)
+
+
+def _answered(route, source, result):
+    count_answer(route, source)
+    return result, source
+
+
+async def call_llm(route: str, call, fallback):
+    """
+    Answer for an LLM-backed route within llm.LATENCY_BUDGETS[route].
+
+    `call(client)` is a coroutine function doing the request *and* parsing
+    its result (a parse error counts as an upstream failure); `fallback()`
+    builds the local answer. Returns (result, source), see SOURCE_HEADER.
+    """
+    client = llm.get_async_client()
+    if client is None:
+        return _answered(route, "fallback-unconfigured", fallback())
+    if not breaker.allow():
+        return _answered(route, "fallback-circuit", fallback())
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    deadline = started + llm.LATENCY_BUDGETS[route]
+    hedge_at = started + LLM_HEDGE_AFTER if LLM_HEDGE_AFTER > 0 else None
+
+    primary = asyncio.ensure_future(call(client))
+    pending = {primary}
+    hedge = None
+    try:
+        while pending:
+            wake = deadline if hedge is not None or hedge_at is None else min(deadline, hedge_at)
+            done, pending = await asyncio.wait(
+                pending, timeout=max(0.0, wake - loop.time()), return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    breaker.record(True, loop.time() - started)
+                    return _answered(route, "llm" if task is primary else "llm-hedge", task.result())
+                print(f"LLM {route} error:", repr(task.exception()))
+
+            if loop.time() >= deadline:
+                breaker.record(False, loop.time() - started)
+                return _answered(route, "fallback-budget", fallback())
+            if not done and hedge is None:
+                # a hedge bypasses request coalescing, or it would just join the first call
+                hedge = asyncio.ensure_future(call(getattr(client, "direct", client)))
+                pending.add(hedge)
+
+        breaker.record(False, loop.time() - started)
+        return _answered(route, "fallback-error", fallback())
+    finally:
+        for task in (primary, hedge):
+            if task is not None and not task.done():
+                task.cancel()
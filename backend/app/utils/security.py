@@ -1,10 +1,29 @@
-from datetime import datetime, timedelta
+import os
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Optional
-from jose import jwt
-from passlib.context import CryptContext
+from fastapi import HTTPException
 
 # bcrypt configuration
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto",bcrypt__ident = "2b")
+# BCRYPT_ROUNDS is the cost factor (2^rounds iterations). Hashes made with
+# any other cost are flagged for update and re-hashed on the next login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+
+# passlib and python-jose are imported on first use, not at app import
+# (hashing mostly happens in the password pool's worker processes)
+@lru_cache(maxsize=None)
+def pwd_context():
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__ident="2b",
+        bcrypt__default_rounds=BCRYPT_ROUNDS,
+        bcrypt__min_rounds=BCRYPT_ROUNDS,
+        bcrypt__max_rounds=BCRYPT_ROUNDS,
+    )
 
 # JWT secret & settings
 SECRET_KEY = "supersecretkey123"     # <-- you will later move this into .env
@@ -24,13 +43,22 @@ def hash_password(password: str) -> str:
     # bcrypt max: 72 bytes
     password = password[:72]
 
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a user's password."""
     plain_password = str(plain_password)[:72]
-    return pwd_context.verify(plain_password, hashed_password)
+    return pwd_context().verify(plain_password, hashed_password)
+
+
+def verify_and_update(plain_password: str, hashed_password: str):
+    """
+    Verify a password; if the stored hash uses an outdated cost, also
+    return a new hash to store. Returns (ok, new_hash_or_None).
+    """
+    plain_password = str(plain_password)[:72]
+    return pwd_context().verify_and_update(plain_password, hashed_password)
 
 
 # -------------------------------
@@ -39,17 +67,21 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def create_access_token(data: dict, expires_delta: Optional[int] = None):
     """Generate a JWT token."""
+    from jose import jwt
+
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(
+    now = datetime.utcnow()
+    expire = now + timedelta(
         minutes=expires_delta or ACCESS_TOKEN_EXPIRE_MINUTES
     )
-    to_encode.update({"exp": expire})
+    issued = now.replace(tzinfo=timezone.utc).timestamp()
+    # iat_ms: profile changes are compared at ms precision (see user_cache.py)
+    to_encode.update({"exp": expire, "iat": int(issued), "iat_ms": int(issued * 1000)})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-from jose import JWTError, jwt
-from fastapi import HTTPException
-
 def decode_access_token(token: str):
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
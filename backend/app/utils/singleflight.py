@@ -0,0 +1,71 @@
+import asyncio
+import hashlib
+import json
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent async calls with the same key: the first caller
+    (the leader) starts the call, everyone arriving while it is in flight
+    awaits the same result or exception. Nothing is cached once it finishes.
+
+    A caller that is cancelled (e.g. by its own asyncio.wait_for budget)
+    just stops waiting; the shared call is only cancelled when no caller is
+    left waiting for it. Use from one event loop.
+    """
+
+    def __init__(self):
+        self._inflight = {}     # key -> [task, waiters]
+        self.calls = 0
+        self.upstream = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    async def do(self, key, fn, timeout: float | None = None):
+        """Result of `await fn()`, shared with identical in-flight calls."""
+        self.calls += 1
+        entry = self._inflight.get(key)
+        if entry is None:
+            self.upstream += 1
+            task = asyncio.ensure_future(fn())
+            entry = self._inflight[key] = [task, 0]
+            task.add_done_callback(lambda t, key=key: self._done(key, t))
+        else:
+            self.coalesced += 1
+
+        task = entry[0]
+        entry[1] += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and not task.done():
+                # nobody is waiting any more: drop it so a later caller starts afresh
+                if self._inflight.get(key) is entry:
+                    del self._inflight[key]
+                task.cancel()
+
+    def _done(self, key, task):
+        entry = self._inflight.get(key)
+        if entry is not None and entry[0] is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    def in_flight(self):
+        return len(self._inflight)
+
+    def snapshot(self):
+        return {
+            "calls": self.calls,
+            "upstream_calls": self.upstream,
+            "coalesced_calls": self.coalesced,
+            "upstream_errors": self.errors,
+            "in_flight": self.in_flight(),
+        }
+
+
+def request_key(**params) -> str:
+    """Stable key for a request: same model, messages and parameters -> same key."""
+    blob = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
@@ -0,0 +1,108 @@
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from .cache import TTLCache
+from .security import ACCESS_TOKEN_EXPIRE_MINUTES
+
+# -------------------------------
+# SETTINGS
+# -------------------------------
+# "stateless": build the user from verified token claims, DB only on a miss
+# "db":        look the user up on every request (old behaviour)
+AUTH_MODE = os.getenv("AUTH_MODE", "stateless")
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "300"))
+
+
+# -------------------------------
+# REQUEST USER
+# -------------------------------
+@dataclass(frozen=True)
+class CurrentUser:
+    """What protected routes need to know about the caller."""
+    id: int
+    email: str
+    full_name: str | None = None
+    username: str | None = None
+    created_at: datetime | None = None
+
+    @classmethod
+    def from_model(cls, user):
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            username=user.username,
+            created_at=user.created_at,
+        )
+
+    @classmethod
+    def from_claims(cls, payload: dict):
+        """None unless the token carries the full profile (newer tokens do)."""
+        if "uid" not in payload or "name" not in payload:
+            return None
+        created = payload.get("created")
+        return cls(
+            id=payload["uid"],
+            email=payload["sub"],
+            full_name=payload.get("name"),
+            username=payload.get("username"),
+            created_at=datetime.fromisoformat(created) if created else None,
+        )
+
+
+def user_claims(user) -> dict:
+    """JWT claims for a user: enough to serve requests without a DB lookup."""
+    return {
+        "sub": user.email,
+        "uid": user.id,
+        "name": user.full_name,
+        "username": user.username,
+        "created": user.created_at.isoformat() if user.created_at else None,
+    }
+
+
+# -------------------------------
+# CACHE + INVALIDATION
+# -------------------------------
+# Fresh profiles by user id (filled on DB lookups and profile updates).
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+# user id -> time of last profile change (ms). Tokens issued before then carry
+# stale claims, so they go to the cache/DB instead; kept for a token lifetime,
+# or less if more than USER_CACHE_SIZE users change their profile in that time
+# (an evicted entry means this worker trusts the old tokens' claims again).
+_changed_at = TTLCache(maxsize=USER_CACHE_SIZE, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+
+def issued_at_ms(payload: dict):
+    """When a token was issued, in ms: `iat_ms`, or whole-second `iat` on older tokens."""
+    if "iat_ms" in payload:
+        return payload["iat_ms"]
+    return payload["iat"] * 1000 if "iat" in payload else None
+
+
+def claims_are_stale(uid: int, issued_at_ms) -> bool:
+    """
+    True if the user's profile changed after the token was issued. The
+    token handed back by the change itself (same millisecond) is fresh.
+    """
+    changed = _changed_at.get(uid)
+    return changed is not None and (issued_at_ms is None or issued_at_ms < changed)
+
+
+def invalidate_user(uid: int):
+    """
+    Forget a user's cached profile and distrust claims issued before now.
+
+    Per worker only: nothing is shared between processes. Another worker
+    serves its cached profile for up to USER_CACHE_TTL and, after that (or
+    with nothing cached), trusts the old token's claims until the token
+    expires (ACCESS_TOKEN_EXPIRE_MINUTES). Stale profile claims can
+    therefore outlive a change by a full token lifetime. Use AUTH_MODE=db
+    where a profile change must show up on every worker at once.
+    """
+    user_cache.pop(uid)
+    _changed_at.put(uid, int(time.time() * 1000))
@@ -0,0 +1,43 @@
+"""
+Move old check-ins from the append-only log into the columnar archive.
+
+Usage (from backend/):
+    python -m scripts.archive_checkins [--days 180]
+
+Check-ins older than --days (default CHECKIN_ARCHIVE_AFTER_DAYS, else 180)
+are written to <log>.archive and dropped from the log; rows deleted since
+the last run are dropped from the archive. Safe to run while the API is up:
+it takes the same file lock as the writers, and other workers reload both
+files when they see the log was rewritten.
+"""
+import argparse
+import os
+import time
+
+from app.utils.checkin_store import ARCHIVE_AFTER_DAYS, LOG_FILE, CheckinStore, archive_cutoff
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS or 180)
+    args = parser.parse_args()
+    if args.days < 1:
+        parser.error("--days must be at least 1")
+
+    store = CheckinStore(LOG_FILE)
+    log_before = os.path.getsize(LOG_FILE)
+    cutoff = archive_cutoff(args.days)
+
+    started = time.perf_counter()
+    moved = store.archive(cutoff)
+    elapsed = time.perf_counter() - started
+    store.close()
+
+    archive_size = os.path.getsize(store.archive_path) if os.path.exists(store.archive_path) else 0
+    print(f"Archived {moved} check-ins older than {cutoff} in {elapsed:.2f}s")
+    print(f"{LOG_FILE}: {log_before} -> {os.path.getsize(LOG_FILE)} bytes; "
+          f"{store.archive_path}: {archive_size} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Auth DB benchmark: concurrent /auth/me throughput with the sync session
+(queries in the threadpool) and with the AsyncSession (DB_ASYNC=1).
+
+Usage (from backend/):
+    python -m scripts.bench_auth_db [--requests 2000] [--concurrency 50] [--modes sync async]
+
+Each mode runs in its own process, since DB_ASYNC is read at import time,
+against a throwaway SQLite file (or --database-url, e.g. a PostgreSQL test
+database). AUTH_MODE=db, so every request looks the user up. The async mode
+needs aiosqlite (SQLite) or asyncpg (PostgreSQL) installed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_EMAIL = "bench-auth-db@example.com"
+
+
+def _child(args):
+    import httpx
+
+    from app.database import Base, SessionLocal, engine
+    from app.main import app
+    from app import models
+    from app.utils.security import create_access_token
+    from app.utils.user_cache import user_claims
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        user = db.query(models.User).filter(models.User.email == BENCH_EMAIL).first()
+        if user is None:
+            # never used to log in, so no need to pay for a real bcrypt hash
+            user = models.User(email=BENCH_EMAIL, hashed_password="x", full_name="Bench", username="bench")
+            db.add(user)
+            db.commit()
+            db.refresh(user)
+        token = create_access_token(user_claims(user))
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        latencies = []
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            remaining = iter(range(args.requests))
+
+            async def worker():
+                for _ in remaining:
+                    started = time.perf_counter()
+                    r = await client.get("/auth/me", headers=headers)
+                    latencies.append(time.perf_counter() - started)
+                    assert r.status_code == 200, r.text
+
+            await asyncio.gather(*(worker() for _ in range(5)))    # warm up the pool
+            latencies.clear()
+            remaining = iter(range(args.requests))
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - started
+        return elapsed, latencies
+
+    elapsed, latencies = asyncio.run(run())
+    latencies.sort()
+    print(json.dumps({
+        "rps": args.requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--modes", nargs="+", choices=["sync", "async"], default=["sync", "async"])
+    parser.add_argument("--database-url")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return _child(args)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        print(f"{args.requests} GET /auth/me, {args.concurrency} concurrent, {url.split('://')[0]}")
+        print(f"{'mode':>6} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+        for mode in args.modes:
+            env = dict(
+                os.environ,
+                DATABASE_URL=url,
+                DB_ASYNC="1" if mode == "async" else "0",
+                AUTH_MODE="db",
+                RATE_LIMIT_ENABLED="0",
+            )
+            out = subprocess.run(
+                [sys.executable, "-m", "scripts.bench_auth_db", "--child",
+                 "--requests", str(args.requests), "--concurrency", str(args.concurrency)],
+                env=env, capture_output=True, text=True,
+            )
+            if out.returncode != 0:
+                print(f"{mode:>6} failed:\n{out.stderr.strip()}")
+                continue
+            result = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{mode:>6} {result['rps']:>9.0f} {result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
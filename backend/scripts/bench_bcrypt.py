@@ -0,0 +1,51 @@
+"""
+bcrypt microbenchmark: hashes per second at each cost factor.
+
+Usage (from backend/):
+    python -m scripts.bench_bcrypt [--rounds 10 11 12 13] [--hashes 20] [--workers 4]
+
+For every cost it times a single thread hashing back to back, then the same
+number of hashes spread over a process pool of --workers processes (what the
+password pool does in the API). Use it to pick BCRYPT_ROUNDS and
+PASSWORD_WORKERS for the login rate you need.
+"""
+import argparse
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from passlib.hash import bcrypt
+
+
+def _hash(rounds):
+    return bcrypt.using(rounds=rounds, ident="2b").hash("benchmark-password")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 11, 12, 13])
+    parser.add_argument("--hashes", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(args.workers, mp_context=ctx) as pool:
+        list(pool.map(_hash, [4] * args.workers))   # warm up workers
+
+        print(f"{'rounds':>6} {'ms/hash':>9} {'hash/s (1 thread)':>18} {f'hash/s ({args.workers} procs)':>18}")
+        for rounds in args.rounds:
+            started = time.perf_counter()
+            for _ in range(args.hashes):
+                _hash(rounds)
+            serial = time.perf_counter() - started
+
+            started = time.perf_counter()
+            list(pool.map(_hash, [rounds] * args.hashes))
+            parallel = time.perf_counter() - started
+
+            print(f"{rounds:>6} {serial / args.hashes * 1000:>9.1f} "
+                  f"{args.hashes / serial:>18.1f} {args.hashes / parallel:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Throughput of the heuristic analysis: per-item vs vectorized batch.
+
+Usage (from backend/):
+    python -m scripts.bench_heuristic_batch [--sizes 100 1000 10000 100000]
+
+For each batch size it scores the same random forms with a Python loop
+over heuristic_analysis and with heuristic_analysis_batch, and reports
+forms/s for both, plus the split of the batch time between encoding the
+forms into arrays and the NumPy scoring itself.
+"""
+import argparse
+import random
+import time
+
+from app.routes.analyze import heuristic_analysis, heuristic_analysis_batch
+from app.utils import heuristic_batch
+from scripts.check_heuristic_parity import random_form
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'forms':>7} {'loop forms/s':>13} {'batch forms/s':>14} {'speedup':>8} {'encode ms':>10} {'score ms':>9}")
+    for size in args.sizes:
+        forms = [random_form(rng) for _ in range(size)]
+        loop = timed(lambda: [heuristic_analysis(f) for f in forms])
+        batch = timed(heuristic_analysis_batch, forms)
+        started = time.perf_counter()
+        encoded = heuristic_batch.encode(forms)
+        encode = time.perf_counter() - started
+        score = timed(heuristic_batch.score, encoded)
+        print(f"{size:>7} {size / loop:>13,.0f} {size / batch:>14,.0f} {loop / batch:>7.1f}x "
+              f"{encode * 1e3:>10.1f} {score * 1e3:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
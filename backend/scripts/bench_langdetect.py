@@ -0,0 +1,94 @@
+"""
+Language detection benchmark: accuracy on a labeled set and throughput.
+
+Usage (from backend/):
+    python -m scripts.bench_langdetect [--repeat 2000]
+
+The labeled sentences below are NOT in the detector's training samples.
+Accuracy is reported for the local detector and for the old rule ("any
+Devanagari -> hi, else en"), then single-text and batch throughput.
+"""
+import argparse
+import time
+
+from app.utils import langdetect
+
+LABELED = [
+    ("en", "I feel very low and I can't focus on anything"),
+    ("en", "My heart races whenever I have to speak in class"),
+    ("en", "Could you suggest something to help me relax"),
+    ("en", "I had a fight with my brother and now I feel guilty"),
+    ("en", "I'm okay today, just a bit bored"),
+    ("en", "Why do I always wake up at three in the morning"),
+    ("en", "hi"),
+    ("en", "thanks"),
+    ("hi-Latn", "mujhe bahut akela lag raha hai"),
+    ("hi-Latn", "main raat bhar so nahi paya"),
+    ("hi-Latn", "kya tum meri baat sun sakte ho"),
+    ("hi-Latn", "mere bhai se ladai ho gayi aur ab bura lag raha hai"),
+    ("hi-Latn", "aaj mera mood bilkul theek nahi hai"),
+    ("hi-Latn", "padhai mein mann nahi lagta"),
+    ("hi", "मुझे बहुत अकेलापन लग रहा है"),
+    ("hi", "मैं रात भर सो नहीं पाया"),
+    ("hi", "क्या तुम मेरी बात सुन सकते हो"),
+    ("hi", "मेरे भाई से लड़ाई हो गई और अब बुरा लग रहा है"),
+    ("hi", "आज मेरा मूड बिल्कुल ठीक नहीं है"),
+    ("hi", "पढ़ाई में मन नहीं लगता"),
+    ("mr", "मला खूप एकटं वाटतंय"),
+    ("mr", "मी रात्रभर झोपू शकलो नाही"),
+    ("mr", "तू माझं ऐकशील का"),
+    ("mr", "माझं भावाशी भांडण झालं आणि आता वाईट वाटत आहे"),
+    ("mr", "आज माझा मूड अजिबात चांगला नाही"),
+    ("mr", "अभ्यासात मन लागत नाही"),
+    ("gu", "મને આજે ખૂબ ચિંતા થાય છે"),
+    ("gu", "મને ઊંઘ નથી આવતી"),
+    ("te", "నాకు ఈ రోజు చాలా ఆందోళనగా ఉంది"),
+    ("te", "నాకు నిద్ర రావడం లేదు"),
+]
+
+
+def old_rule(text):
+    if any("\u0900" <= ch <= "\u097F" for ch in text):
+        return "hi"
+    if any("\u0A80" <= ch <= "\u0AFF" for ch in text):
+        return "gu"
+    if any("\u0C00" <= ch <= "\u0C7F" for ch in text):
+        return "te"
+    return "en"
+
+
+def accuracy(predict):
+    misses = [(want, text, predict(text)) for want, text in LABELED if predict(text) != want]
+    return 1 - len(misses) / len(LABELED), misses
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    for label, predict in (("old rule", old_rule), ("langdetect", lambda t: langdetect.detect(t).code)):
+        acc, misses = accuracy(predict)
+        print(f"{label:>10}: accuracy {acc:.1%} ({len(LABELED) - len(misses)}/{len(LABELED)})")
+        if label == "langdetect":
+            for want, text, got in misses:
+                print(f"            miss: want {want}, got {got}: {text}")
+
+    texts = [text for _, text in LABELED] * (args.repeat // len(LABELED) + 1)
+    texts = texts[:args.repeat]
+
+    started = time.perf_counter()
+    for text in texts:
+        langdetect.detect(text)
+    single = time.perf_counter() - started
+
+    started = time.perf_counter()
+    langdetect.detect_batch(texts)
+    batch = time.perf_counter() - started
+
+    print(f"single: {single / len(texts) * 1e6:8.1f} us/text  ({len(texts) / single:,.0f} texts/s)")
+    print(f"batch:  {batch / len(texts) * 1e6:8.1f} us/text  ({len(texts) / batch:,.0f} texts/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Cold-start benchmark: import time per module and time to the first /health.
+
+Usage (from backend/):
+    python -m scripts.bench_startup [--runs 5] [--top 15]
+
+1. Runs `python -X importtime -c "import app.main"` in a fresh interpreter
+   and lists every app.* module plus the heaviest third-party packages
+   (self and cumulative milliseconds, as reported by -X importtime).
+2. Starts `uvicorn app.main:app` --runs times and measures the time from
+   process start until GET /health answers 200 (median and worst).
+
+Needs DATABASE_URL like the app itself; nothing is written to the database.
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+
+def import_times():
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000))
+    return rows
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_first_health(timeout=30.0):
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as r:
+                    if r.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                if server.poll() is not None:
+                    raise RuntimeError("uvicorn exited before answering /health")
+                time.sleep(0.005)
+        raise RuntimeError(f"/health did not answer within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        sys.exit("DATABASE_URL is not set")
+
+    rows = import_times()
+    total = next(cumulative for name, _, cumulative in rows if name == "app.main")
+    print(f"import app.main: {total:.0f} ms\n")
+
+    print(f"{'app module':<32} {'self ms':>8} {'cum ms':>8}")
+    for name, self_ms, cumulative in sorted((r for r in rows if r[0].startswith("app.")), key=lambda r: -r[2]):
+        print(f"{name:<32} {self_ms:>8.1f} {cumulative:>8.1f}")
+
+    print(f"\n{'heaviest packages':<32} {'self ms':>8} {'cum ms':>8}")
+    packages = [r for r in rows if "." not in r[0] and r[0] != "app"]
+    for name, self_ms, cumulative in sorted(packages, key=lambda r: -r[2])[:args.top]:
+        print(f"{name:<32} {self_ms:>8.1f} {cumulative:>8.1f}")
+
+    times = [time_to_first_health() for _ in range(args.runs)]
+    print(f"\nfirst /health after process start ({args.runs} runs): "
+          f"median {statistics.median(times) * 1000:.0f} ms, worst {max(times) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+"""
+Microbenchmarks for the backend's hot functions, with saved baselines.
+
+Usage (from backend/):
+    python -m scripts.bench_suite [--sizes 1000 100000] [--filter store] [--rounds 5]
+    python -m scripts.bench_suite --save baseline.json
+    python -m scripts.bench_suite --compare baseline.json [--threshold 0.15]
+
+Covered: the check-in store (opening/replaying the log, bulk and single
+writes, history pages, dashboard stats, trends) and the same store fully
+archived (open, history page, trends) at each --sizes record count,
+heuristic_analysis (single and batch), language detection on long mixed
+messages, extract_json on large and adversarial model output, JWT
+create/decode and bcrypt hashing (at BCRYPT_ROUNDS).
+
+Every benchmark is timed in --rounds rounds of enough calls to last at least
+--min-time seconds; the median per-call time is what gets compared. With
+--compare, a benchmark more than --threshold slower than the baseline is a
+regression and the exit status is 1. Baselines are machine specific: compare
+runs from the same host. Needs DATABASE_URL (the route modules import the
+database settings); nothing is written to the database.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from fastapi import HTTPException
+
+from app.routes.analyze import SymptomRequest, heuristic_analysis, heuristic_analysis_batch
+from app.routes.checkin import extract_json
+from app.utils import langdetect, security
+from app.utils.checkin_store import CheckinStore
+from app.utils.checkin_trends import compute_trends
+
+BENCHMARKS = []     # (name, setup); setup() returns (fn, teardown or None)
+
+
+def bench(name):
+    def register(setup):
+        BENCHMARKS.append((name, setup))
+        return setup
+    return register
+
+
+# -------------------------------
+# CHECK-IN STORE
+# -------------------------------
+SYMPTOMS = ["anxiety", "insomnia", "panic attacks", "low energy", "irritability", "sadness"]
+RECORDS_PER_USER = 100
+WRITE_CHUNK = 50_000
+
+
+def make_record(rng, user_id, when):
+    form = {
+        "thoughts": "Felt on edge most of the day, could not focus at work",
+        "symptoms": rng.sample(SYMPTOMS, rng.randint(0, 3)),
+        "mood": rng.randint(1, 10),
+        "sleep_hours": rng.choice([4.5, 6.0, 7.5, 8.0]),
+        "stress_level": rng.randint(1, 10),
+        "prediction": None,
+    }
+    return {
+        "user_id": user_id,
+        "timestamp": when.isoformat() + "Z",
+        "title": "Anxiety",
+        "input": form,
+        "prediction": heuristic_analysis(SymptomRequest(
+            text=form["thoughts"], symptoms=form["symptoms"], overall_mood=form["mood"],
+            sleep_hours=form["sleep_hours"], stress_level=form["stress_level"],
+        )),
+    }
+
+
+def make_records(n, seed=0):
+    """n records spread over n / RECORDS_PER_USER users, one a few hours apart."""
+    rng = random.Random(seed)
+    users = max(1, n // RECORDS_PER_USER)
+    start = datetime(2024, 1, 1)
+    for i in range(n):
+        yield make_record(rng, 1 + i % users, start + timedelta(hours=3 * (i // users), seconds=i % users))
+
+
+def build_log(path, n):
+    store = CheckinStore(path)
+    records = make_records(n)
+    next_id = 1
+    while True:
+        chunk = []
+        for rec in records:
+            chunk.append({"id": next_id, **rec})
+            next_id += 1
+            if len(chunk) == WRITE_CHUNK:
+                break
+        if not chunk:
+            break
+        store.import_records(chunk)
+    store.close()
+
+
+def store_benchmarks(sizes, workdir):
+    for n in sizes:
+        path = os.path.join(workdir, f"checkins-{n}.log")
+
+        def opened(path=path, n=n):
+            if not os.path.exists(path):
+                build_log(path, n)
+            return CheckinStore(path)
+
+        @bench(f"store.open[{n}]")
+        def open_log(path=path, n=n):
+            opened(path, n).close()
+
+            def run():
+                CheckinStore(path).close()
+            return run, None
+
+        @bench(f"store.add_many[{n}]")
+        def add_many(n=n):
+            records = list(make_records(n, seed=1))
+            scratch = os.path.join(workdir, "scratch.log")
+
+            def run():
+                for suffix in ("", ".lock"):
+                    if os.path.exists(scratch + suffix):
+                        os.remove(scratch + suffix)
+                store = CheckinStore(scratch)
+                store.add_many(records)
+                store.close()
+            return run, None
+
+        @bench(f"store.add[{n}]")
+        def add_one(path=path, n=n):
+            # on a copy, so the shared log keeps exactly n records
+            copy = os.path.join(workdir, "copy.log")
+            opened(path, n).close()
+            shutil.copyfile(path, copy)
+            store = CheckinStore(copy)
+            record = next(make_records(1, seed=2))
+            return (lambda: store.add(record)), store.close
+
+        @bench(f"store.get_history[{n}]")
+        def history(path=path, n=n):
+            store = opened(path, n)
+            return (lambda: store.user_page(1)), store.close
+
+        @bench(f"store.get_history_page[{n}]")
+        def history_page(path=path, n=n):
+            store = opened(path, n)
+            return (lambda: store.user_page(1, limit=20)), store.close
+
+        @bench(f"store.get_stats[{n}]")
+        def stats(path=path, n=n):
+            store = opened(path, n)
+            today = date(2024, 6, 1)
+            return (lambda: store.user_stats(1).as_dict(today)), store.close
+
+        @bench(f"store.get_trends[{n}]")
+        def trends(path=path, n=n):
+            store = opened(path, n)
+            today = date(2024, 6, 1)
+            return (lambda: compute_trends(store.user_series(1), today)), store.close
+
+        # the same records, all moved into the columnar archive
+        archived_path = os.path.join(workdir, f"archived-{n}.log")
+
+        def archived(path=path, n=n, archived_path=archived_path):
+            if not os.path.exists(archived_path):
+                opened(path, n).close()
+                shutil.copyfile(path, archived_path)
+                store = CheckinStore(archived_path)
+                store.archive("9999")
+                store.close()
+            return CheckinStore(archived_path)
+
+        @bench(f"archive.open[{n}]")
+        def open_archived(archived=archived):
+            archived().close()
+            return (lambda: archived().close()), None
+
+        @bench(f"archive.get_history_page[{n}]")
+        def archived_page(archived=archived):
+            store = archived()
+            return (lambda: store.user_page(1, limit=20)), store.close
+
+        @bench(f"archive.get_trends[{n}]")
+        def archived_trends(archived=archived):
+            store = archived()
+            today = date(2024, 6, 1)
+            return (lambda: compute_trends(store.user_series(1), today)), store.close
+
+
+# -------------------------------
+# ANALYSIS, LANGUAGE, PARSING, AUTH
+# -------------------------------
+FORM = SymptomRequest(
+    text="Racing thoughts at night and I keep checking my phone",
+    symptoms=["Anxiety", "Insomnia", "panic attacks"],
+    overall_mood=4, sleep_hours=5.5, stress_level=7,
+)
+
+
+@bench("heuristic_analysis")
+def heuristic_single():
+    return (lambda: heuristic_analysis(FORM)), None
+
+
+@bench("heuristic_analysis_batch[1000]")
+def heuristic_batch_1000():
+    rng = random.Random(3)
+    forms = [
+        SymptomRequest(text="x", symptoms=rng.sample(SYMPTOMS, rng.randint(0, 3)),
+                       overall_mood=rng.randint(1, 10), stress_level=rng.randint(1, 10))
+        for _ in range(1000)
+    ]
+    return (lambda: heuristic_analysis_batch(forms)), None
+
+
+MIXED_MESSAGE = " ".join([
+    "I have been feeling really low since the exams started and I can't sleep properly.",
+    "मुझे बहुत घबराहट होती है और रात को नींद नहीं आती।",
+    "kabhi kabhi lagta hai ki koi meri baat nahi samajhta.",
+    "मला खूप एकटं वाटतं आणि काहीच करावंसं वाटत नाही.",
+] * 12)
+
+
+@bench("detect_language[short]")
+def detect_short():
+    return (lambda: langdetect.detect("mujhe neend nahi aati")), None
+
+
+@bench(f"detect_language[mixed {len(MIXED_MESSAGE)} chars]")
+def detect_long():
+    return (lambda: langdetect.detect(MIXED_MESSAGE)), None
+
+
+def model_output(items):
+    body = json.dumps({
+        "predicted_disorder": "Anxiety",
+        "confidence_score": 0.72,
+        "severity_level": "moderate",
+        "recommendations": "; ".join(f"step {i}: breathe slowly and write down the worry" for i in range(items)),
+        "next_steps": "Track symptoms for a week",
+        "emergency_contact_suggested": False,
+    })
+    return f"Sure! Here is the analysis:\n```json\n{body}\n```\nTake care."
+
+
+@bench("extract_json[small]")
+def extract_small():
+    text = model_output(3)
+    return (lambda: extract_json(text)), None
+
+
+@bench("extract_json[200KB]")
+def extract_large():
+    text = model_output(4000)
+    return (lambda: extract_json(text)), None
+
+
+@bench("extract_json[adversarial 5000 braces]")
+def extract_adversarial():
+    # unbalanced braces and no closing one: the greedy regex retries from every "{"
+    text = "{ " * 5000
+
+    def run():
+        try:
+            extract_json(text)
+        except HTTPException:
+            pass
+    return run, None
+
+
+CLAIMS = {"sub": "bench@example.com", "uid": 1, "name": "Bench", "username": "bench", "created": None}
+
+
+@bench("create_access_token")
+def create_token():
+    return (lambda: security.create_access_token(CLAIMS)), None
+
+
+@bench("decode_access_token")
+def decode_token():
+    token = security.create_access_token(CLAIMS)
+    return (lambda: security.decode_access_token(token)), None
+
+
+@bench(f"hash_password[rounds={security.BCRYPT_ROUNDS}]")
+def hash_password():
+    return (lambda: security.hash_password("benchmark-password")), None
+
+
+# -------------------------------
+# RUNNER
+# -------------------------------
+def measure(fn, rounds, min_time):
+    fn()    # warm up (imports, caches)
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        loops = max(loops * 2, int(loops * min_time / max(elapsed, 1e-9)))
+
+    per_call = [elapsed / loops]
+    for _ in range(rounds - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        per_call.append((time.perf_counter() - started) / loops)
+    return {
+        "median": statistics.median(per_call),
+        "min": min(per_call),
+        "stdev": statistics.stdev(per_call) if len(per_call) > 1 else 0.0,
+        "loops": loops,
+        "rounds": rounds,
+    }
+
+
+def fmt(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "created": datetime.utcnow().isoformat() + "Z",
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print old vs new medians; returns the names that regressed."""
+    regressed = []
+    print(f"\n{'benchmark':<44} {'baseline':>11} {'now':>11} {'change':>8}")
+    for name, result in results.items():
+        old = baseline["results"].get(name)
+        if old is None:
+            print(f"{name:<44} {'-':>11} {fmt(result['median']):>11} {'new':>8}")
+            continue
+        change = result["median"] / old["median"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressed.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{name:<44} {fmt(old['median']):>11} {fmt(result['median']):>11} {change:>+7.0%}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100_000],
+                        help="check-in store sizes (add 1000000 for the full set)")
+    parser.add_argument("--filter", help="only benchmarks whose name contains this")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05, help="seconds per round, at least")
+    parser.add_argument("--save", help="write results as a JSON baseline")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="relative slowdown counted as a regression")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    workdir = tempfile.mkdtemp(prefix="neuroq-bench-")
+    try:
+        store_benchmarks(args.sizes, workdir)
+        results = {}
+        print(f"{'benchmark':<44} {'median':>11} {'min':>11} {'loops':>7}")
+        for name, setup in BENCHMARKS:
+            if args.filter and args.filter not in name:
+                continue
+            fn, teardown = setup()
+            try:
+                results[name] = measure(fn, args.rounds, args.min_time)
+            finally:
+                if teardown:
+                    teardown()
+            r = results[name]
+            print(f"{name:<44} {fmt(r['median']):>11} {fmt(r['min']):>11} {r['loops']:>7}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"meta": metadata(), "results": results}, f, indent=2)
+        print(f"\nsaved {len(results)} results to {args.save}")
+
+    if baseline is not None:
+        regressed = compare(results, baseline, args.threshold)
+        if regressed:
+            print(f"\n{len(regressed)} regression(s) over {args.threshold:.0%}: {', '.join(regressed)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
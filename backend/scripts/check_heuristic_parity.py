@@ -0,0 +1,73 @@
+"""
+Parity check: the vectorized batch heuristic must answer exactly like the
+scalar one.
+
+Usage (from backend/):
+    python -m scripts.check_heuristic_parity [--forms 20000] [--seed 1]
+
+Scores hand-picked edge cases (missing or zero mood/stress, duplicate and
+mixed-case symptoms, "depression" inside a longer symptom, boundary
+confidences) plus --forms random forms with both
+analyze.heuristic_analysis and analyze.heuristic_analysis_batch and
+compares every field. Exits non-zero on the first mismatch.
+"""
+import argparse
+import random
+import sys
+
+from app.routes.analyze import SymptomRequest, heuristic_analysis, heuristic_analysis_batch
+
+SYMPTOMS = [
+    "Fatigue", "Insomnia", "Panic attacks", "PANIC ATTACKS", "panic attacks ", "Depression",
+    "mild depression", "Loss of appetite", "Irritability", "Racing thoughts", "Headache",
+    "Low energy", "Social withdrawal", "Restlessness", "Hopelessness",
+]
+TEXTS = ["", "fine", "I feel sad", "thoughts of Self-Harm lately", "self harm", "SELF-HARM"]
+
+EDGE_CASES = [
+    SymptomRequest(text=""),
+    SymptomRequest(text="x", symptoms=[], overall_mood=0, stress_level=0),
+    SymptomRequest(text="x", symptoms=["Fatigue"] * 7, overall_mood=None, stress_level=None),
+    SymptomRequest(text="x", symptoms=["Panic attacks"], overall_mood=10, stress_level=1),
+    SymptomRequest(text="x", symptoms=["mild Depression"], overall_mood=6, stress_level=7),
+    SymptomRequest(text="x", symptoms=["Fatigue"], overall_mood=3, stress_level=8),
+    SymptomRequest(text="x", symptoms=["Fatigue"], overall_mood=-2, stress_level=-1),
+    SymptomRequest(text="x", symptoms=["a", "b", "c", "d", "e"], overall_mood=1, stress_level=10),
+    SymptomRequest(text="self-harm", symptoms=["a", "b"], overall_mood=5, stress_level=9),
+]
+
+
+def random_form(rng):
+    return SymptomRequest(
+        text=rng.choice(TEXTS),
+        symptoms=rng.sample(SYMPTOMS, rng.randint(0, 8)),
+        overall_mood=rng.choice([None, 0, *range(1, 11)]),
+        sleep_hours=rng.choice([None, 4.0, 7.5]),
+        stress_level=rng.choice([None, 0, *range(1, 11)]),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--forms", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    forms = EDGE_CASES + [random_form(rng) for _ in range(args.forms)]
+
+    batch = heuristic_analysis_batch(forms)
+    for i, (form, got) in enumerate(zip(forms, batch)):
+        want = heuristic_analysis(form)
+        if got != want:
+            print(f"MISMATCH at {i}: {form!r}\n  scalar: {want}\n  batch:  {got}")
+            sys.exit(1)
+    if heuristic_analysis_batch([]) != []:
+        print("MISMATCH: empty batch")
+        sys.exit(1)
+
+    print(f"ok: {len(forms)} forms identical")
+
+
+if __name__ == "__main__":
+    main()
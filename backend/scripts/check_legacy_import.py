@@ -0,0 +1,133 @@
+"""
+Check: an old checkins.json with duplicate ids imports without losing records.
+
+Usage (from backend/):
+    python -m scripts.check_legacy_import
+
+The old JSON store gave a new check-in the id len(db) + 1, so a file that
+ever had a deletion holds the same id twice. Writes such a file to a temp
+directory, imports it into a fresh log (as get_store() does on first start)
+and migrates it into a fresh SQLite database (as migrate_checkins_to_sql
+does, in small batches), each twice, and checks:
+
+  * every legacy record is present exactly once, ids unique
+  * records whose id was free kept it
+  * re-running the import adds nothing
+
+Exits non-zero if any check fails.
+"""
+import json
+import os
+import sys
+import tempfile
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import Base
+from app.utils.checkin_sql import insert_batch, row_to_record, sync_id_sequence
+from app.utils.checkin_store import CheckinStore, import_legacy_file
+from scripts.migrate_checkins_to_sql import iter_source
+
+# ids as the old store handed them out: 5 records, #2 deleted, then 2 more added
+LEGACY_IDS = [1, 3, 4, 5, 5, 6, 2]
+
+
+def legacy_records():
+    return [
+        {
+            "id": rec_id,
+            "user_id": 1 + n % 2,
+            "timestamp": f"2025-01-{n + 1:02d}T09:00:00.{n + 1:06d}Z",
+            "title": f"legacy {n}",
+            "input": {"thoughts": f"entry {n}", "symptoms": ["Fatigue"], "mood": 5,
+                      "sleep_hours": 7.0, "stress_level": 4},
+            "prediction": {"predicted_disorder": "Anxiety", "severity_level": "mild",
+                           "confidence_score": 0.4, "recommendations": "rest"},
+        }
+        for n, rec_id in enumerate(LEGACY_IDS)
+    ]
+
+
+def content(rec):
+    return json.dumps({**rec, "id": None}, sort_keys=True)
+
+
+def check_log(path, legacy):
+    failures = []
+    store = CheckinStore(os.path.join(os.path.dirname(path), "checkins.log"))
+    try:
+        first = import_legacy_file(store, path)
+        again = import_legacy_file(store, path)
+        ids = store.ids()
+        stored = [store.get(rec_id) for rec_id in ids]
+    finally:
+        store.close()
+
+    if first != len(legacy):
+        failures.append(f"log: imported {first} of {len(legacy)} records")
+    if again:
+        failures.append(f"log: re-running the import added {again} records")
+    if len(ids) != len(set(ids)):
+        failures.append("log: duplicate ids")
+    if sorted(map(content, stored)) != sorted(map(content, legacy)):
+        failures.append("log: stored records differ from the legacy file")
+    kept = {rec["id"] for rec in legacy if LEGACY_IDS.count(rec["id"]) == 1}
+    if not kept <= {rec["id"] for rec in stored}:
+        failures.append("log: a record with a free id did not keep it")
+    return failures
+
+
+def check_sql(path, legacy, batch_size=3):
+    failures = []
+    engine = create_engine(f"sqlite:///{os.path.join(os.path.dirname(path), 'checkins.db')}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add_all(models.User(id=user_id, email=f"user{user_id}@example.com", hashed_password="x")
+                   for user_id in {rec["user_id"] for rec in legacy})
+        db.commit()
+
+        def migrate():
+            inserted, batch = 0, []
+            for record in iter_source(path):
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    inserted += insert_batch(db, batch)
+                    batch = []
+            inserted += insert_batch(db, batch)
+            sync_id_sequence(db)
+            return inserted
+
+        try:
+            first = migrate()
+            again = migrate()
+        except Exception as e:
+            return [f"sql: migration failed: {e!r}"]
+        stored = [row_to_record(row) for row in db.scalars(select(models.CheckIn))]
+
+    if first != len(legacy):
+        failures.append(f"sql: migrated {first} of {len(legacy)} records")
+    if again:
+        failures.append(f"sql: re-running the migration added {again} records")
+    if sorted(map(content, stored)) != sorted(map(content, legacy)):
+        failures.append("sql: stored records differ from the legacy file")
+    return failures
+
+
+def main():
+    legacy = legacy_records()
+    path = os.path.join(tempfile.mkdtemp(prefix="legacy-import-"), "checkins.json")
+    with open(path, "w") as f:
+        json.dump(legacy, f)
+
+    failures = check_log(path, legacy) + check_sql(path, legacy)
+    for f in failures:
+        print("FAIL:", f)
+    if failures:
+        sys.exit(1)
+    print(f"OK: {len(legacy)} legacy records with duplicate ids imported and migrated once each")
+
+
+if __name__ == "__main__":
+    main()
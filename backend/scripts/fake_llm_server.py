@@ -0,0 +1,98 @@
+"""
+Local stand-in for the Groq API: an HTTP server speaking the OpenAI-style
+chat-completions protocol (JSON answers and SSE token streams).
+
+Usage (from backend/):
+    python -m scripts.fake_llm_server [--port 9100]
+
+then run the API against it, through the real SDK and connection pool:
+    GROQ_API_KEY=anything GROQ_BASE_URL=http://127.0.0.1:9100 uvicorn app.main:app
+
+Answers and delays are the ones of LLM_BACKEND=fake (see app/utils/llm_fake.py:
+FAKE_LLM_REPLY, FAKE_LLM_FIRST_TOKEN_DELAY, FAKE_LLM_TOKEN_DELAY).
+FAKE_LLM_ERROR_RATE (0..1) makes that share of requests fail with a 503.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.utils import llm_fake
+
+FAKE_LLM_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+
+app = FastAPI()
+
+
+def _usage(prompt, text):
+    prompt_tokens = sum(len(m.get("content", "").split()) for m in prompt)
+    completion_tokens = len(llm_fake._tokens(text))
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+def _chunk(base, delta, finish_reason=None, **extra):
+    return "data: " + json.dumps({
+        **base,
+        "object": "chat.completion.chunk",
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        **extra,
+    }) + "\n\n"
+
+
+# the SDK's path under GROQ_BASE_URL, plus the plain OpenAI one
+@app.post("/openai/v1/chat/completions")
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    params = await request.json()
+    if FAKE_LLM_ERROR_RATE and random.random() < FAKE_LLM_ERROR_RATE:
+        return JSONResponse({"error": {"message": "fake upstream failure", "type": "server_error"}}, status_code=503)
+
+    messages = params.get("messages", [])
+    text = llm_fake._reply_for(messages)
+    base = {"id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "created": int(time.time()), "model": params.get("model")}
+
+    if not params.get("stream"):
+        pieces = llm_fake._tokens(text)
+        await asyncio.sleep(llm_fake.FAKE_LLM_FIRST_TOKEN_DELAY + llm_fake.FAKE_LLM_TOKEN_DELAY * len(pieces))
+        return {
+            **base,
+            "object": "chat.completion",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": _usage(messages, text),
+        }
+
+    async def events():
+        await asyncio.sleep(llm_fake.FAKE_LLM_FIRST_TOKEN_DELAY)
+        yield _chunk(base, {"role": "assistant", "content": ""})
+        for piece in llm_fake._tokens(text):
+            yield _chunk(base, {"content": piece})
+            await asyncio.sleep(llm_fake.FAKE_LLM_TOKEN_DELAY)
+        # Groq reports usage on the last chunk, under x_groq
+        yield _chunk(base, {}, "stop", x_groq={"id": base["id"], "usage": _usage(messages, text)})
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
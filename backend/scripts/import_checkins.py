@@ -0,0 +1,30 @@
+"""
+One-time import of an old checkins.json file into the append-only check-in log.
+
+Usage (from backend/):
+    python -m scripts.import_checkins [path/to/checkins.json]
+
+Records keep their ids; records already in the log are skipped, so the
+import is safe to re-run. Old files can hold the same id twice (ids were
+len + 1, reused after a deletion): the later record gets a fresh id.
+"""
+import sys
+import time
+
+from app.utils.checkin_store import CheckinStore, LEGACY_FILE, LOG_FILE, import_legacy_file
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else LEGACY_FILE
+
+    store = CheckinStore(LOG_FILE)
+    started = time.perf_counter()
+    count = import_legacy_file(store, path)
+    store.close()
+
+    print(f"Imported {count} check-ins from {path} into {LOG_FILE} "
+          f"in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Create the database tables and check them against the models.
+
+Usage (from backend/):
+    python -m scripts.init_db [--check]
+
+Run once per deploy (or after pulling model changes); the API no longer
+creates tables when it is imported. Existing tables are never altered:
+columns the models have but the database lacks are reported, and need a
+manual migration. --check only reports. Exits 1 while anything is missing.
+"""
+import argparse
+import sys
+
+from app.database import DATABASE_URL, check_schema, create_schema
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--check", action="store_true", help="report only, create nothing")
+    args = parser.parse_args()
+
+    print(f"Database: {DATABASE_URL.split('://')[0]}")
+    if not args.check:
+        create_schema()
+
+    missing = check_schema()
+    for table, columns in missing.items():
+        if columns is None:
+            print(f"  missing table {table}")
+        else:
+            print(f"  {table}: missing columns {', '.join(columns)} (needs a migration)")
+    if missing:
+        sys.exit(1)
+    print("Schema OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+End-to-end load test: concurrent authenticated users against the full app.
+
+Usage (from backend/):
+    python -m scripts.load_test [--users 20] [--duration 30] [--mix chat=3,analyze=2,...]
+    python -m scripts.load_test --url http://127.0.0.1:8000 ...
+
+Each user registers, logs in, then loops over requests picked by --mix
+weights (chat, stream, analyze, checkin, history, stats) until --duration
+runs out. Reported per route: requests, errors, req/s and p50/p95/p99
+latency (for stream: until the last event), plus the X-LLM-Source mix.
+
+Without --url the app runs in this process (httpx ASGI transport, lifespan
+included) on a throwaway SQLite database and check-in log, with rate limits
+off, BCRYPT_ROUNDS=4 and LLM_BACKEND=fake unless those are set. Point
+the LLM at a cassette (LLM_BACKEND=replay LLM_CASSETTE=...) or at
+scripts/fake_llm_server.py (GROQ_BASE_URL=...) to test other upstream
+behaviour. With --url the target server's own settings apply.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+import httpx
+
+SYMPTOMS = ["anxiety", "insomnia", "panic attacks", "low energy", "irritability", "sadness"]
+MESSAGES = [
+    "I can't sleep before exams",
+    "mujhe aaj bahut ghabrahat ho rahi hai",
+    "मुझे बहुत अकेलापन लग रहा है",
+    "How do I calm down after a fight with my friend?",
+    "I feel tired all the time and nothing seems fun",
+]
+
+
+def form(rng):
+    return {
+        "symptoms": rng.sample(SYMPTOMS, rng.randint(0, 3)),
+        "mood": rng.randint(1, 10),
+        "sleep_hours": rng.choice([4.5, 6.0, 7.5]),
+        "stress_level": rng.randint(1, 10),
+    }
+
+
+# -------------------------------
+# SCENARIO
+# -------------------------------
+async def chat(client, rng):
+    return await client.post("/chat/", json={"message": rng.choice(MESSAGES), "need_title": rng.random() < 0.3})
+
+
+async def stream(client, rng):
+    async with client.stream("POST", "/chat/stream", json={"message": rng.choice(MESSAGES)}) as r:
+        async for _ in r.aiter_raw():
+            pass
+    return r
+
+
+async def analyze(client, rng):
+    f = form(rng)
+    return await client.post("/analyze/", json={
+        "text": rng.choice(MESSAGES), "symptoms": f["symptoms"], "overall_mood": f["mood"],
+        "sleep_hours": f["sleep_hours"], "stress_level": f["stress_level"],
+    })
+
+
+async def checkin(client, rng):
+    return await client.post("/checkin/", json={"thoughts": rng.choice(MESSAGES), **form(rng)})
+
+
+async def history(client, rng):
+    return await client.get("/checkin/", params={"limit": 20})
+
+
+async def stats(client, rng):
+    return await client.get("/checkin/stats")
+
+
+ROUTES = {"chat": chat, "stream": stream, "analyze": analyze, "checkin": checkin, "history": history, "stats": stats}
+DEFAULT_MIX = "chat=3,stream=1,analyze=2,checkin=2,history=2,stats=1"
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ROUTES:
+            raise SystemExit(f"unknown route {name!r} in --mix (choose from {', '.join(ROUTES)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class Results:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.sources = defaultdict(Counter)
+
+    def add(self, route, seconds, response=None, error=None):
+        self.latencies[route].append(seconds)
+        self.statuses[route][response.status_code if response is not None else type(error).__name__] += 1
+        source = response.headers.get("x-llm-source") if response is not None else None
+        if source:
+            self.sources[route][source] += 1
+
+
+async def login(client, n, run_id):
+    account = {"email": f"load-{run_id}-{n}@example.com", "password": "load-test-password",
+               "full_name": f"Load {n}", "username": f"load{n}"}
+    r = await client.post("/auth/register", json=account)
+    if r.status_code not in (200, 400):     # 400: registered by an earlier run
+        raise RuntimeError(f"register failed: {r.status_code} {r.text}")
+    r = await client.post("/auth/login", json={"email": account["email"], "password": account["password"]})
+    r.raise_for_status()
+    return r.json()["access_token"]
+
+
+async def user_loop(client, token, mix, deadline, results, seed):
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    client.headers["Authorization"] = f"Bearer {token}"
+    while time.perf_counter() < deadline:
+        route = rng.choices(names, weights)[0]
+        started = time.perf_counter()
+        try:
+            response = await ROUTES[route](client, rng)
+        except httpx.HTTPError as e:
+            results.add(route, time.perf_counter() - started, error=e)
+        else:
+            results.add(route, time.perf_counter() - started, response)
+
+
+async def run(args, app=None):
+    mix = parse_mix(args.mix)
+    run_id = f"{int(time.time())}"
+    timeout = httpx.Timeout(120)
+
+    def new_client():
+        if app is not None:
+            return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load", timeout=timeout)
+        return httpx.AsyncClient(base_url=args.url, timeout=timeout)
+
+    async with new_client() as setup:
+        tokens = await asyncio.gather(*(login(setup, n, run_id) for n in range(args.users)))
+
+    results = Results()
+    clients = [new_client() for _ in range(args.users)]   # own headers per user
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(
+            user_loop(client, token, mix, started + args.duration, results, seed=n)
+            for n, (client, token) in enumerate(zip(clients, tokens))
+        ))
+    finally:
+        for client in clients:
+            await client.aclose()
+    return results, time.perf_counter() - started
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))]
+
+
+def report(results, elapsed, users):
+    print(f"\n{users} users, {elapsed:.1f}s")
+    print(f"{'route':<9} {'requests':>8} {'errors':>7} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  statuses / sources")
+    total = 0
+    for route in ROUTES:
+        values = sorted(results.latencies.get(route, []))
+        if not values:
+            continue
+        total += len(values)
+        errors = sum(n for status, n in results.statuses[route].items() if not (isinstance(status, int) and status < 400))
+        extra = dict(results.statuses[route])
+        if results.sources[route]:
+            extra.update(results.sources[route])
+        print(f"{route:<9} {len(values):>8} {errors:>7} {len(values) / elapsed:>7.1f} "
+              f"{percentile(values, 50) * 1000:>8.1f} {percentile(values, 95) * 1000:>8.1f} "
+              f"{percentile(values, 99) * 1000:>8.1f}  {extra}")
+    print(f"{'total':<9} {total:>8} {'':>7} {total / elapsed:>7.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="route=weight,... from " + ", ".join(ROUTES))
+    parser.add_argument("--url", help="load an already running server instead of an in-process app")
+    args = parser.parse_args()
+
+    if args.url:
+        results, elapsed = asyncio.run(run(args))
+        report(results, elapsed, args.users)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # never the real database or check-in log
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'load.db')}"
+        os.environ["CHECKIN_BACKEND"] = "log"
+        os.environ["CHECKIN_LOG_FILE"] = os.path.join(tmp, "checkins.log")
+        os.environ["CHECKIN_LEGACY_FILE"] = os.path.join(tmp, "none.json")
+        os.environ["DB_CREATE_ALL"] = "1"
+        os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+        os.environ.setdefault("BCRYPT_ROUNDS", "4")
+        os.environ.setdefault("LLM_BACKEND", "fake")
+        from app.main import app
+
+        async def in_process():
+            async with app.router.lifespan_context(app):
+                return await run(args, app)
+
+        results, elapsed = asyncio.run(in_process())
+        report(results, elapsed, args.users)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
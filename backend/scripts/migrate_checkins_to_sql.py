@@ -0,0 +1,64 @@
+"""
+Bulk-load existing check-ins into the `checkins` table.
+
+Usage (from backend/):
+    python -m scripts.migrate_checkins_to_sql [checkins.json | checkins.log] [--batch 1000]
+
+The source is streamed (an old checkins.json array is decoded one element at
+a time; an append-only log is read through its offset index), and rows are
+written with one executemany per batch. Ids are kept, so the same ids work
+against either backend; records already in the table and records of users
+that no longer exist are skipped, which makes the migration safe to re-run.
+A different record reusing a taken id (old checkins.json files did after a
+deletion) gets a fresh id.
+Works on SQLite and Postgres. Set CHECKIN_BACKEND=sql afterwards.
+"""
+import argparse
+import time
+
+from app.database import SessionLocal, engine, Base
+from app.utils.checkin_sql import insert_batch, sync_id_sequence
+from app.utils.checkin_store import CheckinStore, iter_json_array, LEGACY_FILE
+
+
+def iter_source(path):
+    if path.endswith(".json"):
+        with open(path, "r") as f:
+            yield from iter_json_array(f)
+    else:
+        store = CheckinStore(path)
+        try:
+            yield from store.iter_records()
+        finally:
+            store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("source", nargs="?", default=LEGACY_FILE)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+
+    started = time.perf_counter()
+    seen = inserted = 0
+    batch = []
+
+    with SessionLocal() as db:
+        for record in iter_source(args.source):
+            batch.append(record)
+            seen += 1
+            if len(batch) >= args.batch:
+                inserted += insert_batch(db, batch)
+                batch = []
+                print(f"  {seen} read, {inserted} inserted")
+        inserted += insert_batch(db, batch)
+        sync_id_sequence(db)
+
+    print(f"Migrated {inserted} of {seen} check-ins from {args.source} "
+          f"in {time.perf_counter() - started:.2f}s ({seen - inserted} skipped)")
+
+
+if __name__ == "__main__":
+    main()
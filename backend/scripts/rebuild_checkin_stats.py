@@ -0,0 +1,39 @@
+"""
+Recompute every user's dashboard stats from the raw check-in log.
+
+Usage (from backend/):
+    python -m scripts.rebuild_checkin_stats
+
+The aggregates are normally maintained incrementally on each write and
+delete; this rebuilds them from the records themselves and reports any user
+whose incremental aggregate had drifted.
+
+The aggregates live in memory only, so the rebuild affects this script's
+own process: running API workers keep theirs. A worker builds its
+aggregates from the log when it starts, so restart the workers if drift is
+reported.
+"""
+from datetime import datetime
+
+from app.utils.checkin_store import CheckinStore, LOG_FILE
+
+
+def main():
+    store = CheckinStore(LOG_FILE)
+    drifted = store.rebuild_stats()
+    today = datetime.utcnow().date()
+
+    for user_id, stats in sorted(store.all_stats().items(), key=lambda kv: str(kv[0])):
+        print(user_id, stats.as_dict(today))
+
+    if drifted:
+        print(f"Drifted aggregates for users: {sorted(drifted, key=str)} "
+              "(rebuilt in this process only; restart the API workers to rebuild theirs)")
+    else:
+        print("All incremental aggregates matched the raw store.")
+
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Concurrency stress test for the check-in writer.
+
+Usage (from backend/):
+    python -m scripts.stress_checkin_writes [--processes 4] [--threads 8] [--writes 200]
+                                            [--reopens 100] [--archive]
+
+Several processes (standing in for uvicorn workers), each with a thread pool
+(standing in for FastAPI's sync handler threads), add and delete check-ins
+against one shared log while another process keeps compacting it (with
+--archive, it alternately moves every record into the archive). One more
+process keeps opening a fresh store, adding a check-in and closing it, and
+the workers read between writes, so stores are (re)opened while the log is
+being swapped underneath them. Afterwards the log is reopened from disk and
+checked:
+
+  * every acknowledged write is present, and nothing else is
+  * ids are unique and were never handed out twice
+  * deleted records stay deleted
+
+Exits non-zero if any check fails.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.utils.checkin_store import CheckinStore
+
+
+def worker(path, proc_no, threads, writes, results):
+    store = CheckinStore(path)
+
+    def run(thread_no):
+        added, deleted = [], []
+        for i in range(writes):
+            rec = store.add({
+                "user_id": proc_no * 1000 + thread_no,
+                "timestamp": f"2025-01-01T00:00:00.{proc_no:02d}{thread_no:02d}{i:04d}Z",
+                "title": "stress",
+                "input": {},
+                "prediction": {"n": i},
+            })
+            added.append(rec["id"])
+            store.user_page(rec["user_id"], limit=1)    # reads may reload a swapped log
+            # delete every 10th record we wrote
+            if i % 10 == 9 and store.delete(added[-5]):
+                deleted.append(added[-5])
+        return added, deleted
+
+    with ThreadPoolExecutor(threads) as pool:
+        outcomes = list(pool.map(run, range(threads)))
+
+    results.put((
+        [i for added, _ in outcomes for i in added],
+        [i for _, deleted in outcomes for i in deleted],
+        store.writer.batches,
+        store.writer.ops,
+    ))
+    store.close()
+
+
+def reopener(path, reopens, results):
+    added = []
+    for i in range(reopens):
+        store = CheckinStore(path)
+        added.append(store.add({
+            "user_id": 999999,
+            "timestamp": f"2025-01-01T00:00:01.{i:06d}Z",
+            "title": "reopen",
+            "input": {},
+            "prediction": {"n": i},
+        })["id"])
+        store.close()
+    results.put((added, [], reopens, reopens))
+
+
+def compactor(path, stop, archive):
+    store = CheckinStore(path)
+    rounds = 0
+    while not stop.is_set():
+        if archive and rounds % 2:
+            store.archive("9999")
+        else:
+            store.compact()
+        rounds += 1
+        time.sleep(0.5)
+    store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--writes", type=int, default=200)
+    parser.add_argument("--reopens", type=int, default=100, help="stores opened by the reopener")
+    parser.add_argument("--archive", action="store_true", help="also archive while writing")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="checkin-stress-"), "checkins.log")
+    ctx = multiprocessing.get_context("spawn")
+    results, stop = ctx.Queue(), ctx.Event()
+
+    started = time.perf_counter()
+    comp = ctx.Process(target=compactor, args=(path, stop, args.archive))
+    procs = [
+        ctx.Process(target=worker, args=(path, p, args.threads, args.writes, results))
+        for p in range(args.processes)
+    ]
+    procs.append(ctx.Process(target=reopener, args=(path, args.reopens, results)))
+    comp.start()
+    for p in procs:
+        p.start()
+
+    added, deleted, batches, ops = [], [], 0, 0
+    for _ in procs:
+        a, d, b, o = results.get()
+        added += a
+        deleted += d
+        batches += b
+        ops += o
+    for p in procs:
+        p.join()
+    stop.set()
+    comp.join()
+    elapsed = time.perf_counter() - started
+
+    store = CheckinStore(path)
+    live = set(store.ids())
+    store.close()
+
+    expected = set(added) - set(deleted)
+    failures = []
+    if len(added) != len(set(added)):
+        failures.append(f"{len(added) - len(set(added))} duplicate ids handed out")
+    if expected - live:
+        failures.append(f"{len(expected - live)} acknowledged records lost")
+    if live - expected:
+        failures.append(f"{len(live - expected)} unexpected records present")
+    if set(deleted) & live:
+        failures.append(f"{len(set(deleted) & live)} deleted records came back")
+
+    print(f"writes={len(added)} deletes={len(deleted)} live={len(live)} "
+          f"in {elapsed:.2f}s ({(len(added) + len(deleted)) / elapsed:.0f} ops/s), "
+          f"{ops} ops in {batches} fsync batches")
+    for f in failures:
+        print("FAIL:", f)
+    if failures:
+        sys.exit(1)
+    print("OK: no lost or duplicated check-ins")
+
+
+if __name__ == "__main__":
+    main()
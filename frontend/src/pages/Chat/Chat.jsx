@@ -151,7 +151,7 @@ const Chat = () => {
     try {
       const response = await api.post(
         "/chat/",
-        { message },
+        { message, need_title: !currentSession.titleGenerated },
         { headers: { Authorization: `Bearer ${token}` } }
       );
 
@@ -15,7 +15,7 @@ import api from "../../services/api";
 
 
 const Profile = () => {
-  const { user, updateUser } = useAuthStore();
+  const { user, updateUser, updateToken } = useAuthStore();
   const { theme, toggleTheme } = useTheme();
   const [isEditing, setIsEditing] = useState(false);
   const [isLoading, setIsLoading] = useState(false);
@@ -44,6 +44,7 @@ const Profile = () => {
     });
 
     updateUser(res.data.user);
+    if (res.data.access_token) updateToken(res.data.access_token);
     setIsEditing(false);
 
     toast.success("Profile updated successfully!");
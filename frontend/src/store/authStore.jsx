@@ -115,6 +115,14 @@ const useAuthStore = create(
         }));
       },
 
+      // ---------------------
+      // UPDATE TOKEN (fresh claims after a profile change)
+      // ---------------------
+      updateToken: (token) => {
+        set({ token });
+        api.defaults.headers.common["Authorization"] = `Bearer ${token}`;
+      },
+
       setError: (error) => {
         set({ error });
       },